@@ -1,15 +1,43 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Dict, Any, Optional, List, Set, Tuple, TYPE_CHECKING
 import numpy as np
 from sklearn.tree import DecisionTreeClassifier
 from sklearn.preprocessing import LabelEncoder
 import pickle
 import os
+import tempfile
+from django.conf import settings
 from django.db.models import Count, Avg, Max  # pyright: ignore[reportAttributeAccessIssue]
+from django.utils import timezone
+from . import suggestion_trace, topic_similarity
 from .models import QuizResult, Profile
+from .review_modes import review_quiz_q
 from ui.models import MCQ
 
+if TYPE_CHECKING:
+    from .summary import UserSummary
+
+# A sub-topic is called out when its average trails the topic's by this much,
+# or falls below the passing score outright
+WEAK_SUB_TOPIC_MIN_QUIZZES = 2
+WEAK_SUB_TOPIC_MARGIN = 10.0
+WEAK_SUB_TOPIC_SCORE = 60.0
+# Topics past the Hard-level mastery rule aren't offered as the next topic
+MASTERY_HARD_COUNT = 3
+MASTERY_HARD_AVG = 80.0
+ACTION_MAP = {0: "Easy", 1: "Medium", 2: "Hard", 3: "NextTopic"}
+# Largest user list accepted by one batch_suggestions request
+MAX_BATCH_USERS = 5000
+# Shipped with the code and only ever read; retrained models are written to
+# settings.QUIZ_SUGGESTION_MODEL_PATH so a deploy doesn't clobber them
+BUNDLED_MODEL_PATH = os.path.join(os.path.dirname(__file__), 'suggestion_model.pkl')
+
+
+def model_path() -> str:
+    default = os.path.join(settings.BASE_DIR, 'models', 'suggestion_model.pkl')
+    return str(getattr(settings, 'QUIZ_SUGGESTION_MODEL_PATH', default))
+
 
 @dataclass
 class AISuggestion:
@@ -19,11 +47,13 @@ class AISuggestion:
     rationale: str
     stats: Dict[str, Any]
     priority: int = 1  # 1=primary, 2=secondary, 3=alternative
+    sub_topic: Optional[str] = None  # set when the suggestion targets a weak sub-topic
 
     def to_dict(self) -> Dict[str, Any]:
         return {
             "text": self.text,
             "topic": self.topic,
+            "sub_topic": self.sub_topic,
             "recommended_difficulty": self.recommended_difficulty,
             "rationale": self.rationale,
             "stats": self.stats,
@@ -55,13 +85,13 @@ class MLSuggestionEngine:
         self.difficulty_encoder = LabelEncoder()
         self.action_encoder = LabelEncoder()
         self.is_trained = False
-        self.model_path = os.path.join(os.path.dirname(__file__), 'suggestion_model.pkl')
+        self.model_path = model_path()
         self._load_or_train_model()
 
     def _get_focus_topic(self, user: Profile) -> Optional[str]:
         # Determine the user's focus topic by most attempts overall
         agg = (
-            QuizResult.objects.filter(user=user)
+            QuizResult.objects.filter(user=user).exclude(review_quiz_q())
             .values("topic")
             .annotate(quiz_count=Count("id"))
             .order_by("-quiz_count")
@@ -116,13 +146,151 @@ class MLSuggestionEngine:
         
         return features
 
-    def _find_next_topic(self, current_topic: str) -> Optional[str]:
-        # Suggest another topic: choose a topic with the fewest attempts, or any different topic if no history.
-        topics = list(
-            MCQ.objects.values_list("topic", flat=True).distinct().order_by("topic")
+    def _features_from_summary(self, topic_stats: Dict[str, Any]) -> np.ndarray:
+        """Build the same feature vector as _extract_features from a UserSummary topic entry"""
+        def avg(bucket):
+            return bucket["score_sum"] / bucket["count"] if bucket["count"] else 0.0
+
+        by_diff = topic_stats["by_difficulty"]
+        total_quizzes = topic_stats["count"]
+        overall_avg = avg(topic_stats)
+        days_since_first = 0
+        days_since_last = 0
+        if total_quizzes > 0:
+            today = timezone.localdate()
+            if topic_stats["first_day"]:
+                days_since_first = (today - topic_stats["first_day"]).days
+            if topic_stats["latest"]:
+                days_since_last = (timezone.now() - topic_stats["latest"]).days
+
+        return np.array([
+            by_diff["Easy"]["count"], avg(by_diff["Easy"]),
+            by_diff["Medium"]["count"], avg(by_diff["Medium"]),
+            by_diff["Hard"]["count"], avg(by_diff["Hard"]),
+            total_quizzes, overall_avg,
+            days_since_first, days_since_last
+        ]).reshape(1, -1)
+
+    def _weak_sub_topic(self, topic_stats: Dict[str, Any],
+                        sub_stats: Dict[str, Dict[str, Any]]) -> Optional[Tuple[str, float]]:
+        """The sub-topic trailing the rest of its topic the most, with its average score"""
+        if len(sub_stats) < 2 or not topic_stats["count"]:
+            return None
+        topic_avg = topic_stats["score_sum"] / topic_stats["count"]
+        candidates = [
+            (sub_topic, stats["score_sum"] / stats["count"])
+            for sub_topic, stats in sub_stats.items()
+            if stats["count"] >= WEAK_SUB_TOPIC_MIN_QUIZZES
+        ]
+        if not candidates:
+            return None
+        sub_topic, avg = min(candidates, key=lambda item: item[1])
+        if avg < topic_avg - WEAK_SUB_TOPIC_MARGIN or avg < WEAK_SUB_TOPIC_SCORE:
+            return sub_topic, avg
+        return None
+
+    def _find_next_topic(self, current_topic: str, all_topics: Optional[List[str]] = None,
+                         mastered: Optional[Set[str]] = None) -> Optional[str]:
+        # Prefer the unmastered topic whose questions read most like the current one
+        exclude = {current_topic} | (mastered or set())
+        try:
+            nearest = topic_similarity.get_index().nearest(current_topic, exclude)
+        except Exception as e:
+            print(f"Topic similarity lookup failed: {e}")
+            nearest = None
+        if nearest and (all_topics is None or nearest in all_topics):
+            return nearest
+        # Otherwise any other topic, unmastered ones first
+        if all_topics is None:
+            all_topics = list(
+                MCQ.objects.values_list("topic", flat=True).distinct().order_by("topic")
+            )
+        topics = [t for t in all_topics if t and t != current_topic]
+        unmastered = [t for t in topics if t not in exclude]
+        return (unmastered or topics or [None])[0]
+
+    def _mastered_topics(self, topic_stats: Dict[str, Dict[str, Any]]) -> Set[str]:
+        """Topics meeting the Hard-level mastery rule the model was trained on"""
+        mastered = set()
+        for topic, stats in topic_stats.items():
+            hard = stats["by_difficulty"]["Hard"]
+            if hard["count"] >= MASTERY_HARD_COUNT and hard["score_sum"] / hard["count"] > MASTERY_HARD_AVG:
+                mastered.add(topic)
+        return mastered
+
+    def _new_user_suggestions(self, all_topics: List[str], max_suggestions: int) -> List[AISuggestion]:
+        # For new users, suggest multiple topics at Easy level
+        topics = [t for t in all_topics if t][:max_suggestions]
+        return [
+            AISuggestion(
+                text=f"Start with '{topic}' at Easy level",
+                topic=topic,
+                recommended_difficulty="Easy",
+                rationale="Begin your learning journey with foundational questions",
+                stats={"alternative": True},
+                priority=i
+            )
+            for i, topic in enumerate(topics, start=1)
+        ]
+
+    def _topic_suggestion(self, topic: str, predicted_action: str, confidence: float, priority: int,
+                          next_topic: Optional[str] = None, weak: Optional[Tuple[str, float]] = None,
+                          sub_action: Optional[str] = None) -> AISuggestion:
+        """The suggestion for one attempted topic, given the model's action for it"""
+        if predicted_action == "NextTopic":
+            if next_topic:
+                return AISuggestion(
+                    text=f"You've mastered '{topic}'! Try '{next_topic}'",
+                    topic=next_topic,
+                    recommended_difficulty="Easy",
+                    rationale="Based on your strong performance across all difficulty levels",
+                    stats={"confidence": confidence, "previous_topic": topic},
+                    priority=priority
+                )
+            # No new topic available, suggest continuing current topic at Hard
+            return AISuggestion(
+                text=f"Continue mastering '{topic}' at Hard level",
+                topic=topic,
+                recommended_difficulty="Hard",
+                rationale="Keep challenging yourself on this topic",
+                stats={"confidence": confidence},
+                priority=priority
+            )
+        if weak:
+            sub_topic, sub_avg = weak
+            difficulty = predicted_action if sub_action in (None, "NextTopic") else sub_action
+            return AISuggestion(
+                text=f"Try {difficulty} difficulty for '{topic}', focusing on '{sub_topic}'",
+                topic=topic,
+                sub_topic=sub_topic,
+                recommended_difficulty=difficulty,
+                rationale=f"Your average on '{sub_topic}' ({sub_avg:.0f}%) trails the rest of this topic",
+                stats={"confidence": confidence, "sub_topic_avg": round(sub_avg, 1)},
+                priority=priority
+            )
+        return AISuggestion(
+            text=f"Try {predicted_action} difficulty for '{topic}'",
+            topic=topic,
+            recommended_difficulty=predicted_action,
+            rationale="Based on your performance history and learning progress",
+            stats={"confidence": confidence},
+            priority=priority
         )
-        topics = [t for t in topics if t and t != current_topic]
-        return topics[0] if topics else None
+
+    def _unexplored_suggestions(self, all_topics: List[str], attempted_topics: Set[str],
+                                count: int, offset: int) -> List[AISuggestion]:
+        unexplored = [t for t in all_topics if t and t not in attempted_topics]
+        return [
+            AISuggestion(
+                text=f"Explore new topic: '{topic}' at Easy level",
+                topic=topic,
+                recommended_difficulty="Easy",
+                rationale="Diversify your learning with a new subject",
+                stats={"unexplored": True},
+                priority=offset + i
+            )
+            for i, topic in enumerate(unexplored[:count], start=1)
+        ]
 
     def _generate_training_data(self) -> Tuple[np.ndarray, np.ndarray]:
         """Generate synthetic training data based on the original rules"""
@@ -203,17 +371,19 @@ class MLSuggestionEngine:
         return np.array(X_train), np.array(y_train)
 
     def _load_or_train_model(self):
-        """Load existing model or train a new one"""
-        if os.path.exists(self.model_path):
+        """Load the deployed model, else the bundled one, else train a new one"""
+        for path in (self.model_path, BUNDLED_MODEL_PATH):
+            if not os.path.exists(path):
+                continue
             try:
-                with open(self.model_path, 'rb') as f:
+                with open(path, 'rb') as f:
                     model_data = pickle.load(f)
                     self.model = model_data['model']
                     self.action_encoder = model_data['action_encoder']
                     self.is_trained = True
                     return
             except Exception as e:
-                print(f"Failed to load model: {e}")
+                print(f"Failed to load model from {path}: {e}")
         
         # Train new model
         self._train_model()
@@ -230,114 +400,247 @@ class MLSuggestionEngine:
         self.is_trained = True
         
         # Save the trained model
+        self._save_model()
+
+    def _save_model(self):
         try:
-            model_data = {
-                'model': self.model,
-                'action_encoder': self.action_encoder
-            }
-            with open(self.model_path, 'wb') as f:
-                pickle.dump(model_data, f)
+            self._write_model()
         except Exception as e:
             print(f"Failed to save model: {e}")
 
-    def get_multiple_suggestions(self, user: Profile, max_suggestions: int = 3) -> List[AISuggestion]:
-        """Generate multiple AI suggestions for the user across different topics"""
+    def _write_model(self):
+        """Pickle to a temp file beside the target and rename it into place, so readers never see a partial file"""
+        model_data = {
+            'model': self.model,
+            'action_encoder': self.action_encoder
+        }
+        directory = os.path.dirname(self.model_path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(model_data, f)
+            os.replace(tmp_path, self.model_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def replace_model(self, model):
+        """
+        Swap in a model trained elsewhere (e.g. on real quiz history) and
+        persist it; raises OSError or PicklingError if it can't be written.
+        """
+        self.model = model
+        self.action_encoder.fit([0, 1, 2, 3])  # Easy, Medium, Hard, NextTopic
+        self.is_trained = True
+        self._write_model()
+
+    def get_multiple_suggestions(self, user: Profile, max_suggestions: int = 3,
+                                 summary: Optional["UserSummary"] = None) -> List[AISuggestion]:
+        """
+        Generate multiple AI suggestions for the user across different topics.
+
+        When a precomputed ``UserSummary`` is passed, features come from it and
+        the only extra query is one distinct-topic read of the question bank.
+        """
+        trace = suggestion_trace.start("get_multiple_suggestions", user)
+        suggestions: List[AISuggestion] = []
+        try:
+            suggestions = self._get_multiple_suggestions(user, max_suggestions, summary, trace)
+            return suggestions
+        finally:
+            suggestion_trace.finish(trace, len(suggestions))
+
+    def _get_multiple_suggestions(self, user: Profile, max_suggestions: int,
+                                  summary: Optional["UserSummary"], trace) -> List[AISuggestion]:
         suggestions = []
         
+        # The topic list is shared by every branch below, so read it once
+        all_topics_cache: List[List[str]] = []
+
+        def all_topics() -> List[str]:
+            if not all_topics_cache:
+                with trace.phase("topic_list"):
+                    all_topics_cache.append(list(
+                        MCQ.objects.values_list("topic", flat=True).distinct().order_by("topic")
+                    ))
+            return all_topics_cache[0]
+
         # Get quiz history
-        any_quizzes = QuizResult.objects.filter(user=user)
-        if not any_quizzes.exists():
-            # For new users, suggest multiple topics at Easy level
-            topics = list(MCQ.objects.values_list("topic", flat=True).distinct().order_by("topic")[:max_suggestions])
-            for i, topic in enumerate(topics, start=1):
-                suggestions.append(AISuggestion(
-                    text=f"Start with '{topic}' at Easy level",
-                    topic=topic,
-                    recommended_difficulty="Easy",
-                    rationale="Begin your learning journey with foundational questions",
-                    stats={"alternative": True},
-                    priority=i
-                ))
-            return suggestions[:max_suggestions]
+        if summary is not None:
+            has_history = summary.has_history
+        else:
+            with trace.phase("history"):
+                has_history = QuizResult.objects.filter(user=user).exclude(review_quiz_q()).exists()
+        if not has_history:
+            return self._new_user_suggestions(all_topics(), max_suggestions)
         
         # Get all topics the user has attempted, sorted by most recent activity
-        user_topics = (
-            QuizResult.objects.filter(user=user)
-            .values("topic")
-            .annotate(
-                quiz_count=Count("id"),
-                latest_attempt=Max("date_taken")  # type: ignore
+        # Topic and sub-topic features both roll up from the same summary rows
+        sub_topic_stats: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        if summary is not None:
+            topic_stats = summary.topic_stats()
+            for (topic, sub_topic), stats in summary.sub_topic_stats().items():
+                sub_topic_stats.setdefault(topic, {})[sub_topic] = stats
+            user_topics = sorted(
+                topic_stats, key=lambda t: topic_stats[t]["latest"] or timezone.now(), reverse=True
             )
-            .order_by("-latest_attempt")
-        )
+            mastered = self._mastered_topics(topic_stats)
+        else:
+            topic_stats = None
+            mastered = None
+            with trace.phase("history"):
+                user_topics = [
+                    row["topic"] for row in
+                    QuizResult.objects.filter(user=user).exclude(review_quiz_q())
+                    .values("topic")
+                    .annotate(
+                        quiz_count=Count("id"),
+                        latest_attempt=Max("date_taken")  # type: ignore
+                    )
+                    .order_by("-latest_attempt")
+                ]
         
         # Generate suggestions for each topic the user has attempted
-        for topic_data in user_topics[:max_suggestions]:
-            topic = topic_data["topic"]
+        for topic in user_topics[:max_suggestions]:
             try:
-                features = self._extract_features(user, topic)
-                prediction = self.model.predict(features)[0]
-                prediction_proba = self.model.predict_proba(features)[0]
+                with trace.phase("features"):
+                    if topic_stats is not None:
+                        features = self._features_from_summary(topic_stats[topic])
+                    else:
+                        features = self._extract_features(user, topic)
+                with trace.phase("predict"):
+                    prediction = self.model.predict(features)[0]
+                    prediction_proba = self.model.predict_proba(features)[0]
                 confidence = max(prediction_proba) * 100
                 
-                action_map = {0: "Easy", 1: "Medium", 2: "Hard", 3: "NextTopic"}
-                predicted_action = action_map[prediction]
+                predicted_action = ACTION_MAP[prediction]
+                trace.prediction(topic, features, predicted_action, confidence)
                 
+                next_topic = weak = sub_action = None
                 if predicted_action == "NextTopic":
                     # User has mastered this topic, suggest a new one
-                    next_topic = self._find_next_topic(topic)
-                    if next_topic:
-                        suggestions.append(AISuggestion(
-                            text=f"You've mastered '{topic}'! Try '{next_topic}'",
-                            topic=next_topic,
-                            recommended_difficulty="Easy",
-                            rationale="Based on your strong performance across all difficulty levels",
-                            stats={"confidence": confidence, "previous_topic": topic},
-                            priority=len(suggestions) + 1
-                        ))
-                    else:
-                        # No new topic available, suggest continuing current topic at Hard
-                        suggestions.append(AISuggestion(
-                            text=f"Continue mastering '{topic}' at Hard level",
-                            topic=topic,
-                            recommended_difficulty="Hard",
-                            rationale="Keep challenging yourself on this topic",
-                            stats={"confidence": confidence},
-                            priority=len(suggestions) + 1
-                        ))
-                else:
-                    suggestions.append(AISuggestion(
-                        text=f"Try {predicted_action} difficulty for '{topic}'",
-                        topic=topic,
-                        recommended_difficulty=predicted_action,
-                        rationale="Based on your performance history and learning progress",
-                        stats={"confidence": confidence},
-                        priority=len(suggestions) + 1
-                    ))
+                    topics = all_topics()
+                    with trace.phase("next_topic"):
+                        next_topic = self._find_next_topic(topic, topics, mastered)
+                elif topic_stats is not None:
+                    weak = self._weak_sub_topic(topic_stats[topic], sub_topic_stats.get(topic, {}))
+                    if weak:
+                        # Pick the level for the sub-topic from its own history
+                        sub_features = self._features_from_summary(sub_topic_stats[topic][weak[0]])
+                        with trace.phase("predict"):
+                            sub_action = ACTION_MAP[self.model.predict(sub_features)[0]]
+                suggestions.append(self._topic_suggestion(
+                    topic, predicted_action, confidence, len(suggestions) + 1, next_topic, weak, sub_action,
+                ))
             except Exception as e:
                 # If ML fails for this topic, skip it
+                trace.error(topic, e)
                 continue
         
         # If we don't have enough suggestions, add unexplored topics
         if len(suggestions) < max_suggestions:
-            attempted_topics = set(t["topic"] for t in user_topics)
-            all_topics = MCQ.objects.values_list("topic", flat=True).distinct()
-            unexplored = [t for t in all_topics if t not in attempted_topics]
-            
-            for topic in unexplored[:max_suggestions - len(suggestions)]:
-                suggestions.append(AISuggestion(
-                    text=f"Explore new topic: '{topic}' at Easy level",
-                    topic=topic,
-                    recommended_difficulty="Easy",
-                    rationale="Diversify your learning with a new subject",
-                    stats={"unexplored": True},
-                    priority=len(suggestions) + 1
-                ))
+            suggestions += self._unexplored_suggestions(
+                all_topics(), set(user_topics), max_suggestions - len(suggestions), len(suggestions),
+            )
         
         return suggestions[:max_suggestions]
 
+    def batch_suggestions(self, user_ids: List[int], max_suggestions: int = 3) -> Dict[int, List[AISuggestion]]:
+        """
+        Suggestions for many users at once, keyed by user id in request order
+        (ids with no Profile are left out).
+
+        History comes from one grouped rollup query per 1000 users and every
+        user's topic and weak sub-topic features are scored in a single model
+        call, so the cost grows linearly with the number of users.
+
+        Each call is traced once, as a ``batch_suggestions`` entry with its
+        user count and phase timings. Per-row predictions are left out so one
+        large batch can't crowd the buffer.
+        """
+        trace = suggestion_trace.start("batch_suggestions", None)
+        results: Dict[int, List[AISuggestion]] = {}
+        try:
+            results = self._batch_suggestions(user_ids, max_suggestions, trace)
+            return results
+        finally:
+            suggestion_trace.finish(trace, sum(len(s) for s in results.values()), users=len(results))
+
+    def _batch_suggestions(self, user_ids: List[int], max_suggestions: int, trace) -> Dict[int, List[AISuggestion]]:
+        from .summary import get_user_summaries
+
+        with trace.phase("history"):
+            known = set(Profile.objects.filter(id__in=user_ids).values_list("id", flat=True))
+            summaries = get_user_summaries([i for i in dict.fromkeys(user_ids) if i in known])
+        with trace.phase("topic_list"):
+            all_topics = list(MCQ.objects.values_list("topic", flat=True).distinct().order_by("topic"))
+
+        # One feature row per (user, topic), plus one per weak sub-topic
+        rows: List[np.ndarray] = []
+        plans = []  # (user id, topic, row, weak sub-topic, its row)
+        attempted: Dict[int, Tuple[List[str], Set[str]]] = {}
+        with trace.phase("features"):
+            for user_id, summary in summaries.items():
+                if not summary.has_history:
+                    continue
+                topic_stats = summary.topic_stats()
+                sub_topic_stats: Dict[str, Dict[str, Dict[str, Any]]] = {}
+                for (topic, sub_topic), stats in summary.sub_topic_stats().items():
+                    sub_topic_stats.setdefault(topic, {})[sub_topic] = stats
+                user_topics = sorted(
+                    topic_stats, key=lambda t: topic_stats[t]["latest"] or timezone.now(), reverse=True
+                )
+                attempted[user_id] = (user_topics, self._mastered_topics(topic_stats))
+                for topic in user_topics[:max_suggestions]:
+                    row, sub_row = len(rows), None
+                    rows.append(self._features_from_summary(topic_stats[topic]))
+                    weak = self._weak_sub_topic(topic_stats[topic], sub_topic_stats.get(topic, {}))
+                    if weak:
+                        sub_row = len(rows)
+                        rows.append(self._features_from_summary(sub_topic_stats[topic][weak[0]]))
+                    plans.append((user_id, topic, row, weak, sub_row))
+
+        if rows:
+            with trace.phase("predict"):
+                proba = self.model.predict_proba(np.vstack(rows))
+                predictions = self.model.classes_[proba.argmax(axis=1)]
+                confidences = proba.max(axis=1) * 100
+
+        results: Dict[int, List[AISuggestion]] = {}
+        with trace.phase("next_topic"):
+            for user_id, summary in summaries.items():
+                results[user_id] = [] if summary.has_history else self._new_user_suggestions(all_topics, max_suggestions)
+            for user_id, topic, row, weak, sub_row in plans:
+                suggestions = results[user_id]
+                action = ACTION_MAP[predictions[row]]
+                next_topic = sub_action = None
+                if action == "NextTopic":
+                    next_topic = self._find_next_topic(topic, all_topics, attempted[user_id][1])
+                elif sub_row is not None:
+                    sub_action = ACTION_MAP[predictions[sub_row]]
+                suggestions.append(self._topic_suggestion(
+                    topic, action, confidences[row], len(suggestions) + 1, next_topic, weak, sub_action,
+                ))
+            for user_id, (user_topics, _) in attempted.items():
+                suggestions = results[user_id]
+                if len(suggestions) < max_suggestions:
+                    suggestions += self._unexplored_suggestions(
+                        all_topics, set(user_topics), max_suggestions - len(suggestions), len(suggestions),
+                    )
+        return results
+
     def recommend(self, user: Profile) -> AISuggestion:
         """Generate ML-based recommendation for the user"""
+        trace = suggestion_trace.start("recommend", user)
+        suggestion = None
+        try:
+            suggestion = self._recommend(user, trace)
+            return suggestion
+        finally:
+            suggestion_trace.finish(trace, 1 if suggestion and suggestion.topic else 0)
+
+    def _recommend(self, user: Profile, trace) -> AISuggestion:
         if not self.is_trained:
             return AISuggestion(
                 text="AI model is not trained yet. Please try again later.",
@@ -348,8 +651,9 @@ class MLSuggestionEngine:
             )
         
         # No history case
-        any_quizzes = QuizResult.objects.filter(user=user)
-        if not any_quizzes.exists():
+        with trace.phase("history"):
+            has_history = QuizResult.objects.filter(user=user).exclude(review_quiz_q()).exists()
+        if not has_history:
             first_topic = MCQ.objects.values_list("topic", flat=True).distinct().order_by("topic").first()
             return AISuggestion(
                 text=f"Start with an Easy quiz to build confidence" + (f" on '{first_topic}'" if first_topic else ""),
@@ -359,9 +663,10 @@ class MLSuggestionEngine:
                 stats={"has_history": False, "model_prediction": "new_user"},
             )
 
-        focus_topic = self._get_focus_topic(user)
-        if not focus_topic:
-            focus_topic = MCQ.objects.values_list("topic", flat=True).distinct().order_by("topic").first()
+        with trace.phase("focus_topic"):
+            focus_topic = self._get_focus_topic(user)
+            if not focus_topic:
+                focus_topic = MCQ.objects.values_list("topic", flat=True).distinct().order_by("topic").first()
 
         if not focus_topic:
             return AISuggestion(
@@ -374,20 +679,23 @@ class MLSuggestionEngine:
 
         # Extract features for ML prediction
         try:
-            features = self._extract_features(user, focus_topic)
-            prediction = self.model.predict(features)[0]
-            prediction_proba = self.model.predict_proba(features)[0]
+            with trace.phase("features"):
+                features = self._extract_features(user, focus_topic)
+            with trace.phase("predict"):
+                prediction = self.model.predict(features)[0]
+                prediction_proba = self.model.predict_proba(features)[0]
             
             # Get confidence score (max probability as percentage)
             confidence = max(prediction_proba) * 100
             
             # Map prediction to action
-            action_map = {0: "Easy", 1: "Medium", 2: "Hard", 3: "NextTopic"}
-            predicted_action = action_map[prediction]
+            predicted_action = ACTION_MAP[prediction]
+            trace.prediction(focus_topic, features, predicted_action, confidence)
             
             # Generate suggestion based on ML prediction
             if predicted_action == "NextTopic":
-                next_topic = self._find_next_topic(focus_topic)
+                with trace.phase("next_topic"):
+                    next_topic = self._find_next_topic(focus_topic)
                 text = f"Great job mastering '{focus_topic}'! Try a new topic" + (f" like '{next_topic}'" if next_topic else "")
                 return AISuggestion(
                     text=text,
@@ -418,6 +726,7 @@ class MLSuggestionEngine:
                 
         except Exception as e:
             # Fallback to simple rule-based suggestion
+            trace.error(focus_topic, e)
             return AISuggestion(
                 text=f"Continue practicing on '{focus_topic}' - Easy level recommended",
                 topic=focus_topic,
@@ -0,0 +1,99 @@
+from __future__ import annotations
+from typing import Any, Callable, Dict, Iterable
+import hashlib
+import json
+import time
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+
+# Chart payloads only change when the user's history does; suggestions also
+# depend on the question bank, so they are kept for a shorter time.
+PAYLOAD_TIMEOUTS = {
+    "full": 300,
+    "charts": 3600,
+    "suggestions": 300,
+}
+GENERATION_KEY = "analytics:generation"
+
+# Backends that keep entries inside one process: a version bumped by the
+# worker that saved a result would be invisible to every other worker.
+PROCESS_LOCAL_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def check_shared_cache(app_configs, **kwargs):
+    """System check: history versions must live in a cache every worker shares"""
+    backend = settings.CACHES.get("default", {}).get("BACKEND", PROCESS_LOCAL_BACKENDS[0])
+    if backend in PROCESS_LOCAL_BACKENDS:
+        return [checks.Warning(
+            f"The default cache ({backend}) is local to one process, so new quiz results only "
+            "invalidate cached analytics in the worker that saved them.",
+            hint="Configure a shared CACHES backend (database, Redis or Memcached).",
+            id="base.W001",
+        )]
+    return []
+
+
+def _new_version() -> str:
+    # Time-based so a version that fell out of the cache is never reused
+    return str(time.time_ns())
+
+
+def _version_key(user_id: int) -> str:
+    return f"analytics:version:{user_id}"
+
+
+def history_version(user_id: int) -> str:
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        generation = _new_version()
+        cache.add(GENERATION_KEY, generation, None)
+        generation = cache.get(GENERATION_KEY, generation)
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        version = _new_version()
+        cache.add(_version_key(user_id), version, None)
+        version = cache.get(_version_key(user_id), version)
+    return f"{generation}.{version}"
+
+
+def bump_history_version(user_ids: Iterable[int]):
+    """Invalidate cached analytics for these users (called after new results commit)"""
+    cache.set_many({_version_key(user_id): _new_version() for user_id in set(user_ids)}, None)
+
+
+def bump_all_history_versions():
+    """Invalidate every user's cached analytics, e.g. after a re-grade or backfill"""
+    cache.set(GENERATION_KEY, _new_version(), None)
+
+
+def cached_json_response(request, user_id: int, variant: str,
+                         build: Callable[[], Dict[str, Any]]) -> HttpResponse:
+    """
+    Serve ``build()`` as JSON, cached per user and history version, with a
+    strong ETag so unchanged payloads are answered with 304 Not Modified.
+    """
+    key = f"analytics:{variant}:{user_id}:{history_version(user_id)}"
+    entry = cache.get(key)
+    if entry is None:
+        body = json.dumps(build(), cls=DjangoJSONEncoder).encode("utf-8")
+        etag = '"%s"' % hashlib.sha256(body).hexdigest()[:40]
+        entry = (etag, body)
+        cache.set(key, entry, PAYLOAD_TIMEOUTS.get(variant, 300))
+    etag, body = entry
+
+    client_etags = parse_etags(request.headers.get("If-None-Match", ""))
+    if etag in client_etags or "*" in client_etags:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type="application/json")
+    response["ETag"] = etag
+    # Let browsers keep the payload but always revalidate it
+    response["Cache-Control"] = "private, no-cache"
+    return response
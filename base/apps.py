@@ -4,3 +4,42 @@ from django.apps import AppConfig
 class BaseConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'base'
+
+    def ready(self):
+        from django.core import checks
+        from django.db.models.signals import pre_save, post_save, post_delete
+        from ui.models import MCQ
+        from . import analytics_cache, catalog, item_analysis, question_search, topic_similarity
+        from .grading import answer_key_cache
+        from .models import Profile, TopicUpload
+
+        def _invalidate_answer_key(sender, instance, **kwargs):
+            answer_key_cache.invalidate([instance.pk])
+
+        checks.register(analytics_cache.check_shared_cache, checks.Tags.caches)
+
+        post_save.connect(_invalidate_answer_key, sender=MCQ, dispatch_uid='base.answer_key.save', weak=False)
+        post_delete.connect(_invalidate_answer_key, sender=MCQ, dispatch_uid='base.answer_key.delete', weak=False)
+
+        # Keep the admin catalog snapshot in step with MCQ/user/upload writes
+        pre_save.connect(catalog.mcq_pre_save, sender=MCQ, dispatch_uid='base.catalog.mcq_pre_save')
+        post_save.connect(catalog.mcq_post_save, sender=MCQ, dispatch_uid='base.catalog.mcq_save')
+        post_delete.connect(catalog.mcq_post_delete, sender=MCQ, dispatch_uid='base.catalog.mcq_delete')
+        post_save.connect(catalog.profile_post_save, sender=Profile, dispatch_uid='base.catalog.profile_save')
+        post_delete.connect(catalog.profile_post_delete, sender=Profile, dispatch_uid='base.catalog.profile_delete')
+        pre_save.connect(catalog.upload_pre_save, sender=TopicUpload, dispatch_uid='base.catalog.upload_pre_save')
+        post_save.connect(catalog.upload_post_save, sender=TopicUpload, dispatch_uid='base.catalog.upload_save')
+        post_delete.connect(catalog.upload_post_delete, sender=TopicUpload, dispatch_uid='base.catalog.upload_delete')
+
+        # Item statistics are labelled with the question's own topic and level
+        post_save.connect(item_analysis.mcq_post_save, sender=MCQ, dispatch_uid='base.item_analysis.mcq_save')
+
+        # Mark topics whose question text changed for re-indexing
+        post_save.connect(topic_similarity.mcq_post_save, sender=MCQ, dispatch_uid='base.topic_similarity.mcq_save')
+        post_delete.connect(topic_similarity.mcq_post_delete, sender=MCQ,
+                            dispatch_uid='base.topic_similarity.mcq_delete')
+
+        # Edits/deletes invalidate question-search entries (inserts are picked up by id)
+        post_save.connect(question_search.mcq_post_save, sender=MCQ, dispatch_uid='base.question_search.mcq_save')
+        post_delete.connect(question_search.mcq_post_delete, sender=MCQ,
+                            dispatch_uid='base.question_search.mcq_delete')
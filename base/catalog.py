@@ -0,0 +1,185 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Tuple
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from .models import CatalogStats, CatalogTopicCount, Profile, TopicUpload
+from ui.models import MCQ
+
+SNAPSHOT_CACHE_KEY = "catalog:snapshot"
+SNAPSHOT_TIMEOUT = 600
+UPLOAD_DIFFICULTY_FIELDS = {"Easy": "easy_uploads", "Medium": "medium_uploads", "Hard": "hard_uploads"}
+ADMIN_PAGE_SIZE = 25
+
+
+def _invalidate_snapshot():
+    transaction.on_commit(lambda: cache.delete(SNAPSHOT_CACHE_KEY))
+
+
+def rebuild_catalog_stats() -> CatalogStats:
+    """Recompute every catalog counter from the source tables"""
+    uploads = TopicUpload.objects.aggregate(
+        total=Count("id"),
+        with_pdfs=Count("id", filter=~Q(pdf="") & Q(pdf__isnull=False)),
+        easy=Count("id", filter=Q(difficulty_level="Easy")),
+        medium=Count("id", filter=Q(difficulty_level="Medium")),
+        hard=Count("id", filter=Q(difficulty_level="Hard")),
+    )
+    with transaction.atomic():
+        stats, _ = CatalogStats.objects.update_or_create(pk=1, defaults={
+            "total_users": Profile.objects.count(),
+            "total_uploads": uploads["total"],
+            "uploads_with_pdfs": uploads["with_pdfs"],
+            "easy_uploads": uploads["easy"],
+            "medium_uploads": uploads["medium"],
+            "hard_uploads": uploads["hard"],
+        })
+        CatalogTopicCount.objects.all().delete()
+        CatalogTopicCount.objects.bulk_create([
+            CatalogTopicCount(topic=row["topic"] or "", difficulty_level=row["difficulty_level"],
+                              question_count=row["n"])
+            for row in MCQ.objects.values("topic", "difficulty_level").annotate(n=Count("id")).order_by()
+        ])
+    _invalidate_snapshot()
+    return stats
+
+
+def _bump_stats(**deltas: int):
+    updated = CatalogStats.objects.filter(pk=1).update(
+        **{field: F(field) + delta for field, delta in deltas.items() if delta}
+    )
+    if not updated:
+        # First write since install: build the row from the source tables
+        rebuild_catalog_stats()
+        return
+    _invalidate_snapshot()
+
+
+def _bump_topic(topic: Optional[str], difficulty: str, delta: int):
+    topic = topic or ""
+    rows = CatalogTopicCount.objects.filter(topic=topic, difficulty_level=difficulty)
+    if rows.update(question_count=F("question_count") + delta):
+        if delta < 0:
+            rows.filter(question_count__lte=0).delete()
+    elif delta > 0:
+        try:
+            with transaction.atomic():
+                CatalogTopicCount.objects.create(topic=topic, difficulty_level=difficulty, question_count=delta)
+        except IntegrityError:
+            rows.update(question_count=F("question_count") + delta)
+    _invalidate_snapshot()
+
+
+def _upload_counters(upload: TopicUpload) -> Dict[str, int]:
+    counters = {"total_uploads": 1, "uploads_with_pdfs": 1 if upload.pdf else 0}
+    field = UPLOAD_DIFFICULTY_FIELDS.get(upload.difficulty_level)
+    if field:
+        counters[field] = 1
+    return counters
+
+
+# Signal handlers (connected in BaseConfig.ready)
+
+def mcq_pre_save(sender, instance, **kwargs):
+    if not instance._state.adding and instance.pk:
+        instance._catalog_old = MCQ.objects.filter(pk=instance.pk).values_list("topic", "difficulty_level").first()
+
+
+def mcq_post_save(sender, instance, created, **kwargs):
+    old = getattr(instance, "_catalog_old", None)
+    new = (instance.topic, instance.difficulty_level)
+    if created or old is None:
+        _bump_topic(*new, 1)
+    elif old != new:
+        _bump_topic(*old, -1)
+        _bump_topic(*new, 1)
+
+
+def mcq_post_delete(sender, instance, **kwargs):
+    _bump_topic(instance.topic, instance.difficulty_level, -1)
+
+
+def profile_post_save(sender, instance, created, **kwargs):
+    if created:
+        _bump_stats(total_users=1)
+
+
+def profile_post_delete(sender, instance, **kwargs):
+    _bump_stats(total_users=-1)
+
+
+def upload_pre_save(sender, instance, **kwargs):
+    if not instance._state.adding and instance.pk:
+        instance._catalog_old = TopicUpload.objects.filter(pk=instance.pk).first()
+
+
+def upload_post_save(sender, instance, created, **kwargs):
+    deltas = _upload_counters(instance)
+    old = getattr(instance, "_catalog_old", None)
+    if not created:
+        if old is None:
+            return
+        for field, value in _upload_counters(old).items():
+            deltas[field] = deltas.get(field, 0) - value
+    _bump_stats(**deltas)
+
+
+def upload_post_delete(sender, instance, **kwargs):
+    _bump_stats(**{field: -value for field, value in _upload_counters(instance).items()})
+
+
+def get_catalog_snapshot() -> Dict[str, Any]:
+    """Admin dashboard counters: cached, otherwise two small-table reads"""
+    snapshot = cache.get(SNAPSHOT_CACHE_KEY)
+    if snapshot is not None:
+        return snapshot
+
+    stats = CatalogStats.objects.filter(pk=1).first() or rebuild_catalog_stats()
+    topic_counts = list(
+        CatalogTopicCount.objects.order_by("topic", "difficulty_level")
+        .values("topic", "difficulty_level", "question_count")
+    )
+    topics_by_difficulty: Dict[str, set] = {"Easy": set(), "Medium": set(), "Hard": set()}
+    for row in topic_counts:
+        topics_by_difficulty.setdefault(row["difficulty_level"], set()).add(row["topic"])
+
+    snapshot = {
+        "mcq_topics": topic_counts,
+        "total_topics": len({row["topic"] for row in topic_counts}),
+        "easy_topics": len(topics_by_difficulty["Easy"]),
+        "medium_topics": len(topics_by_difficulty["Medium"]),
+        "hard_topics": len(topics_by_difficulty["Hard"]),
+        "total_questions": sum(row["question_count"] for row in topic_counts),
+        "total_users": stats.total_users,
+        "total_uploads": stats.total_uploads,
+        "topics_with_pdfs": stats.uploads_with_pdfs,
+        "easy_uploads": stats.easy_uploads,
+        "medium_uploads": stats.medium_uploads,
+        "hard_uploads": stats.hard_uploads,
+    }
+    cache.set(SNAPSHOT_CACHE_KEY, snapshot, SNAPSHOT_TIMEOUT)
+    return snapshot
+
+
+def keyset_page(queryset, after: Optional[int] = None, limit: int = ADMIN_PAGE_SIZE) -> Tuple[List[Any], Optional[int]]:
+    """Newest-first page of ``queryset`` starting below id ``after``; returns (items, next cursor)"""
+    if after:
+        queryset = queryset.filter(id__lt=after)
+    items = list(queryset.order_by("-id")[:limit + 1])
+    next_cursor = items[limit - 1].id if len(items) > limit else None
+    return items[:limit], next_cursor
+
+
+def user_page(search: str = "", after: Optional[int] = None, limit: int = ADMIN_PAGE_SIZE):
+    queryset = Profile.objects.only("id", "username", "contact", "gender")
+    if search:
+        # Prefix match so the username index can be used
+        queryset = queryset.filter(username__istartswith=search)
+    return keyset_page(queryset, after, limit)
+
+
+def upload_page(search: str = "", after: Optional[int] = None, limit: int = ADMIN_PAGE_SIZE):
+    queryset = TopicUpload.objects.all()
+    if search:
+        queryset = queryset.filter(topic_name__istartswith=search)
+    return keyset_page(queryset, after, limit)
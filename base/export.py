@@ -0,0 +1,176 @@
+from __future__ import annotations
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from datetime import datetime
+import csv
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from .models import QuizResult
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = ("csv", "jsonl")
+
+RESULT_COLUMNS = [
+    "result_id", "user_id", "username", "topic", "sub_topic", "difficulty_level", "date_taken",
+    "time_taken_seconds", "total_questions", "correct_answers", "score_percentage",
+]
+QUESTION_COLUMNS = ["question_index", "question_id", "question", "user_answer", "correct_answer", "is_correct"]
+EXPORT_COLUMNS = RESULT_COLUMNS + QUESTION_COLUMNS
+# Spreadsheets run cells starting with these as formulas
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def parse_bound(value: Optional[str]) -> Optional[datetime]:
+    """Parse an ISO date or datetime filter value; dates mean local midnight"""
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Invalid date: {value!r}")
+        parsed = datetime(day.year, day.month, day.day)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def export_queryset(since: Optional[datetime] = None, until: Optional[datetime] = None,
+                    topic: Optional[str] = None, user_id: Optional[int] = None):
+    queryset = QuizResult.objects.all()
+    if since:
+        queryset = queryset.filter(date_taken__gte=since)
+    if until:
+        queryset = queryset.filter(date_taken__lt=until)
+    if topic:
+        queryset = queryset.filter(topic=topic)
+    if user_id:
+        queryset = queryset.filter(user_id=user_id)
+    return queryset
+
+
+def iter_results(queryset, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Walk ``queryset`` in id order, ``chunk_size`` rows per query.
+
+    Keyset batches keep memory flat on every backend; MySQL's driver buffers
+    a whole result set even for ``.iterator()``.
+    """
+    queryset = queryset.order_by("id").values(
+        "id", "user_id", "user__username", "topic", "sub_topic", "difficulty_level", "date_taken",
+        "time_taken", "total_questions", "correct_answers", "score_percentage",
+        "questions_data", "user_answers",
+    )
+    last_id = 0
+    while True:
+        batch = list(queryset.filter(id__gt=last_id)[:chunk_size])
+        if not batch:
+            return
+        last_id = batch[-1]["id"]
+        yield from batch
+
+
+def _answer_at(answers: Any, index: int) -> str:
+    if isinstance(answers, dict):
+        return answers.get(str(index)) or ""
+    if isinstance(answers, list) and index < len(answers):
+        return answers[index] or ""
+    return ""
+
+
+def flatten(result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """One row per question in a stored result (one bare row if it has none)"""
+    base = {
+        "result_id": result["id"],
+        "user_id": result["user_id"],
+        "username": result["user__username"],
+        "topic": result["topic"],
+        "sub_topic": result["sub_topic"] or "",
+        "difficulty_level": result["difficulty_level"],
+        "date_taken": result["date_taken"].isoformat() if result["date_taken"] else None,
+        "time_taken_seconds": result["time_taken"].total_seconds() if result["time_taken"] else None,
+        "total_questions": result["total_questions"],
+        "correct_answers": result["correct_answers"],
+        "score_percentage": result["score_percentage"],
+    }
+    questions = result["questions_data"] or []
+    if not questions:
+        return [{**base, **{column: None for column in QUESTION_COLUMNS}}]
+
+    rows = []
+    for i, q in enumerate(questions):
+        q = q if isinstance(q, dict) else {}
+        answer = _answer_at(result["user_answers"], i).upper()
+        correct = q.get("correct_answer") or ""
+        rows.append({
+            **base,
+            "question_index": i,
+            "question_id": q.get("id"),
+            "question": q.get("question", ""),
+            "user_answer": answer,
+            "correct_answer": correct,
+            "is_correct": bool(answer) and answer == correct,
+        })
+    return rows
+
+
+def iter_rows(results: Iterable[Dict[str, Any]],
+              stats: Optional[Dict[str, int]] = None) -> Iterator[Dict[str, Any]]:
+    stats = stats if stats is not None else {}
+    stats.setdefault("results", 0)
+    stats.setdefault("rows", 0)
+    for result in results:
+        rows = flatten(result)
+        stats["results"] += 1
+        stats["rows"] += len(rows)
+        yield from rows
+
+
+class _Echo:
+    """File-like object whose write() hands the encoded line straight back"""
+
+    def write(self, value):
+        return value
+
+
+def _csv_cell(value: Any) -> Any:
+    # Usernames and question text are user-controlled; quote would-be formulas
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def iter_csv(rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    writer = csv.DictWriter(_Echo(), fieldnames=EXPORT_COLUMNS)
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow({column: _csv_cell(value) for column, value in row.items()})
+
+
+def iter_jsonl(rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + "\n"
+
+
+def _buffered(lines: Iterable[str], size: int = 64 * 1024) -> Iterator[str]:
+    # Hand the server a few large writes rather than one per row
+    buffer: List[str] = []
+    pending = 0
+    for line in lines:
+        buffer.append(line)
+        pending += len(line)
+        if pending >= size:
+            yield "".join(buffer)
+            buffer, pending = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def iter_export(queryset, fmt: str = "csv", chunk_size: int = EXPORT_CHUNK_SIZE,
+                stats: Optional[Dict[str, int]] = None) -> Iterator[str]:
+    """Encoded export text for ``queryset``; ``stats`` receives result/row counts as it streams"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}")
+    rows = iter_rows(iter_results(queryset, chunk_size), stats)
+    return _buffered(iter_csv(rows) if fmt == "csv" else iter_jsonl(rows))
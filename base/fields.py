@@ -0,0 +1,80 @@
+import json
+import zlib
+
+from django.db import models
+
+# Every compressed payload starts with this header. Valid JSON text can never
+# begin with "ZJ", so rows written before compression (plain JSON text) are
+# still recognised and decoded as-is.
+COMPRESSED_HEADER = b"ZJ\x01"
+
+
+def compress_json(value, level: int = 6) -> bytes:
+    """Serialize ``value`` to JSON and zlib-compress it behind the format header"""
+    raw = json.dumps(value, separators=(",", ":")).encode("utf-8")
+    return COMPRESSED_HEADER + zlib.compress(raw, level)
+
+
+def is_compressed(raw) -> bool:
+    if isinstance(raw, memoryview):
+        raw = raw.tobytes()
+    return isinstance(raw, bytes) and raw.startswith(COMPRESSED_HEADER)
+
+
+def decompress_json(raw):
+    """Decode a stored payload, accepting both compressed and legacy plaintext rows"""
+    if raw is None:
+        return None
+    if isinstance(raw, memoryview):
+        raw = raw.tobytes()
+    if isinstance(raw, bytes):
+        if raw.startswith(COMPRESSED_HEADER):
+            raw = zlib.decompress(raw[len(COMPRESSED_HEADER):])
+        raw = raw.decode("utf-8")
+    if not raw:
+        return None
+    try:
+        return json.loads(raw)
+    except ValueError:
+        # Legacy rows occasionally hold non-JSON text; hand it back untouched
+        return raw
+
+
+class CompressedJSONField(models.BinaryField):
+    """
+    JSON column stored as a zlib-compressed blob.
+
+    Python values are plain lists/dicts; compression happens on save and
+    decompression on load. Plaintext JSON written before the column was
+    converted is decoded transparently until it is rewritten.
+    """
+
+    def __init__(self, *args, compression_level: int = 6, **kwargs):
+        self.compression_level = compression_level
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.compression_level != 6:
+            kwargs["compression_level"] = self.compression_level
+        return name, path, args, kwargs
+
+    def from_db_value(self, value, expression, connection):
+        return decompress_json(value)
+
+    def to_python(self, value):
+        if isinstance(value, (bytes, memoryview)):
+            return decompress_json(value)
+        if isinstance(value, str):
+            return decompress_json(value)
+        return value
+
+    def get_prep_value(self, value):
+        if value is None:
+            return None
+        if isinstance(value, (bytes, memoryview)) and is_compressed(value):
+            return bytes(value)
+        return compress_json(value, self.compression_level)
+
+    def value_to_string(self, obj):
+        return json.dumps(self.value_from_object(obj))
@@ -0,0 +1,165 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Any
+import threading
+import time
+import numpy as np
+from ui.models import MCQ
+
+
+@dataclass
+class GradeResult:
+    total_questions: int
+    correct_answers: int
+    score_percentage: float
+    correct_mask: List[bool]
+    answer_key: List[str]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "total_questions": self.total_questions,
+            "correct_answers": self.correct_answers,
+            "score_percentage": self.score_percentage,
+            "correct_mask": self.correct_mask,
+        }
+
+
+# (correct answer letter, topic, difficulty_level) of one MCQ
+AnswerKeyEntry = Tuple[str, str, str]
+
+ANSWER_LETTERS = frozenset("ABCD")
+
+
+class AnswerKeyCache:
+    """
+    Process-local cache of MCQ id -> correct answer letter, with the
+    question's topic and difficulty for checking what a submission claims.
+
+    Misses are filled with a single ``id__in`` query per grading call. Entries
+    are dropped when an MCQ is saved or deleted (see ``BaseConfig.ready``) and
+    the whole cache expires after ``ttl`` seconds so corrections made by other
+    processes are eventually picked up.
+    """
+
+    def __init__(self, ttl: float = 300.0):
+        self.ttl = ttl
+        self._entries: Dict[int, AnswerKeyEntry] = {}
+        self._loaded_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _expire_if_stale(self):
+        if time.monotonic() - self._loaded_at > self.ttl:
+            self._entries = {}
+            self._loaded_at = time.monotonic()
+
+    def get_entries(self, mcq_ids: Iterable[int]) -> Dict[int, AnswerKeyEntry]:
+        """Return ``(answer, topic, difficulty)`` for ``mcq_ids``, querying only the ids not cached"""
+        ids = {int(i) for i in mcq_ids}
+        # Build the result while holding the lock (or from the rows just
+        # fetched): an expiry or invalidate() in another thread may empty
+        # ``_entries`` at any point in between
+        with self._lock:
+            self._expire_if_stale()
+            found = {i: self._entries[i] for i in ids if i in self._entries}
+        missing = [i for i in ids if i not in found]
+        if missing:
+            rows = MCQ.objects.filter(id__in=missing).values_list("id", "correct_answer", "topic", "difficulty_level")
+            fetched = {row[0]: row[1:] for row in rows}
+            with self._lock:
+                self._entries.update(fetched)
+            found.update(fetched)
+        return found
+
+    def get_many(self, mcq_ids: Iterable[int]) -> Dict[int, str]:
+        """Return the answer key for ``mcq_ids``, querying only the ids not cached"""
+        return {i: entry[0] for i, entry in self.get_entries(mcq_ids).items()}
+
+    def load_all(self) -> Dict[int, str]:
+        """Warm the cache with every MCQ in one streaming pass and return the full key (used by batch jobs)"""
+        entries = {}
+        rows = MCQ.objects.values_list("id", "correct_answer", "topic", "difficulty_level")
+        for row in rows.iterator(chunk_size=5000):
+            entries[row[0]] = row[1:]
+        with self._lock:
+            self._entries = entries
+            self._loaded_at = time.monotonic()
+        return {i: entry[0] for i, entry in entries.items()}
+
+    def invalidate(self, mcq_ids: Optional[Iterable[int]] = None):
+        with self._lock:
+            if mcq_ids is None:
+                self._entries = {}
+                self._loaded_at = time.monotonic()
+            else:
+                for i in mcq_ids:
+                    self._entries.pop(int(i), None)
+
+
+answer_key_cache = AnswerKeyCache()
+
+
+def normalize_answers(user_answers: Any, count: int) -> List[str]:
+    """
+    Coerce a submitted answer list/dict into a list of ``count`` letters.
+    Unanswered items and anything other than A-D become ''.
+    """
+    if isinstance(user_answers, dict):
+        answers = [user_answers.get(str(i)) or user_answers.get(i) for i in range(count)]
+    elif isinstance(user_answers, (list, tuple)):
+        answers = list(user_answers[:count]) + [None] * max(0, count - len(user_answers))
+    else:
+        answers = [None] * count
+    answers = [str(a).strip().upper() if a else "" for a in answers]
+    return [a if a in ANSWER_LETTERS else "" for a in answers]
+
+
+def compare_answers(answers: Sequence[str], keys: Sequence[str]) -> np.ndarray:
+    """Vectorized answer/key comparison; unanswered or unknown-key items never count as correct"""
+    # dtype=str sizes to the longest value; a fixed "<U1" would truncate "ABC" to "A"
+    answers_arr = np.asarray(answers, dtype=str)
+    keys_arr = np.asarray(keys, dtype=str)
+    return (answers_arr == keys_arr) & (keys_arr != "")
+
+
+def grade(question_ids: Sequence[int], user_answers: Any,
+          cache: Optional[AnswerKeyCache] = None) -> GradeResult:
+    """Grade one submission against the cached answer key"""
+    cache = cache or answer_key_cache
+    key_map = cache.get_many(question_ids)
+    keys = [key_map.get(int(q), "") for q in question_ids]
+    answers = normalize_answers(user_answers, len(question_ids))
+    mask = compare_answers(answers, keys)
+    total = len(question_ids)
+    correct = int(np.count_nonzero(mask))
+    score = round(correct / total * 100, 2) if total else 0.0
+    return GradeResult(
+        total_questions=total,
+        correct_answers=correct,
+        score_percentage=score,
+        correct_mask=mask.tolist(),
+        answer_key=keys,
+    )
+
+
+def grade_batch(submissions: Sequence[tuple], key_map: Dict[int, str]) -> List[tuple]:
+    """
+    Grade many ``(question_ids, user_answers)`` submissions with one comparison
+    over the concatenated answer arrays. Returns ``(correct, total, score)`` per
+    submission in input order.
+    """
+    if not submissions:
+        return []
+    lengths = np.array([len(ids) for ids, _ in submissions], dtype=np.int64)
+    answers: List[str] = []
+    keys: List[str] = []
+    for ids, user_answers in submissions:
+        answers.extend(normalize_answers(user_answers, len(ids)))
+        keys.extend(key_map.get(int(q), "") for q in ids)
+    mask = compare_answers(answers, keys).astype(np.int64)
+
+    # Per-submission sums via cumulative offsets (handles empty submissions)
+    cumulative = np.concatenate(([0], np.cumsum(mask)))
+    ends = np.cumsum(lengths)
+    correct = cumulative[ends] - cumulative[ends - lengths]
+    scores = np.where(lengths > 0, np.round(correct / np.maximum(lengths, 1) * 100, 2), 0.0)
+    return [(int(c), int(n), float(s)) for c, n, s in zip(correct, lengths, scores)]
@@ -0,0 +1,64 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Tuple
+import base64
+from datetime import datetime
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from .models import QuizResult
+
+HISTORY_PAGE_SIZE = 20
+MAX_HISTORY_PAGE_SIZE = 100
+# Everything except the compressed questions_data/user_answers blobs
+HISTORY_FIELDS = (
+    "id", "topic", "sub_topic", "difficulty_level", "total_questions", "correct_answers",
+    "score_percentage", "time_taken", "date_taken",
+)
+
+
+def encode_cursor(date_taken: datetime, result_id: int) -> str:
+    raw = f"{date_taken.isoformat()}|{result_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        date_str, result_id = raw.rsplit("|", 1)
+        date_taken = parse_datetime(date_str)
+        if date_taken is None:
+            raise ValueError
+        return date_taken, int(result_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+
+def history_page(user_id: int, topic: Optional[str] = None, difficulty: Optional[str] = None,
+                 cursor: Optional[str] = None, limit: int = HISTORY_PAGE_SIZE
+                 ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Newest-first page of a user's results after ``cursor``; returns (rows, next cursor).
+
+    Seeks on (date_taken, id) along the quiz_result_user_date index, so every
+    page costs the same no matter how deep it is.
+    """
+    limit = max(1, min(limit, MAX_HISTORY_PAGE_SIZE))
+    queryset = QuizResult.objects.filter(user_id=user_id)
+    if topic:
+        queryset = queryset.filter(topic=topic)
+    if difficulty:
+        queryset = queryset.filter(difficulty_level=difficulty)
+    if cursor:
+        date_taken, result_id = decode_cursor(cursor)
+        queryset = queryset.filter(Q(date_taken__lt=date_taken) | Q(date_taken=date_taken, id__lt=result_id))
+
+    rows = list(queryset.order_by("-date_taken", "-id").values(*HISTORY_FIELDS)[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last["date_taken"], last["id"])
+    rows = rows[:limit]
+    for row in rows:
+        time_taken = row.pop("time_taken")
+        row["time_taken_seconds"] = time_taken.total_seconds() if time_taken else None
+        row["sub_topic"] = row["sub_topic"] or ""
+    return rows, next_cursor
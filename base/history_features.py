@@ -0,0 +1,127 @@
+from __future__ import annotations
+from typing import Dict, Iterator, List, Optional, Tuple
+from datetime import datetime
+import numpy as np
+from django.db.models import Q
+from .models import QuizResult
+from .review_modes import review_quiz_q
+
+# Same layout as MLSuggestionEngine._extract_features
+FEATURE_NAMES = (
+    "easy_count", "easy_avg", "medium_count", "medium_avg", "hard_count", "hard_avg",
+    "total_quizzes", "overall_avg", "days_since_first", "days_since_last",
+)
+N_FEATURES = len(FEATURE_NAMES)
+ACTIONS = ("Easy", "Medium", "Hard", "NextTopic")
+DIFFICULTY_INDEX = {"Easy": 0, "Medium": 1, "Hard": 2}
+NEXT_TOPIC = 3
+
+# (id, user_id, topic, difficulty_level, score_percentage, date_taken)
+Event = Tuple[int, int, str, str, float, datetime]
+
+
+def iter_history(queryset=None, chunk_size: int = 5000) -> Iterator[Event]:
+    """
+    Every result in (date_taken, id) order as plain tuples, read in keyset
+    batches along the quiz_result_date index without the JSON columns.
+    """
+    # Review-mode quizzes aren't choices the suggestion model makes
+    queryset = (queryset if queryset is not None else QuizResult.objects.all()).exclude(
+        review_quiz_q()
+    ).filter(difficulty_level__in=list(DIFFICULTY_INDEX)).order_by(
+        "date_taken", "id"
+    ).values_list("id", "user_id", "topic", "difficulty_level", "score_percentage", "date_taken")
+    cursor: Optional[Tuple[datetime, int]] = None
+    while True:
+        batch = queryset
+        if cursor:
+            batch = batch.filter(Q(date_taken__gt=cursor[0]) | Q(date_taken=cursor[0], id__gt=cursor[1]))
+        rows = list(batch[:chunk_size])
+        if not rows:
+            return
+        cursor = (rows[-1][5], rows[-1][0])
+        yield from rows
+
+
+class HistoryFeatureBuilder:
+    """
+    Per-(user, topic) running totals from which suggestion features can be
+    read as of any point in a time-ordered replay, without re-querying.
+    """
+
+    # Accumulator layout per (user, topic)
+    _SUMS = {0: (0, 1), 1: (2, 3), 2: (4, 5)}  # difficulty -> (count slot, score-sum slot)
+    _FIRST, _LAST = 6, 7
+
+    def __init__(self):
+        self._state: Dict[Tuple[int, str], List[float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._state)
+
+    def add(self, user_id: int, topic: str, difficulty: str, score: float, taken_at: datetime):
+        key = (user_id, topic)
+        ts = taken_at.timestamp()
+        state = self._state.get(key)
+        if state is None:
+            state = self._state[key] = [0.0] * 6 + [ts, ts]
+        slots = self._SUMS.get(DIFFICULTY_INDEX.get(difficulty, -1))
+        if slots:
+            state[slots[0]] += 1
+            state[slots[1]] += score or 0.0
+        state[self._LAST] = max(state[self._LAST], ts)
+
+    def write_features(self, out: np.ndarray, user_id: int, topic: str, as_of: datetime):
+        """Fill ``out`` (length N_FEATURES) with the features as of ``as_of``"""
+        state = self._state.get((user_id, topic))
+        if state is None:
+            out[:] = 0.0
+            return
+        total = 0.0
+        score_sum = 0.0
+        for i, (count_slot, sum_slot) in enumerate(self._SUMS.values()):
+            count = state[count_slot]
+            out[2 * i] = count
+            out[2 * i + 1] = state[sum_slot] / count if count else 0.0
+            total += count
+            score_sum += state[sum_slot]
+        now = as_of.timestamp()
+        out[6] = total
+        out[7] = score_sum / total if total else 0.0
+        out[8] = (now - state[self._FIRST]) // 86400
+        out[9] = (now - state[self._LAST]) // 86400
+
+    def features(self, user_id: int, topic: str, as_of: datetime) -> np.ndarray:
+        out = np.zeros(N_FEATURES)
+        self.write_features(out, user_id, topic, as_of)
+        return out
+
+
+def next_action(prev_topic: str, topic: str, difficulty: str) -> int:
+    """What the user did after an attempt, in the model's action space"""
+    if topic != prev_topic:
+        return NEXT_TOPIC
+    return DIFFICULTY_INDEX.get(difficulty, 0)
+
+
+# (features as of the earlier attempt, its topic, its difficulty, next action, next score, user id)
+Transition = Tuple[np.ndarray, str, str, int, float, int]
+
+
+def iter_transitions(events: Iterator[Event]) -> Iterator[Transition]:
+    """
+    Pair every attempt with the same user's following attempt.
+
+    Features are taken right after the earlier attempt (the moment a
+    suggestion would be shown) and only use history up to that point.
+    """
+    builder = HistoryFeatureBuilder()
+    pending: Dict[int, Tuple[np.ndarray, str, str]] = {}
+    for _, user_id, topic, difficulty, score, taken_at in events:
+        previous = pending.get(user_id)
+        if previous is not None:
+            features, prev_topic, prev_difficulty = previous
+            yield features, prev_topic, prev_difficulty, next_action(prev_topic, topic, difficulty), \
+                float(score or 0.0), user_id
+        builder.add(user_id, topic, difficulty, score, taken_at)
+        pending[user_id] = (builder.features(user_id, topic, taken_at), topic, difficulty)
@@ -0,0 +1,61 @@
+from __future__ import annotations
+from datetime import timedelta
+from typing import Iterable, Set, Tuple
+import os
+import pickle
+import tempfile
+from django.db.models import Max
+from django.utils import timezone
+from .models import IndexChange
+
+# Applied changes are kept this long so a process that saves an index built
+# from an older snapshot still finds, and re-applies, what it missed
+RETENTION = timedelta(hours=1)
+
+
+def record(index: str, keys: Iterable[object]):
+    """Append changes for ``index``; an insert, so concurrent writers never lose each other's keys"""
+    keys = {str(k) for k in keys if k is not None and k != ""}
+    if keys:
+        IndexChange.objects.bulk_create([IndexChange(index=index, key=k) for k in sorted(keys)])
+
+
+def latest(index: str) -> int:
+    """Id of the newest change, so a full rebuild can start from it"""
+    return IndexChange.objects.filter(index=index).aggregate(last=Max("id"))["last"] or 0
+
+
+def has_pending(index: str, after: int) -> bool:
+    return IndexChange.objects.filter(index=index, id__gt=after).exists()
+
+
+def pending(index: str, after: int) -> Tuple[int, Set[str]]:
+    """(newest change id, changed keys) past ``after``"""
+    rows = list(IndexChange.objects.filter(index=index, id__gt=after).values_list("id", "key"))
+    return max((i for i, _ in rows), default=after), {key for _, key in rows}
+
+
+def prune(index: str, upto: int) -> int:
+    """Drop changes at or below ``upto`` once they're older than RETENTION"""
+    deleted, _ = IndexChange.objects.filter(
+        index=index, id__lte=upto, created_at__lt=timezone.now() - RETENTION,
+    ).delete()
+    return deleted
+
+
+def write_pickle(data: object, path: str):
+    """
+    Pickle to a uniquely named temp file beside ``path`` and rename it into
+    place, so concurrent writers never interleave and readers never see a
+    partial file.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
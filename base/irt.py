@@ -0,0 +1,212 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+import numpy as np
+from scipy import optimize, sparse
+from scipy.special import expit
+from django.db import transaction
+from django.utils import timezone
+from .models import ItemCalibration, QuizResult, UserAbility
+
+MODELS = ("1PL", "2PL")
+# Gaussian priors keep estimates finite for users/items with all-right or
+# all-wrong responses and pin down the scale of the latent trait.
+ABILITY_PRIOR_SD = 1.0
+DIFFICULTY_PRIOR_SD = 2.0
+LOG_DISCRIMINATION_PRIOR_SD = 0.5
+
+
+@dataclass
+class ResponseMatrix:
+    """Sparse user x question matrix of right/wrong responses in COO form"""
+    user_ids: np.ndarray  # row index -> Profile id
+    mcq_ids: np.ndarray   # column index -> MCQ id
+    rows: np.ndarray
+    cols: np.ndarray
+    correct: np.ndarray   # 1.0 right, 0.0 wrong/blank
+
+    @property
+    def n_responses(self) -> int:
+        return len(self.correct)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return len(self.user_ids), len(self.mcq_ids)
+
+    def to_sparse(self) -> sparse.csr_matrix:
+        """Correct-answer counts per (user, question); repeated attempts are summed"""
+        return sparse.csr_matrix((self.correct, (self.rows, self.cols)), shape=self.shape)
+
+    def filter_items(self, min_responses: int) -> "ResponseMatrix":
+        """Drop questions with fewer than ``min_responses`` responses and re-index"""
+        counts = np.bincount(self.cols, minlength=len(self.mcq_ids))
+        keep = counts[self.cols] >= min_responses
+        rows, cols = self.rows[keep], self.cols[keep]
+        used_users, rows = np.unique(rows, return_inverse=True)
+        used_items, cols = np.unique(cols, return_inverse=True)
+        return ResponseMatrix(self.user_ids[used_users], self.mcq_ids[used_items], rows, cols, self.correct[keep])
+
+
+def build_response_matrix(queryset=None, chunk_size: int = 2000) -> ResponseMatrix:
+    """Stream stored results in keyset batches into a ResponseMatrix"""
+    queryset = (queryset if queryset is not None else QuizResult.objects.all()).only(
+        "id", "user_id", "questions_data", "user_answers",
+    ).order_by("id")
+    user_index: Dict[int, int] = {}
+    item_index: Dict[int, int] = {}
+    rows, cols, correct = [], [], []
+
+    last_id = 0
+    while True:
+        batch = list(queryset.filter(id__gt=last_id)[:chunk_size])
+        if not batch:
+            break
+        last_id = batch[-1].id
+        for result in batch:
+            answers = result.user_answers or []
+            row = None
+            for i, q in enumerate(result.questions_data or []):
+                if not isinstance(q, dict) or q.get("id") is None or not q.get("correct_answer"):
+                    continue
+                if isinstance(answers, dict):
+                    answer = answers.get(str(i)) or ""
+                else:
+                    answer = answers[i] if i < len(answers) else ""
+                if row is None:
+                    row = user_index.setdefault(result.user_id, len(user_index))
+                rows.append(row)
+                cols.append(item_index.setdefault(int(q["id"]), len(item_index)))
+                correct.append(1.0 if (answer or "").upper() == q["correct_answer"] else 0.0)
+
+    return ResponseMatrix(
+        user_ids=np.fromiter(user_index, dtype=np.int64, count=len(user_index)),
+        mcq_ids=np.fromiter(item_index, dtype=np.int64, count=len(item_index)),
+        rows=np.asarray(rows, dtype=np.int64),
+        cols=np.asarray(cols, dtype=np.int64),
+        correct=np.asarray(correct, dtype=np.float64),
+    )
+
+
+@dataclass
+class IRTFit:
+    model: str
+    ability: np.ndarray         # theta per user row
+    difficulty: np.ndarray      # b per question column
+    discrimination: np.ndarray  # a per question column
+    neg_log_posterior: float
+    iterations: int
+    converged: bool
+
+
+def _unpack(params: np.ndarray, n_users: int, n_items: int, two_pl: bool):
+    theta = params[:n_users]
+    b = params[n_users:n_users + n_items]
+    log_a = params[n_users + n_items:] if two_pl else None
+    return theta, b, log_a
+
+
+def fit_irt(matrix: ResponseMatrix, model: str = "2PL", max_iter: int = 500, tol: float = 1e-6) -> IRTFit:
+    """
+    Joint MAP estimate of abilities and item parameters.
+
+    P(correct) = sigmoid(a_j * (theta_i - b_j)); the objective and its
+    gradient are computed over all responses at once, with per-user and
+    per-item sums done by ``np.bincount``, and minimised with L-BFGS-B.
+    """
+    if model not in MODELS:
+        raise ValueError(f"model must be one of {MODELS}")
+    two_pl = model == "2PL"
+    n_users, n_items = matrix.shape
+    rows, cols, y = matrix.rows, matrix.cols, matrix.correct
+
+    def objective(params):
+        theta, b, log_a = _unpack(params, n_users, n_items, two_pl)
+        a = np.exp(log_a) if two_pl else np.ones(n_items)
+        a_r = a[cols]
+        diff = theta[rows] - b[cols]
+        z = a_r * diff
+        # -log-likelihood of Bernoulli(sigmoid(z)), computed stably
+        nll = np.sum(np.logaddexp(0.0, z) - y * z)
+        residual = expit(z) - y
+
+        nlp = (nll + 0.5 * np.sum(theta ** 2) / ABILITY_PRIOR_SD ** 2
+               + 0.5 * np.sum(b ** 2) / DIFFICULTY_PRIOR_SD ** 2)
+        grad_theta = np.bincount(rows, weights=residual * a_r, minlength=n_users) + theta / ABILITY_PRIOR_SD ** 2
+        grad_b = -np.bincount(cols, weights=residual * a_r, minlength=n_items) + b / DIFFICULTY_PRIOR_SD ** 2
+        grads = [grad_theta, grad_b]
+        if two_pl:
+            nlp += 0.5 * np.sum(log_a ** 2) / LOG_DISCRIMINATION_PRIOR_SD ** 2
+            grads.append(np.bincount(cols, weights=residual * z, minlength=n_items)
+                         + log_a / LOG_DISCRIMINATION_PRIOR_SD ** 2)
+        return nlp, np.concatenate(grads)
+
+    # Start from logit proportions correct, which is close for most data
+    item_p = np.clip(np.bincount(cols, weights=y, minlength=n_items)
+                     / np.maximum(np.bincount(cols, minlength=n_items), 1), 0.02, 0.98)
+    user_p = np.clip(np.bincount(rows, weights=y, minlength=n_users)
+                     / np.maximum(np.bincount(rows, minlength=n_users), 1), 0.02, 0.98)
+    start = [np.log(user_p / (1 - user_p)), -np.log(item_p / (1 - item_p))]
+    if two_pl:
+        start.append(np.zeros(n_items))
+
+    result = optimize.minimize(
+        objective, np.concatenate(start), jac=True, method="L-BFGS-B",
+        options={"maxiter": max_iter, "gtol": tol},
+    )
+    theta, b, log_a = _unpack(result.x, n_users, n_items, two_pl)
+    return IRTFit(
+        model=model,
+        ability=theta,
+        difficulty=b,
+        discrimination=np.exp(log_a) if two_pl else np.ones(n_items),
+        neg_log_posterior=float(result.fun),
+        iterations=int(result.nit),
+        converged=bool(result.success),
+    )
+
+
+def save_calibration(matrix: ResponseMatrix, fit: IRTFit, batch_size: int = 2000):
+    """Replace stored item parameters and user abilities with ``fit``"""
+    now = timezone.now()
+    item_counts = np.bincount(matrix.cols, minlength=len(matrix.mcq_ids))
+    user_counts = np.bincount(matrix.rows, minlength=len(matrix.user_ids))
+    from ui.models import MCQ
+
+    with transaction.atomic():
+        # Questions deleted since they were answered can't be stored
+        known = set(MCQ.objects.filter(id__in=matrix.mcq_ids.tolist()).values_list("id", flat=True))
+        ItemCalibration.objects.all().delete()
+        ItemCalibration.objects.bulk_create(
+            [
+                ItemCalibration(
+                    mcq_id=int(mcq_id), model=fit.model, difficulty=float(fit.difficulty[j]),
+                    discrimination=float(fit.discrimination[j]), responses=int(item_counts[j]), calibrated_at=now,
+                )
+                for j, mcq_id in enumerate(matrix.mcq_ids) if int(mcq_id) in known
+            ],
+            batch_size=batch_size,
+        )
+        UserAbility.objects.all().delete()
+        UserAbility.objects.bulk_create(
+            [
+                UserAbility(user_id=int(user_id), ability=float(fit.ability[i]),
+                            responses=int(user_counts[i]), calibrated_at=now)
+                for i, user_id in enumerate(matrix.user_ids)
+            ],
+            batch_size=batch_size,
+        )
+
+
+def simulate_responses(n_users: int, n_items: int, n_responses: int, seed: int = 0,
+                       two_pl: bool = True) -> Tuple[ResponseMatrix, np.ndarray, np.ndarray, np.ndarray]:
+    """Synthetic responses from known parameters; returns (matrix, theta, b, a)"""
+    rng = np.random.default_rng(seed)
+    theta = rng.normal(0, 1, n_users)
+    b = rng.normal(0, 1, n_items)
+    a = np.exp(rng.normal(0, 0.3, n_items)) if two_pl else np.ones(n_items)
+    rows = rng.integers(0, n_users, n_responses)
+    cols = rng.integers(0, n_items, n_responses)
+    p = expit(a[cols] * (theta[rows] - b[cols]))
+    correct = (rng.random(n_responses) < p).astype(np.float64)
+    matrix = ResponseMatrix(np.arange(n_users), np.arange(n_items), rows, cols, correct)
+    return matrix, theta, b, a
@@ -0,0 +1,150 @@
+from __future__ import annotations
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import math
+from django.db import transaction
+from .models import QuestionStats, QuizResult
+
+PICK_FIELDS = {"A": "picks_a", "B": "picks_b", "C": "picks_c", "D": "picks_d"}
+COUNTER_FIELDS = [
+    "times_served", "times_correct", "picks_a", "picks_b", "picks_c", "picks_d",
+    "picks_blank", "sum_score", "sum_score_sq", "sum_score_correct",
+]
+
+
+def _empty_delta() -> Dict[str, Any]:
+    delta: Dict[str, Any] = {field: 0 for field in COUNTER_FIELDS}
+    delta.update(sum_score=0.0, sum_score_sq=0.0, sum_score_correct=0.0)
+    return delta
+
+
+def collect_deltas(results: Iterable[QuizResult]) -> Dict[int, Dict[str, Any]]:
+    """Fold a batch of graded results into per-MCQ counter increments"""
+    deltas: Dict[int, Dict[str, Any]] = defaultdict(_empty_delta)
+    for result in results:
+        questions = result.questions_data or []
+        answers = result.user_answers or []
+        score = float(result.score_percentage or 0.0)
+        for i, q in enumerate(questions):
+            if not isinstance(q, dict) or q.get("id") is None:
+                continue
+            if isinstance(answers, dict):
+                answer = answers.get(str(i)) or ""
+            else:
+                answer = answers[i] if i < len(answers) else ""
+            answer = (answer or "").upper()
+            delta = deltas[int(q["id"])]
+            delta["times_served"] += 1
+            delta["sum_score"] += score
+            delta["sum_score_sq"] += score * score
+            delta[PICK_FIELDS.get(answer, "picks_blank")] += 1
+            if answer and answer == q.get("correct_answer"):
+                delta["times_correct"] += 1
+                delta["sum_score_correct"] += score
+    return deltas
+
+
+def record_question_stats(results: Iterable[QuizResult]):
+    """
+    Apply a batch of results to QuestionStats with a fixed number of queries:
+    insert missing rows, lock the touched rows, then one bulk update.
+
+    Topic and difficulty come from the MCQ itself, never from the
+    (client-supplied) quiz the question was served in.
+    """
+    deltas = collect_deltas(results)
+    if not deltas:
+        return
+    from ui.models import MCQ
+
+    with transaction.atomic():
+        # Only track questions that still exist in the bank
+        labels = question_labels(MCQ.objects.filter(id__in=deltas.keys()))
+        deltas = {mcq_id: d for mcq_id, d in deltas.items() if mcq_id in labels}
+        if not deltas:
+            return
+        QuestionStats.objects.bulk_create(
+            [QuestionStats(mcq_id=mcq_id, topic=labels[mcq_id][0], difficulty_level=labels[mcq_id][1])
+             for mcq_id in deltas],
+            ignore_conflicts=True,
+        )
+        rows = list(QuestionStats.objects.select_for_update().filter(mcq_id__in=deltas.keys()))
+        for row in rows:
+            delta = deltas[row.mcq_id]
+            for field in COUNTER_FIELDS:
+                setattr(row, field, getattr(row, field) + delta[field])
+            row.p_correct = row.times_correct / row.times_served if row.times_served else 0.0
+            row.topic, row.difficulty_level = labels[row.mcq_id]
+        QuestionStats.objects.bulk_update(rows, COUNTER_FIELDS + ["p_correct", "topic", "difficulty_level"])
+
+
+def question_labels(mcqs) -> Dict[int, Tuple[str, str]]:
+    """MCQ id -> (topic, difficulty_level) for an MCQ queryset; legacy MCQs without a topic get ''"""
+    return {mcq_id: (topic or "", difficulty) for mcq_id, topic, difficulty
+            in mcqs.values_list("id", "topic", "difficulty_level")}
+
+
+def mcq_post_save(sender, instance, created, **kwargs):
+    # Follow an MCQ moved to another topic or level (old values from catalog.mcq_pre_save)
+    old = getattr(instance, "_catalog_old", None)
+    if not created and old is not None and old != (instance.topic, instance.difficulty_level):
+        QuestionStats.objects.filter(mcq_id=instance.pk).update(
+            topic=instance.topic or "", difficulty_level=instance.difficulty_level,
+        )
+
+
+def discrimination(stats: QuestionStats) -> Optional[float]:
+    """Point-biserial correlation between answering correctly and the quiz score"""
+    n = stats.times_served
+    n1 = stats.times_correct
+    n0 = n - n1
+    if n < 2 or n1 == 0 or n0 == 0:
+        return None
+    mean = stats.sum_score / n
+    variance = stats.sum_score_sq / n - mean * mean
+    if variance <= 1e-9:
+        return None
+    mean_correct = stats.sum_score_correct / n1
+    mean_wrong = (stats.sum_score - stats.sum_score_correct) / n0
+    p = n1 / n
+    return (mean_correct - mean_wrong) / math.sqrt(variance) * math.sqrt(p * (1 - p))
+
+
+def describe(stats: QuestionStats) -> Dict[str, Any]:
+    picks = {letter: getattr(stats, field) for letter, field in PICK_FIELDS.items()}
+    mcq = stats.mcq
+    correct = mcq.correct_answer
+    r_pb = discrimination(stats)
+    top_distractor = max((l for l in picks if l != correct), key=lambda l: picks[l], default=None)
+
+    flags = []
+    if stats.p_correct < 0.3:
+        flags.append("too_hard")
+    elif stats.p_correct > 0.9:
+        flags.append("too_easy")
+    if r_pb is not None and r_pb < 0:
+        flags.append("negative_discrimination")
+    if top_distractor and picks[top_distractor] > picks.get(correct, 0):
+        flags.append("possible_miskey")
+
+    return {
+        "mcq_id": stats.mcq_id,
+        "question": mcq.question,
+        "topic": stats.topic,
+        "difficulty_level": stats.difficulty_level,
+        "correct_answer": correct,
+        "times_served": stats.times_served,
+        "times_correct": stats.times_correct,
+        "p_correct": round(stats.p_correct, 3),
+        "picks": {**picks, "blank": stats.picks_blank},
+        "discrimination": round(r_pb, 3) if r_pb is not None else None,
+        "flags": flags,
+    }
+
+
+def worst_questions(topic: Optional[str] = None, min_served: int = 5, limit: int = 20) -> List[Dict[str, Any]]:
+    """Lowest p_correct questions, served from the (topic, p_correct) index"""
+    queryset = QuestionStats.objects.select_related("mcq").filter(times_served__gte=min_served)
+    if topic:
+        queryset = queryset.filter(topic=topic)
+    return [describe(s) for s in queryset.order_by("p_correct")[:limit]]
@@ -0,0 +1,151 @@
+from __future__ import annotations
+from typing import Any, Dict, Iterable, Optional, Tuple
+import hashlib
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from .models import LeaderboardEntry, QuizResult
+
+LEADERBOARD_TTL = 30  # seconds; boards are allowed to lag submissions briefly
+MAX_TOP_K = 100
+
+BoardKey = Tuple[int, str, str]
+# Board order; rank_of counts the entries ahead in exactly this order.
+# Earlier achievers win full ties, then the lower user id.
+BOARD_ORDER = ("-best_score", "best_time_seconds", "achieved_at", "user_id")
+
+
+def _cache_key(*parts: Any) -> str:
+    # Topics may contain spaces/unicode, which some cache backends reject
+    digest = hashlib.md5("\x1f".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return f"leaderboard:{digest}"
+
+
+def _better(score: float, seconds: float, other_score: float, other_seconds: float) -> bool:
+    return score > other_score or (score == other_score and seconds < other_seconds)
+
+
+def collect_bests(results: Iterable[QuizResult]) -> Dict[BoardKey, Dict[str, Any]]:
+    """Best attempt and attempt count per (user, topic, difficulty) in a batch"""
+    bests: Dict[BoardKey, Dict[str, Any]] = {}
+    for result in results:
+        key = (result.user_id, result.topic, result.difficulty_level)
+        score = float(result.score_percentage or 0.0)
+        seconds = result.time_taken.total_seconds() if result.time_taken else 0.0
+        best = bests.get(key)
+        if best is None:
+            bests[key] = {"score": score, "seconds": seconds, "at": result.date_taken, "attempts": 1}
+            continue
+        best["attempts"] += 1
+        if _better(score, seconds, best["score"], best["seconds"]):
+            best.update(score=score, seconds=seconds, at=result.date_taken)
+    return bests
+
+
+def merge_bests(into: Dict[BoardKey, Dict[str, Any]], bests: Dict[BoardKey, Dict[str, Any]]):
+    """Fold a later batch's ``collect_bests`` into ``into``; ties keep the earlier attempt"""
+    for key, best in bests.items():
+        current = into.get(key)
+        if current is None:
+            into[key] = dict(best)
+            continue
+        current["attempts"] += best["attempts"]
+        if _better(best["score"], best["seconds"], current["score"], current["seconds"]):
+            current.update(score=best["score"], seconds=best["seconds"], at=best["at"])
+
+
+def record_leaderboard(results: Iterable[QuizResult]):
+    """Fold a batch of per-topic results into LeaderboardEntry (insert missing, lock, bulk update)"""
+    bests = collect_bests(results)
+    if not bests:
+        return
+    with transaction.atomic():
+        LeaderboardEntry.objects.bulk_create(
+            [LeaderboardEntry(user_id=k[0], topic=k[1], difficulty_level=k[2], best_score=-1.0)
+             for k in bests],
+            ignore_conflicts=True,
+        )
+        # One predicate per board so the lock only covers the touched rows
+        boards: Dict[Tuple[str, str], set] = {}
+        for user_id, topic, difficulty in bests:
+            boards.setdefault((topic, difficulty), set()).add(user_id)
+        match = Q()
+        for (topic, difficulty), user_ids in boards.items():
+            match |= Q(topic=topic, difficulty_level=difficulty, user_id__in=user_ids)
+        rows = list(LeaderboardEntry.objects.select_for_update().filter(match))
+        for row in rows:
+            best = bests[(row.user_id, row.topic, row.difficulty_level)]
+            row.attempts += best["attempts"]
+            if row.best_score < 0 or _better(best["score"], best["seconds"], row.best_score, row.best_time_seconds):
+                row.best_score = best["score"]
+                row.best_time_seconds = best["seconds"]
+                row.achieved_at = best["at"]
+        LeaderboardEntry.objects.bulk_update(
+            rows, ["best_score", "best_time_seconds", "attempts", "achieved_at"]
+        )
+
+
+def top_k(topic: str, difficulty: str, k: int = 10):
+    """Top-K board read in index order"""
+    return list(
+        LeaderboardEntry.objects.filter(topic=topic, difficulty_level=difficulty)
+        .select_related("user").only("user__username", "best_score", "best_time_seconds", "attempts", "achieved_at")
+        .order_by(*BOARD_ORDER)[:k]
+    )
+
+
+def rank_of(user_id: int, topic: str, difficulty: str) -> Optional[Dict[str, Any]]:
+    """1-based rank of a user's best attempt via an indexed range count, consistent with ``top_k``"""
+    entry = LeaderboardEntry.objects.filter(user_id=user_id, topic=topic, difficulty_level=difficulty).first()
+    if entry is None:
+        return None
+    ahead = (
+        Q(best_score__gt=entry.best_score)
+        | Q(best_score=entry.best_score, best_time_seconds__lt=entry.best_time_seconds)
+    )
+    if entry.achieved_at is not None:
+        same_time = Q(best_score=entry.best_score, best_time_seconds=entry.best_time_seconds)
+        ahead |= same_time & (
+            Q(achieved_at__lt=entry.achieved_at) | Q(achieved_at=entry.achieved_at, user_id__lt=entry.user_id)
+        )
+    ahead = LeaderboardEntry.objects.filter(topic=topic, difficulty_level=difficulty).filter(ahead).count()
+    return {
+        "rank": ahead + 1,
+        "best_score": entry.best_score,
+        "best_time_seconds": entry.best_time_seconds,
+        "attempts": entry.attempts,
+    }
+
+
+def get_leaderboard(topic: str, difficulty: str, k: int = 10) -> Dict[str, Any]:
+    """Top-K board as JSON-ready data, cached for LEADERBOARD_TTL seconds"""
+    k = max(1, min(k, MAX_TOP_K))
+    cache_key = _cache_key("top", topic, difficulty, k)
+    board = cache.get(cache_key)
+    if board is None:
+        entries = top_k(topic, difficulty, k)
+        board = {
+            "topic": topic,
+            "difficulty_level": difficulty,
+            "entries": [
+                {
+                    "rank": i,
+                    "username": e.user.username,
+                    "best_score": e.best_score,
+                    "best_time_seconds": e.best_time_seconds,
+                    "attempts": e.attempts,
+                }
+                for i, e in enumerate(entries, start=1)
+            ],
+        }
+        cache.set(cache_key, board, LEADERBOARD_TTL)
+    return board
+
+
+def get_my_rank(user_id: int, topic: str, difficulty: str) -> Optional[Dict[str, Any]]:
+    cache_key = _cache_key("rank", user_id, topic, difficulty)
+    rank = cache.get(cache_key)
+    if rank is None:
+        rank = rank_of(user_id, topic, difficulty) or {}
+        cache.set(cache_key, rank, LEADERBOARD_TTL)
+    return rank or None
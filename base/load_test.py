@@ -0,0 +1,237 @@
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from .suggestion_trace import histogram
+
+# Relative weight of each step in a client's journey after it logs in
+DEFAULT_MIX = {"dashboard": 2, "analytics": 2, "quiz": 2, "api_quiz": 2, "submit": 1}
+DIFFICULTIES = ("Easy", "Medium", "Hard")
+
+
+def parse_mix(spec: str) -> Dict[str, int]:
+    """``"dashboard=2,submit=1"`` -> weights; unknown steps are an error"""
+    mix = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, weight = part.partition("=")
+        if name not in STEPS:
+            raise ValueError(f"Unknown step {name!r}; choose from {', '.join(STEPS)}")
+        mix[name] = int(weight or 1)
+    if not mix or not any(mix.values()):
+        raise ValueError("The mix needs at least one step with a positive weight")
+    return mix
+
+
+class LatencyRecorder:
+    """Per-endpoint latencies and failures, shared by every client thread"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.statuses: Dict[str, Dict[int, int]] = {}
+
+    def record(self, endpoint: str, seconds: float, status: int, ok: bool):
+        with self._lock:
+            self.latencies.setdefault(endpoint, []).append(seconds)
+            statuses = self.statuses.setdefault(endpoint, {})
+            statuses[status] = statuses.get(status, 0) + 1
+            if not ok:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        with self._lock:
+            endpoints = {}
+            for endpoint, latencies in sorted(self.latencies.items()):
+                endpoints[endpoint] = {
+                    **histogram(latencies),
+                    "errors": self.errors.get(endpoint, 0),
+                    "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+                    "statuses": {str(code): n for code, n in sorted(self.statuses[endpoint].items())},
+                }
+            total = sum(len(latencies) for latencies in self.latencies.values())
+        return {
+            "seconds": round(elapsed, 2),
+            "requests": total,
+            "errors": sum(self.errors.values()),
+            "throughput_rps": round(total / elapsed, 2) if elapsed else None,
+            "endpoints": endpoints,
+        }
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # Time each request on its own; a login's redirect isn't part of it
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Client:
+    """One simulated browser: its own cookie jar (session + CSRF token) and timings"""
+
+    def __init__(self, base_url: str, recorder: LatencyRecorder, timeout: float = 30.0):
+        self.base_url = base_url.rstrip("/")
+        self.recorder = recorder
+        self.timeout = timeout
+        self.cookies = CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies), _NoRedirect)
+
+    def cookie(self, name: str) -> Optional[str]:
+        return next((c.value for c in self.cookies if c.name == name), None)
+
+    def request(self, endpoint: str, path: str, params: Optional[Dict[str, Any]] = None,
+                data: Optional[bytes] = None, headers: Optional[Dict[str, str]] = None) -> Tuple[int, bytes]:
+        url = self.base_url + path
+        if params:
+            url += "?" + urllib.parse.urlencode(params)
+        request = urllib.request.Request(url, data=data, headers=headers or {})
+        started = time.perf_counter()
+        try:
+            with self.opener.open(request, timeout=self.timeout) as response:
+                status, body = response.status, response.read()
+        except urllib.error.HTTPError as e:
+            status, body = e.code, e.read()
+        except (urllib.error.URLError, OSError):
+            status, body = 0, b""
+        self.recorder.record(endpoint, time.perf_counter() - started, status, 0 < status < 400)
+        return status, body
+
+    def get_json(self, endpoint: str, path: str, params: Optional[Dict[str, Any]] = None):
+        status, body = self.request(endpoint, path, params)
+        try:
+            return json.loads(body) if status == 200 else None
+        except ValueError:
+            return None
+
+    def post_form(self, endpoint: str, path: str, fields: Dict[str, str]) -> int:
+        fields = {**fields, "csrfmiddlewaretoken": self.cookie("csrftoken") or ""}
+        headers = {"Content-Type": "application/x-www-form-urlencoded", "Referer": self.base_url + path}
+        return self.request(endpoint, path, data=urllib.parse.urlencode(fields).encode(), headers=headers)[0]
+
+    def post_json(self, endpoint: str, path: str, payload: Any) -> int:
+        headers = {"Content-Type": "application/json"}
+        return self.request(endpoint, path, data=json.dumps(payload).encode(), headers=headers)[0]
+
+
+class Journey:
+    """A logged-in user's session: remembers the last quiz served so it can be submitted"""
+
+    def __init__(self, client: Client, rng: random.Random, topics: List[str]):
+        self.client = client
+        self.rng = rng
+        self.topics = topics
+        self.questions: List[Dict[str, Any]] = []
+        self.quiz: Optional[Tuple[str, str]] = None
+
+    def login(self, username: str, password: str) -> bool:
+        self.client.request("login_page", "/login/")  # sets the CSRF cookie
+        status = self.client.post_form("login", "/login/", {"username": username, "password": password})
+        # A successful login redirects to the dashboard; a failed one re-renders the form
+        return status == 302
+
+    def pick_quiz(self) -> Tuple[str, str]:
+        return self.rng.choice(self.topics), self.rng.choice(DIFFICULTIES)
+
+
+def _dashboard(journey: Journey):
+    journey.client.request("dashboard", "/userdashboard/")
+
+
+def _analytics(journey: Journey):
+    journey.client.request("analytics-data", "/analytics-data/")
+
+
+def _quiz(journey: Journey):
+    topic, difficulty = journey.pick_quiz()
+    journey.client.request("quiz", "/quiz/", {"topic": topic, "difficulty": difficulty})
+
+
+def _api_quiz(journey: Journey):
+    topic, difficulty = journey.pick_quiz()
+    questions = journey.client.get_json(
+        "ui/api/quiz", "/ui/api/quiz/", {"topic": topic, "difficulty_level": difficulty, "num_questions": 10},
+    )
+    if questions:
+        journey.questions, journey.quiz = questions, (topic, difficulty)
+
+
+def _submit(journey: Journey):
+    if not journey.questions:
+        _api_quiz(journey)
+        if not journey.questions:
+            return
+    topic, difficulty = journey.quiz
+    answers = [
+        q["correct_answer"] if journey.rng.random() < 0.6 else journey.rng.choice("ABCD")
+        for q in journey.questions
+    ]
+    journey.client.post_json("submit-quiz-result", "/submit-quiz-result/", {
+        "topic": topic,
+        "difficulty_level": difficulty,
+        "sub_topic": journey.questions[0].get("sub_topic", ""),
+        "time_taken": round(journey.rng.uniform(60, 600), 1),
+        "questions": journey.questions,
+        "user_answers": answers,
+    })
+    journey.questions = []
+
+
+STEPS: Dict[str, Callable[[Journey], None]] = {
+    "dashboard": _dashboard,
+    "analytics": _analytics,
+    "quiz": _quiz,
+    "api_quiz": _api_quiz,
+    "submit": _submit,
+}
+
+
+def run_load_test(base_url: str, usernames: List[str], password: str, clients: int = 10,
+                  duration: Optional[float] = 30.0, steps_per_client: Optional[int] = None,
+                  mix: Optional[Dict[str, int]] = None, seed: int = 0,
+                  topics: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Drive ``clients`` concurrent threads, each logging in as one of
+    ``usernames`` and then taking weighted-random steps until ``duration``
+    seconds pass or it has taken ``steps_per_client`` steps.
+    """
+    if not usernames:
+        raise ValueError("No users to log in as")
+    mix = mix or DEFAULT_MIX
+    names = [name for name, weight in mix.items() if weight > 0]
+    weights = [mix[name] for name in names]
+    recorder = LatencyRecorder()
+
+    if topics is None:
+        topics = Client(base_url, recorder).get_json("ui/api/topics", "/ui/api/topics/") or []
+    if not topics:
+        raise ValueError(f"No quiz topics available from {base_url}")
+
+    started = time.perf_counter()
+    deadline = started + duration if duration else None
+    failed_logins = []
+
+    def run_client(index: int):
+        rng = random.Random(seed * 100003 + index)
+        journey = Journey(Client(base_url, recorder), rng, topics)
+        username = usernames[index % len(usernames)]
+        if not journey.login(username, password):
+            failed_logins.append(username)
+            return
+        taken = 0
+        while (deadline is None or time.perf_counter() < deadline) and \
+                (steps_per_client is None or taken < steps_per_client):
+            STEPS[rng.choices(names, weights)[0]](journey)
+            taken += 1
+
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(run_client, range(clients)))
+
+    report = recorder.report(time.perf_counter() - started)
+    report.update(clients=clients, mix=mix, failed_logins=failed_logins)
+    return report
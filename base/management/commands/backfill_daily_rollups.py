@@ -0,0 +1,76 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+from django.db.models.functions import TruncDate
+
+from base.analytics_cache import bump_all_history_versions
+from base.models import DailyTopicRollup, QuizResult
+
+
+class Command(BaseCommand):
+    help = 'Rebuild daily per-user topic rollups from stored quiz results'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='user_ids',
+                            help='Only rebuild rollups for this user id (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help='Rollup rows inserted per bulk_create')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        results = QuizResult.objects.all()
+        rollups = DailyTopicRollup.objects.all()
+        if options['user_ids']:
+            results = results.filter(user_id__in=options['user_ids'])
+            rollups = rollups.filter(user_id__in=options['user_ids'])
+
+        # One grouped pass over quiz_results, streamed from the database
+        grouped = (
+            results.order_by()
+            .annotate(day=TruncDate('date_taken'))
+            .values('user_id', 'day', 'topic', 'sub_topic', 'difficulty_level')
+            .annotate(
+                quiz_count=Count('id'),
+                score_sum=Sum('score_percentage'),
+                best_score=Max('score_percentage'),
+                time_total=Sum('time_taken'),
+                last_taken=Max('date_taken'),
+            )
+        )
+
+        started = time.perf_counter()
+        written = 0
+        with transaction.atomic():
+            deleted, _ = rollups.delete()
+            self.stdout.write(f"Cleared {deleted} existing rollup rows")
+
+            merged = {}
+            pending = []
+            for row in grouped.iterator(chunk_size=batch_size):
+                # NULL and '' sub-topics share a rollup row
+                key = (row['user_id'], row['day'], row['topic'], row['sub_topic'] or '', row['difficulty_level'])
+                seconds = row['time_total'].total_seconds() if row['time_total'] else 0.0
+                rollup = merged.get(key)
+                if rollup is None:
+                    rollup = merged[key] = DailyTopicRollup(
+                        user_id=key[0], day=key[1], topic=key[2], sub_topic=key[3], difficulty_level=key[4],
+                        quiz_count=0, score_sum=0.0, best_score=0.0, time_seconds=0.0,
+                    )
+                    pending.append(rollup)
+                rollup.quiz_count += row['quiz_count']
+                rollup.score_sum += row['score_sum'] or 0.0
+                rollup.best_score = max(rollup.best_score, row['best_score'] or 0.0)
+                rollup.time_seconds += seconds
+                if rollup.last_taken is None or row['last_taken'] > rollup.last_taken:
+                    rollup.last_taken = row['last_taken']
+
+            for i in range(0, len(pending), batch_size):
+                DailyTopicRollup.objects.bulk_create(pending[i:i + batch_size])
+                written += len(pending[i:i + batch_size])
+
+        bump_all_history_versions()
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {written} rollup rows in {time.perf_counter() - started:.2f}s"
+        ))
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from base.ai import SuggestionEngine
+from base.models import DailyTopicRollup, Profile
+from base.summary import get_user_summary
+
+
+class Command(BaseCommand):
+    help = 'Compare batch_suggestions against one get_multiple_suggestions call per user on existing history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10,100,1000', help='Comma-separated batch sizes')
+        parser.add_argument('--loop-limit', type=int, default=200,
+                            help='Largest batch also timed with the per-user loop')
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        user_ids = list(
+            DailyTopicRollup.objects.order_by('user_id').values_list('user_id', flat=True).distinct()[:max(sizes)]
+        )
+        if not user_ids:
+            raise CommandError("No users with quiz history (see seed_load_test_data)")
+        engine = SuggestionEngine()
+
+        for size in sizes:
+            batch_ids = user_ids[:size]
+            started = time.perf_counter()
+            engine.batch_suggestions(batch_ids)
+            batch_seconds = time.perf_counter() - started
+            line = (f"{len(batch_ids):>6} users  batch {batch_seconds * 1000:9.1f}ms "
+                    f"({len(batch_ids) / batch_seconds:8.0f} users/sec)")
+
+            if len(batch_ids) <= options['loop_limit']:
+                started = time.perf_counter()
+                for user in Profile.objects.filter(id__in=batch_ids):
+                    engine.get_multiple_suggestions(user, summary=get_user_summary(user.id))
+                loop_seconds = time.perf_counter() - started
+                line += (f"  per-user {loop_seconds * 1000:9.1f}ms "
+                         f"({len(batch_ids) / loop_seconds:8.0f} users/sec)")
+            self.stdout.write(line)
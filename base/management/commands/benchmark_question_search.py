@@ -0,0 +1,102 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from base import question_search
+from ui.models import MCQ
+
+BENCH_PREFIX = '__bench__'
+DIFFICULTIES = ('Easy', 'Medium', 'Hard')
+
+
+class Command(BaseCommand):
+    help = 'Benchmark question search (FTS5 / token index / icontains) against a synthetic question bank'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=100000, help='Synthetic questions')
+        parser.add_argument('--vocabulary', type=int, default=20000, help='Distinct synthetic words')
+        parser.add_argument('--topics', type=int, default=50, help='Synthetic topics')
+        parser.add_argument('--queries', type=int, default=500, help='Timed searches per backend')
+        parser.add_argument('--baseline-queries', type=int, default=20,
+                            help='Timed question__icontains scans for comparison (0 to skip)')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        n_questions, n_topics = options['questions'], options['topics']
+        words = [f"w{i}x" for i in range(options['vocabulary'])]
+
+        def phrase(n):
+            # Zipf-distributed word choice, like natural text
+            ranks = np.minimum(rng.zipf(1.3, n), len(words)) - 1
+            return ' '.join(words[r] for r in ranks)
+
+        # Everything runs in one transaction that is rolled back: the synthetic
+        # questions never reach other connections, the search index or need cleaning up
+        with transaction.atomic():
+            try:
+                started = time.perf_counter()
+                for start in range(0, n_questions, 5000):
+                    MCQ.objects.bulk_create(
+                        [MCQ(topic=f"{BENCH_PREFIX}topic-{i % n_topics}", difficulty_level=DIFFICULTIES[i % 3],
+                             question=phrase(14) + '?', option_a=phrase(3), option_b=phrase(3),
+                             option_c=phrase(3), option_d=phrase(3), correct_answer='A')
+                         for i in range(start, min(start + 5000, n_questions))],
+                        batch_size=5000,
+                    )
+                self.stdout.write(f"Loaded {n_questions} questions in {time.perf_counter() - started:.2f}s")
+
+                # Queries mix common and rarer words, one or two words each, a third with filters
+                queries = []
+                for i in range(options['queries']):
+                    ranks = rng.integers(5, 2000, 1 + i % 2)
+                    topic = f"{BENCH_PREFIX}topic-{i % n_topics}" if i % 3 == 0 else None
+                    queries.append((' '.join(words[r] for r in ranks), topic, DIFFICULTIES[i % 3] if topic else None))
+
+                started = time.perf_counter()
+                token_index = question_search.build_token_index(MCQ.objects.filter(topic__startswith=BENCH_PREFIX))
+                self.stdout.write(
+                    f"Built token index: {len(token_index)} questions, {len(token_index.postings)} terms "
+                    f"in {time.perf_counter() - started:.2f}s"
+                )
+
+                backends = [('token_index', lambda terms, topic, difficulty: token_index.search(
+                    terms, topic, difficulty, limit=20))]
+                if question_search.uses_sqlite_fts():
+                    backends.insert(0, ('sqlite_fts5', lambda terms, topic, difficulty: question_search._fts_search(
+                        terms, topic, difficulty, 20, 0)))
+                for name, search in backends:
+                    self.report(name, [
+                        self.timed(search, question_search.tokenize(q), topic, difficulty)
+                        for q, topic, difficulty in queries
+                    ])
+
+                if options['baseline_queries']:
+                    def icontains(terms, topic, difficulty):
+                        queryset = MCQ.objects.all()
+                        for term in terms:
+                            queryset = queryset.filter(question__icontains=term)
+                        if topic:
+                            queryset = queryset.filter(topic=topic, difficulty_level=difficulty)
+                        return list(queryset.values_list('id', flat=True)[:20])
+                    self.report('question__icontains', [
+                        self.timed(icontains, question_search.tokenize(q), topic, difficulty)
+                        for q, topic, difficulty in queries[:options['baseline_queries']]
+                    ])
+            finally:
+                transaction.set_rollback(True)
+
+    def timed(self, search, *args):
+        started = time.perf_counter()
+        search(*args)
+        return time.perf_counter() - started
+
+    def report(self, name, timings):
+        values = np.array(timings) * 1000.0
+        self.stdout.write(self.style.SUCCESS(
+            f"{name} ({len(values)} queries): p50 {np.percentile(values, 50):.2f}ms  "
+            f"p95 {np.percentile(values, 95):.2f}ms  p99 {np.percentile(values, 99):.2f}ms  "
+            f"max {values.max():.2f}ms"
+        ))
@@ -0,0 +1,80 @@
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from base.models import Profile, ReviewState
+from base.spaced_repetition import due_questions
+from ui.models import MCQ
+
+BENCH_PREFIX = '__bench__'
+
+
+class Command(BaseCommand):
+    help = 'Benchmark due-queue lookups against a synthetic table of spaced-repetition states'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000, help='Synthetic users')
+        parser.add_argument('--questions', type=int, default=500, help='Synthetic questions per user')
+        parser.add_argument('--queries', type=int, default=500, help='Timed due-queue lookups')
+        parser.add_argument('--limit', type=int, default=10, help='Questions fetched per lookup')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        n_users, n_questions = options['users'], options['questions']
+        now = timezone.now()
+
+        # Everything runs in one transaction that is rolled back: the synthetic
+        # rows never become visible to other connections or need cleaning up
+        with transaction.atomic():
+            try:
+                started = time.perf_counter()
+                Profile.objects.bulk_create(
+                    [Profile(username=f"{BENCH_PREFIX}{i}", password='!') for i in range(n_users)],
+                    batch_size=2000,
+                )
+                MCQ.objects.bulk_create(
+                    [MCQ(topic=f"{BENCH_PREFIX}topic-{i % 20}", difficulty_level='Easy', question=f"Q{i}?",
+                         option_a='a', option_b='b', option_c='c', option_d='d', correct_answer='A')
+                     for i in range(n_questions)],
+                    batch_size=2000,
+                )
+                user_ids = list(Profile.objects.filter(username__startswith=BENCH_PREFIX).values_list('id', flat=True))
+                mcq_ids = list(MCQ.objects.filter(topic__startswith=BENCH_PREFIX).values_list('id', flat=True))
+
+                # Due dates from two weeks ago to two months ahead, so ~20% are due
+                offsets = rng.uniform(-14, 60, len(user_ids) * len(mcq_ids))
+                pending = []
+                i = 0
+                for user_id in user_ids:
+                    for mcq_id in mcq_ids:
+                        pending.append(ReviewState(
+                            user_id=user_id, mcq_id=mcq_id, repetitions=1, interval_days=6.0,
+                            due_at=now + timedelta(days=float(offsets[i])),
+                        ))
+                        i += 1
+                    if len(pending) >= 20000:
+                        ReviewState.objects.bulk_create(pending, batch_size=5000)
+                        pending = []
+                ReviewState.objects.bulk_create(pending, batch_size=5000)
+                self.stdout.write(
+                    f"Loaded {len(user_ids) * len(mcq_ids)} review states in {time.perf_counter() - started:.2f}s"
+                )
+
+                timings = []
+                for user_id in rng.choice(user_ids, options['queries']):
+                    started = time.perf_counter()
+                    due_questions(int(user_id), limit=options['limit'], now=now)
+                    timings.append(time.perf_counter() - started)
+                values = np.array(timings) * 1000.0
+                self.stdout.write(self.style.SUCCESS(
+                    f"due_questions(limit={options['limit']}): p50 {np.percentile(values, 50):.2f}ms  "
+                    f"p95 {np.percentile(values, 95):.2f}ms  p99 {np.percentile(values, 99):.2f}ms  "
+                    f"max {values.max():.2f}ms"
+                ))
+            finally:
+                transaction.set_rollback(True)
@@ -0,0 +1,54 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from base.export import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, export_queryset, iter_export, parse_bound
+
+
+class Command(BaseCommand):
+    help = 'Stream quiz results as CSV or JSONL, one row per answered question'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv')
+        parser.add_argument('--output', '-o', default='-', help="Output file path ('-' for stdout)")
+        parser.add_argument('--since', help='Only results taken on/after this ISO date or datetime')
+        parser.add_argument('--until', help='Only results taken before this ISO date or datetime')
+        parser.add_argument('--topic', help='Only results for this topic')
+        parser.add_argument('--user', type=int, help='Only results for this user id')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE,
+                            help='Results fetched per query')
+
+    def handle(self, *args, **options):
+        try:
+            queryset = export_queryset(
+                since=parse_bound(options['since']),
+                until=parse_bound(options['until']),
+                topic=options['topic'],
+                user_id=options['user'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        to_stdout = options['output'] == '-'
+        out = sys.stdout if to_stdout else open(options['output'], 'w', encoding='utf-8', newline='')
+        written = 0
+        stats = {}
+        started = time.perf_counter()
+        try:
+            for chunk in iter_export(queryset, options['format'], options['chunk_size'], stats):
+                out.write(chunk)
+                written += len(chunk)
+        finally:
+            if not to_stdout:
+                out.close()
+
+        elapsed = time.perf_counter() - started
+        # Report on stderr so stdout stays a clean export
+        elapsed = elapsed or 1e-9
+        self.stderr.write(self.style.SUCCESS(
+            f"Exported {stats.get('results', 0)} results as {stats.get('rows', 0)} rows "
+            f"({written / 1e6:.1f} MB) in {elapsed:.2f}s: "
+            f"{stats.get('results', 0) / elapsed:.0f} results/sec, {stats.get('rows', 0) / elapsed:.0f} rows/sec, "
+            f"{written / 1e6 / elapsed:.1f} MB/s"
+        ))
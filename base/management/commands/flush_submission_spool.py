@@ -0,0 +1,57 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from base.write_behind import WriteBehindBuffer, get_config
+
+
+class Command(BaseCommand):
+    help = 'Flush buffered quiz submissions from the write-behind spool into the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running as a flush worker instead of draining once')
+        parser.add_argument('--interval', type=float, default=None,
+                            help='Seconds between flushes in --loop mode (default: FLUSH_INTERVAL)')
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Rows inserted per batch (default: BATCH_SIZE)')
+        parser.add_argument('--requeue-dead-letters', action='store_true',
+                            help='Move quarantined submissions back onto the spool before flushing')
+
+    def handle(self, *args, **options):
+        config = get_config()
+        config['START_THREAD'] = False
+        if options['batch_size']:
+            config['BATCH_SIZE'] = options['batch_size']
+        interval = options['interval'] or config['FLUSH_INTERVAL']
+        buffer = WriteBehindBuffer(config)
+
+        if options['requeue_dead_letters']:
+            self.stdout.write(f"Requeued {buffer.spool.requeue_dead_letters()} dead-letter submissions")
+        self.stdout.write(f"Spool: {config['SPOOL_PATH']} ({buffer.spool.depth()} queued, "
+                          f"{buffer.spool.dead_letter_depth()} dead-lettered)")
+        if not options['loop']:
+            written = buffer.drain()
+            self._report(buffer)
+            self.stdout.write(self.style.SUCCESS(f"Flushed {written} submissions"))
+            return
+
+        try:
+            while True:
+                close_old_connections()
+                written = buffer.drain()
+                if written:
+                    self._report(buffer)
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            self._report(buffer)
+
+    def _report(self, buffer):
+        m = buffer.metrics()
+        self.stdout.write(
+            f"  flushed={m['flushed']} batches={m['flush_batches']} errors={m['flush_errors']} "
+            f"quarantined={m['quarantined']} queue_depth={m['queue_depth']} "
+            f"flush avg/max={m['avg_flush_seconds'] * 1000:.1f}/{m['max_flush_seconds'] * 1000:.1f}ms "
+            f"queue latency last/max={m['last_queue_latency_seconds']:.2f}/{m['max_queue_latency_seconds']:.2f}s"
+        )
@@ -0,0 +1,64 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from base.load_test import DEFAULT_MIX, parse_mix, run_load_test
+from base.models import Profile
+
+
+class Command(BaseCommand):
+    help = ('Replay a weighted mix of user journeys (login, dashboard, analytics-data, quiz, ui/api/quiz, '
+            'submit-quiz-result) against a running server from N concurrent clients and report '
+            'throughput and p50/p95/p99 latency per endpoint')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--clients', type=int, default=10, help='Concurrent clients (threads)')
+        parser.add_argument('--duration', type=float, default=30.0, help='Seconds to run for')
+        parser.add_argument('--steps', type=int, default=None,
+                            help='Stop each client after this many steps instead of after --duration')
+        parser.add_argument('--mix', default=','.join(f"{name}={weight}" for name, weight in DEFAULT_MIX.items()),
+                            help='Comma-separated step=weight pairs')
+        parser.add_argument('--prefix', default='seed_', help='Log in as users with this username prefix')
+        parser.add_argument('--password', default='loadtest')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+
+    def handle(self, *args, **options):
+        try:
+            mix = parse_mix(options['mix'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        # Users come from this database, so point it at the same one as the server
+        usernames = list(
+            Profile.objects.filter(username__startswith=options['prefix'])
+            .order_by('id').values_list('username', flat=True)[:options['clients']]
+        )
+        if not usernames:
+            raise CommandError(f"No users with prefix {options['prefix']!r} (see seed_load_test_data)")
+
+        try:
+            report = run_load_test(
+                options['base_url'], usernames, options['password'], clients=options['clients'],
+                duration=None if options['steps'] else options['duration'], steps_per_client=options['steps'],
+                mix=mix, seed=options['seed'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['requests']} requests from {report['clients']} clients in {report['seconds']}s: "
+            f"{report['throughput_rps']} req/sec, {report['errors']} errors"
+        ))
+        if report['failed_logins']:
+            self.stdout.write(self.style.WARNING(f"  {len(report['failed_logins'])} clients could not log in"))
+        for endpoint, stats in report['endpoints'].items():
+            self.stdout.write(
+                f"  {endpoint:<20} n={stats['count']:<6} {stats['throughput_rps']:8.1f}/s  "
+                f"p50 {stats['p50_ms']:8.2f}ms  p95 {stats['p95_ms']:8.2f}ms  p99 {stats['p99_ms']:8.2f}ms  "
+                f"max {stats['max_ms']:8.2f}ms  errors {stats['errors']}"
+            )
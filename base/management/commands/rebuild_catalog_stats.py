@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from base.catalog import get_catalog_snapshot, rebuild_catalog_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the admin catalog statistics snapshot from the source tables'
+
+    def handle(self, *args, **options):
+        stats = rebuild_catalog_stats()
+        snapshot = get_catalog_snapshot()
+        self.stdout.write(f"Users:            {stats.total_users}")
+        self.stdout.write(f"Topic uploads:    {stats.total_uploads} ({stats.uploads_with_pdfs} with PDFs)")
+        self.stdout.write(f"MCQ topics:       {snapshot['total_topics']} "
+                          f"(Easy {snapshot['easy_topics']}, Medium {snapshot['medium_topics']}, "
+                          f"Hard {snapshot['hard_topics']})")
+        self.stdout.write(f"Questions:        {snapshot['total_questions']}")
+        self.stdout.write(self.style.SUCCESS("Catalog statistics rebuilt"))
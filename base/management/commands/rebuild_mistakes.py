@@ -0,0 +1,65 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from base.mistakes import collect_outcomes
+from base.models import QuizResult, UserMistake
+from ui.models import MCQ
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-user mistake index from stored quiz results'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Results read per query')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        # Review quizzes count too, as on submit: answering a mistake right clears it
+        queryset = QuizResult.objects.only(
+            'id', 'user_id', 'date_taken', 'questions_data', 'user_answers',
+        ).order_by('id')
+
+        # Fold everything in memory first (one entry per user and question),
+        # then write each row once
+        outcomes = {}
+        scanned = 0
+        last_id = 0
+        started = time.perf_counter()
+        while True:
+            batch = list(queryset.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].id
+            for key, outcome in collect_outcomes(batch).items():
+                merged = outcomes.setdefault(key, {'missed': 0, 'last_missed': None, 'last_correct': None})
+                merged['missed'] += outcome['missed']
+                for field in ('last_missed', 'last_correct'):
+                    if outcome[field] and (merged[field] is None or outcome[field] > merged[field]):
+                        merged[field] = outcome[field]
+            scanned += len(batch)
+            if scanned % (batch_size * 100) == 0:
+                self.stdout.write(f"  {scanned} results scanned "
+                                  f"({scanned / (time.perf_counter() - started):.0f} results/sec)")
+
+        known = set(MCQ.objects.values_list('id', flat=True))
+        with transaction.atomic():
+            deleted, _ = UserMistake.objects.all().delete()
+            self.stdout.write(f"Cleared {deleted} existing UserMistake rows")
+            created = UserMistake.objects.bulk_create(
+                [
+                    UserMistake(
+                        user_id=user_id, mcq_id=mcq_id, times_missed=o['missed'], last_missed=o['last_missed'],
+                        last_correct=o['last_correct'],
+                        outstanding=o['last_correct'] is None or o['last_missed'] >= o['last_correct'],
+                    )
+                    for (user_id, mcq_id), o in outcomes.items() if o['missed'] and mcq_id in known
+                ],
+                batch_size=2000,
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {len(created)} mistakes from {scanned} results in {time.perf_counter() - started:.2f}s"
+        ))
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from base import question_search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the question full-text search index (FTS5 on SQLite, otherwise the on-disk token index)'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        index = question_search.rebuild()
+        if index is None:
+            self.stdout.write(self.style.SUCCESS(
+                f"Rebuilt the SQLite FTS5 table and triggers in {time.perf_counter() - started:.2f}s"
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Indexed {len(index)} questions ({len(index.postings)} terms) in "
+                f"{time.perf_counter() - started:.2f}s -> {question_search.index_path()}"
+            ))
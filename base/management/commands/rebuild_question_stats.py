@@ -0,0 +1,64 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from base.item_analysis import COUNTER_FIELDS, collect_deltas, question_labels
+from base.models import QuestionStats, QuizResult
+from base.review_modes import review_quiz_q
+from ui.models import MCQ
+
+
+class Command(BaseCommand):
+    help = 'Rebuild per-question item analysis statistics from stored quiz results'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Results read per query')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = QuizResult.objects.exclude(review_quiz_q()).only(
+            'id', 'score_percentage', 'questions_data', 'user_answers',
+        ).order_by('id')
+
+        scanned = 0
+        started = time.perf_counter()
+
+        def results():
+            nonlocal scanned
+            last_id = 0
+            while True:
+                batch = list(queryset.filter(id__gt=last_id)[:batch_size])
+                if not batch:
+                    return
+                last_id = batch[-1].id
+                yield from batch
+                scanned += len(batch)
+                if scanned % (batch_size * 100) == 0:
+                    self.stdout.write(f"  {scanned} results scanned "
+                                      f"({scanned / (time.perf_counter() - started):.0f} results/sec)")
+
+        # Fold everything in memory first (bounded by the number of questions),
+        # then write each row once instead of re-updating it every batch
+        deltas = collect_deltas(results())
+        labels = question_labels(MCQ.objects.all())
+        with transaction.atomic():
+            deleted, _ = QuestionStats.objects.all().delete()
+            self.stdout.write(f"Cleared {deleted} existing QuestionStats rows")
+            QuestionStats.objects.bulk_create(
+                [
+                    QuestionStats(
+                        mcq_id=mcq_id, topic=labels[mcq_id][0], difficulty_level=labels[mcq_id][1],
+                        p_correct=d['times_correct'] / d['times_served'] if d['times_served'] else 0.0,
+                        **{field: d[field] for field in COUNTER_FIELDS},
+                    )
+                    for mcq_id, d in deltas.items() if mcq_id in labels
+                ],
+                batch_size=2000,
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt stats for {QuestionStats.objects.count()} questions from {scanned} results "
+            f"in {time.perf_counter() - started:.2f}s"
+        ))
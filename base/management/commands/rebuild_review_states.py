@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from base.models import QuizResult, ReviewState
+from base.spaced_repetition import apply_reviews, collect_reviews
+from ui.models import MCQ
+
+
+class Command(BaseCommand):
+    help = 'Rebuild spaced-repetition review schedules by replaying stored quiz results'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Results read per query')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        # Replayed oldest first (keyset on the (date_taken, id) index), so every
+        # schedule steps through its reviews in order across batches
+        queryset = QuizResult.objects.only(
+            'id', 'user_id', 'date_taken', 'questions_data', 'user_answers',
+        ).order_by('date_taken', 'id')
+
+        states = {}
+        scanned = 0
+        after = None
+        started = time.perf_counter()
+        while True:
+            page = queryset
+            if after is not None:
+                page = page.filter(Q(date_taken__gt=after[0]) | Q(date_taken=after[0], id__gt=after[1]))
+            batch = list(page[:batch_size])
+            if not batch:
+                break
+            after = (batch[-1].date_taken, batch[-1].id)
+            for (user_id, mcq_id), history in collect_reviews(batch).items():
+                state = states.get((user_id, mcq_id))
+                if state is None:
+                    state = states[(user_id, mcq_id)] = ReviewState(user_id=user_id, mcq_id=mcq_id)
+                apply_reviews(state, history)
+            scanned += len(batch)
+            if scanned % (batch_size * 100) == 0:
+                self.stdout.write(f"  {scanned} results replayed "
+                                  f"({scanned / (time.perf_counter() - started):.0f} results/sec)")
+
+        known = set(MCQ.objects.values_list('id', flat=True))
+        with transaction.atomic():
+            deleted, _ = ReviewState.objects.all().delete()
+            self.stdout.write(f"Cleared {deleted} existing ReviewState rows")
+            created = ReviewState.objects.bulk_create(
+                [state for (_, mcq_id), state in states.items() if mcq_id in known], batch_size=2000,
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {len(created)} review schedules from {scanned} results in {time.perf_counter() - started:.2f}s"
+        ))
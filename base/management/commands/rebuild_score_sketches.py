@@ -0,0 +1,47 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from base.models import QuizResult, ScoreSketch
+from base.review_modes import review_quiz_q
+from base.sketches import BANDS_CACHE_KEY, collect_sketches, merge_into_table
+
+
+class Command(BaseCommand):
+    help = 'Rebuild per-topic score and completion-time quantile sketches from stored quiz results'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000,
+                            help='Rows fetched per round trip from the server-side cursor')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        rows = QuizResult.objects.exclude(review_quiz_q()).order_by().values_list(
+            'topic', 'difficulty_level', 'score_percentage', 'time_taken',
+        )
+
+        started = time.perf_counter()
+        scanned = 0
+
+        def values():
+            nonlocal scanned
+            for topic, difficulty, score, time_taken in rows.iterator(chunk_size=chunk_size):
+                scanned += 1
+                if scanned % 100000 == 0:
+                    self.stdout.write(f"  {scanned} results scanned "
+                                      f"({scanned / (time.perf_counter() - started):.0f} results/sec)")
+                yield topic, difficulty, score, time_taken.total_seconds() if time_taken else None
+
+        # Memory is bounded by (topics x difficulties x sketch buckets), not by result count
+        sketches = collect_sketches(values())
+        with transaction.atomic():
+            deleted, _ = ScoreSketch.objects.all().delete()
+            merge_into_table(sketches, shard=0)
+        cache.delete(BANDS_CACHE_KEY)
+
+        self.stdout.write(f"Cleared {deleted} existing sketch rows")
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {len(sketches)} sketches from {scanned} results in {time.perf_counter() - started:.2f}s"
+        ))
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from base import topic_similarity
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the TF-IDF topic similarity index from every MCQ and write it to disk'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--show', type=int, default=0, metavar='N',
+                            help='Print the N nearest topics for each topic after rebuilding')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        index = topic_similarity.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {len(index)} topics in {time.perf_counter() - started:.2f}s "
+            f"-> {topic_similarity.index_path()}"
+        ))
+        if options['show']:
+            for topic in sorted(index.neighbours):
+                nearest = ', '.join(f"{other} ({score:.2f})"
+                                    for other, score in index.neighbours[topic][:options['show']])
+                self.stdout.write(f"  {topic}: {nearest or '-'}")
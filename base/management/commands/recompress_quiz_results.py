@@ -0,0 +1,97 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from base.fields import compress_json, decompress_json, is_compressed
+from base.models import QuizResult
+
+
+class Command(BaseCommand):
+    help = 'Recompress legacy plaintext questions_data/user_answers rows in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Rows read and rewritten per transaction')
+        parser.add_argument('--level', type=int, default=6,
+                            help='zlib compression level (1-9)')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Measure savings without writing anything')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        level = options['level']
+        dry_run = options['dry_run']
+
+        # Read raw column values so legacy plaintext rows can be told apart
+        # from already-compressed ones (the model field decodes both).
+        qn = connection.ops.quote_name
+        table = qn(QuizResult._meta.db_table)
+        select_sql = (
+            f"SELECT {qn('id')}, {qn('questions_data')}, {qn('user_answers')} "
+            f"FROM {table} WHERE {qn('id')} > %s ORDER BY {qn('id')} LIMIT %s"
+        )
+        update_sql = (
+            f"UPDATE {table} SET {qn('questions_data')} = %s, {qn('user_answers')} = %s "
+            f"WHERE {qn('id')} = %s"
+        )
+
+        scanned = rewritten = 0
+        bytes_before = bytes_after = 0
+        encode_seconds = decode_seconds = 0.0
+        last_id = 0
+        started = time.perf_counter()
+
+        while True:
+            with connection.cursor() as cursor:
+                cursor.execute(select_sql, [last_id, batch_size])
+                rows = cursor.fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            scanned += len(rows)
+
+            updates = []
+            for pk, questions_raw, answers_raw in rows:
+                if all(raw is None or is_compressed(raw) for raw in (questions_raw, answers_raw)):
+                    continue
+                new_values = []
+                for raw in (questions_raw, answers_raw):
+                    if raw is None:
+                        new_values.append(None)
+                        continue
+                    size = len(raw.encode('utf-8') if isinstance(raw, str) else bytes(raw))
+                    value = decompress_json(raw)
+                    t1 = time.perf_counter()
+                    packed = compress_json(value, level)
+                    t2 = time.perf_counter()
+                    decompress_json(packed)
+                    t3 = time.perf_counter()
+                    encode_seconds += t2 - t1
+                    decode_seconds += t3 - t2
+                    bytes_before += size
+                    bytes_after += len(packed)
+                    new_values.append(packed)
+                updates.append((new_values[0], new_values[1], pk))
+
+            if updates and not dry_run:
+                with transaction.atomic():
+                    with connection.cursor() as cursor:
+                        cursor.executemany(update_sql, updates)
+            rewritten += len(updates)
+            self.stdout.write(f"  scanned {scanned} rows (last id {last_id}), {rewritten} recompressed")
+
+        elapsed = time.perf_counter() - started
+        saved = bytes_before - bytes_after
+        ratio = (bytes_after / bytes_before * 100) if bytes_before else 0.0
+        per_row = rewritten or 1
+
+        self.stdout.write("")
+        self.stdout.write(f"Rows scanned:       {scanned}")
+        self.stdout.write(f"Rows recompressed:  {rewritten}" + (" (dry run)" if dry_run else ""))
+        self.stdout.write(f"Bytes before:       {bytes_before}")
+        self.stdout.write(f"Bytes after:        {bytes_after} ({ratio:.1f}% of original)")
+        self.stdout.write(f"Bytes saved:        {saved}")
+        self.stdout.write(f"Encode cost:        {encode_seconds / per_row * 1e6:.1f} us/row")
+        self.stdout.write(f"Decode cost:        {decode_seconds / per_row * 1e6:.1f} us/row")
+        self.stdout.write(self.style.SUCCESS(f"Done in {elapsed:.2f}s"))
@@ -0,0 +1,106 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from base.analytics_cache import bump_all_history_versions
+from base.grading import answer_key_cache, grade_batch
+from base.models import QuizResult
+
+
+class Command(BaseCommand):
+    help = 'Re-grade stored quiz results against the current MCQ answer key'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Results graded and written per batch')
+        parser.add_argument('--mcq-id', type=int, action='append', dest='mcq_ids',
+                            help='Only rewrite results containing this MCQ (repeatable)')
+        parser.add_argument('--topic', help='Only re-grade results for this topic')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report changes without writing them')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        only_mcqs = set(options['mcq_ids'] or [])
+        dry_run = options['dry_run']
+
+        key_map = answer_key_cache.load_all()
+        self.stdout.write(f"Loaded answer key for {len(key_map)} questions")
+
+        queryset = QuizResult.objects.only(
+            'id', 'total_questions', 'correct_answers', 'score_percentage',
+            'questions_data', 'user_answers',
+        ).order_by('id')
+        if options['topic']:
+            queryset = queryset.filter(topic=options['topic'])
+
+        scanned = skipped = changed = 0
+        last_id = 0
+        started = time.perf_counter()
+
+        while True:
+            batch = list(queryset.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].id
+            scanned += len(batch)
+
+            gradable = []
+            submissions = []
+            for result in batch:
+                questions = result.questions_data
+                if not isinstance(questions, list) or not questions:
+                    skipped += 1
+                    continue
+                ids = [q.get('id') for q in questions if isinstance(q, dict)]
+                if len(ids) != len(questions) or any(i is None for i in ids):
+                    # Results saved before questions carried their MCQ id
+                    skipped += 1
+                    continue
+                if only_mcqs and not only_mcqs.intersection(ids):
+                    continue
+                gradable.append(result)
+                submissions.append((ids, result.user_answers))
+
+            to_update = []
+            for result, (ids, _), (correct, total, score) in zip(gradable, submissions,
+                                                                 grade_batch(submissions, key_map)):
+                key_changed = False
+                for question, mcq_id in zip(result.questions_data, ids):
+                    new_key = key_map.get(int(mcq_id), question.get('correct_answer', ''))
+                    if question.get('correct_answer') != new_key:
+                        question['correct_answer'] = new_key
+                        key_changed = True
+                if (key_changed or result.correct_answers != correct
+                        or result.total_questions != total
+                        or abs(result.score_percentage - score) > 0.005):
+                    result.correct_answers = correct
+                    result.total_questions = total
+                    result.score_percentage = score
+                    to_update.append(result)
+
+            if to_update and not dry_run:
+                with transaction.atomic():
+                    QuizResult.objects.bulk_update(
+                        to_update,
+                        ['correct_answers', 'total_questions', 'score_percentage', 'questions_data'],
+                    )
+            changed += len(to_update)
+
+            elapsed = time.perf_counter() - started
+            rate = scanned / elapsed if elapsed else 0.0
+            self.stdout.write(f"  {scanned} results scanned, {changed} re-graded ({rate:.0f} results/sec)")
+
+        elapsed = time.perf_counter() - started
+        rate = scanned / elapsed if elapsed else 0.0
+        self.stdout.write("")
+        self.stdout.write(f"Results scanned:   {scanned}")
+        self.stdout.write(f"Results re-graded: {changed}" + (" (dry run)" if dry_run else ""))
+        self.stdout.write(f"Skipped (no ids):  {skipped}")
+        self.stdout.write(self.style.SUCCESS(f"Done in {elapsed:.2f}s ({rate:.0f} results/sec)"))
+        if changed and not dry_run:
+            bump_all_history_versions()
+            self.stdout.write(self.style.WARNING(
+                "Scores changed: run rebuild_question_stats and backfill_daily_rollups to refresh derived stats"
+            ))
@@ -0,0 +1,77 @@
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from base.ai import MLSuggestionEngine
+from base.export import export_queryset, parse_bound
+from base.history_features import iter_history, iter_transitions
+from base.replay import ReplaySimulator, RuleBaseline, load_model
+
+
+class Command(BaseCommand):
+    help = 'Replay quiz history in time order and compare suggestion models against what users did next'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', action='append', default=[], metavar='NAME=PATH',
+                            help='Candidate model pickle to evaluate (repeatable)')
+        parser.add_argument('--no-current', action='store_true',
+                            help='Skip the currently deployed suggestion model')
+        parser.add_argument('--since', help='Only replay results taken on/after this ISO date or datetime')
+        parser.add_argument('--until', help='Only replay results taken before this ISO date or datetime')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Results read per query')
+        parser.add_argument('--batch-size', type=int, default=10000, help='Decisions predicted per model call')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+
+    def handle(self, *args, **options):
+        models = {'rules': RuleBaseline()}
+        if not options['no_current']:
+            models['current'] = MLSuggestionEngine().model
+        for spec in options['model']:
+            name, sep, path = spec.partition('=')
+            if not sep:
+                path = name
+                name = os.path.splitext(os.path.basename(path))[0]
+            try:
+                models[name] = load_model(path)
+            except Exception as e:
+                raise CommandError(f"Could not load model {path!r}: {e}")
+
+        try:
+            queryset = export_queryset(since=parse_bound(options['since']), until=parse_bound(options['until']))
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        started = time.perf_counter()
+        simulator = ReplaySimulator(models, batch_size=options['batch_size'])
+        report = simulator.run(iter_transitions(iter_history(queryset, options['chunk_size'])))
+        elapsed = time.perf_counter() - started
+        report['seconds'] = round(elapsed, 2)
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(
+            f"Replayed {report['transitions']} decisions in {elapsed:.2f}s "
+            f"({report['transitions'] / elapsed if elapsed else 0:.0f}/sec); "
+            f"users changed topic {report['topic_change_rate'] or 0:.1%} of the time"
+        )
+        for model in report['models']:
+            followed, other = model['followed'], model['not_followed']
+            self.stdout.write(f"\n[{model['model']}]")
+            self.stdout.write(f"  agreement with users: {model['agreement_with_users'] or 0:.1%}")
+            self.stdout.write(f"  prediction mix: {model['prediction_mix']}")
+            self.stdout.write(
+                f"  followed:     n={followed['count']:<8} mean next score {followed['mean_next_score']}  "
+                f"pass rate {followed['next_pass_rate']}"
+            )
+            self.stdout.write(
+                f"  not followed: n={other['count']:<8} mean next score {other['mean_next_score']}  "
+                f"pass rate {other['next_pass_rate']}"
+            )
+        if report['pairwise_agreement']:
+            self.stdout.write("\nPairwise agreement:")
+            for pair, agreement in report['pairwise_agreement'].items():
+                self.stdout.write(f"  {pair}: {agreement:.1%}")
@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Mod
+from django.utils import timezone
+
+from base.models import ReviewState
+
+
+class Command(BaseCommand):
+    help = 'Bulk-reschedule spaced-repetition reviews (postpone, or spread an overdue backlog over several days)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='user_ids',
+                            help='Only reschedule this user id (repeatable)')
+        parser.add_argument('--shift-days', type=float, default=0.0,
+                            help='Move every matching due date by this many days (negative brings reviews forward)')
+        parser.add_argument('--spread-days', type=int, default=0,
+                            help='Spread currently overdue reviews evenly over the next N days')
+
+    def handle(self, *args, **options):
+        if not options['shift_days'] and not options['spread_days']:
+            raise CommandError('Pass --shift-days and/or --spread-days')
+
+        states = ReviewState.objects.all()
+        if options['user_ids']:
+            states = states.filter(user_id__in=options['user_ids'])
+
+        now = timezone.now()
+        with transaction.atomic():
+            # Set-based updates, so this stays a handful of statements at any table size
+            if options['shift_days']:
+                shifted = states.update(due_at=F('due_at') + timedelta(days=options['shift_days']))
+                self.stdout.write(f"Shifted {shifted} reviews by {options['shift_days']:g} days")
+
+            spread = options['spread_days']
+            if spread:
+                overdue = states.filter(due_at__lt=now).annotate(bucket=Mod('id', spread))
+                moved = 0
+                for day in range(spread):
+                    moved += overdue.filter(bucket=day).update(due_at=now + timedelta(days=day))
+                self.stdout.write(f"Spread {moved} overdue reviews over {spread} days")
+
+        self.stdout.write(self.style.SUCCESS("Rescheduling complete"))
@@ -0,0 +1,222 @@
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import numpy as np
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from scipy.special import expit
+
+from base.fields import compress_json
+from base.models import Profile, QuizResult
+from ui.models import MCQ
+
+DIFFICULTIES = ('Easy', 'Medium', 'Hard')
+# Offsets on the logit scale: Easy quizzes are easier to pass than Hard ones
+DIFFICULTY_OFFSET = np.array([-1.2, 0.0, 1.0])
+LETTERS = ('A', 'B', 'C', 'D')
+# Derived tables rebuilt from the seeded rows (bulk_create skips save_results and signals)
+DERIVED_COMMANDS = (
+    'backfill_daily_rollups', 'rebuild_question_stats', 'rebuild_leaderboards', 'rebuild_score_sketches',
+    'rebuild_mistakes', 'rebuild_review_states', 'calibrate_irt', 'rebuild_catalog_stats',
+    'rebuild_topic_similarity', 'rebuild_question_search',
+)
+WORDS = (
+    'array', 'binary', 'cache', 'class', 'closure', 'compile', 'data', 'event', 'field', 'function', 'graph',
+    'hash', 'index', 'integer', 'kernel', 'lambda', 'list', 'loop', 'memory', 'method', 'module', 'network',
+    'object', 'pointer', 'process', 'query', 'queue', 'record', 'recursion', 'request', 'schema', 'server',
+    'sort', 'stack', 'string', 'syntax', 'table', 'thread', 'tree', 'tuple', 'type', 'value', 'variable',
+)
+
+
+class Command(BaseCommand):
+    help = ('Seed a deterministic synthetic dataset (users, MCQs, quiz results with question payloads) '
+            'for load testing; every row is tagged with --prefix so it can be flushed again')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--results', type=int, default=50000, help='Total quiz results across all users')
+        parser.add_argument('--topics', type=int, default=20)
+        parser.add_argument('--sub-topics', type=int, default=5, help='Sub-topics per topic')
+        parser.add_argument('--questions', type=int, default=20,
+                            help='MCQs per (topic, sub-topic, difficulty)')
+        parser.add_argument('--quiz-size', type=int, default=10, help='Questions per quiz result')
+        parser.add_argument('--days', type=int, default=365, help='Results are spread over this many past days')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--prefix', default='seed_', help='Prefix for seeded usernames and topics')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk_create')
+        parser.add_argument('--flush', action='store_true', help='Delete previously seeded rows with this prefix first')
+        parser.add_argument('--skip-derived', action='store_true',
+                            help='Do not rebuild rollups, leaderboards, sketches and indexes afterwards')
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if not prefix:
+            raise CommandError("--prefix must not be empty")
+        if options['flush']:
+            self.flush(prefix)
+        elif Profile.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(f"Seeded rows with prefix {prefix!r} already exist; pass --flush to replace them")
+
+        rng = np.random.default_rng(options['seed'])
+        self.batch_size = options['batch_size']
+        started = time.perf_counter()
+
+        user_ids = self.seed_users(prefix, options['users'])
+        groups = self.seed_mcqs(prefix, rng, options['topics'], options['sub_topics'], options['questions'])
+        self.stdout.write(f"Seeded {len(user_ids)} users and {sum(len(g) for g in groups.values())} MCQs "
+                          f"in {time.perf_counter() - started:.1f}s")
+
+        payloads = self.build_payloads(rng, groups, options['quiz_size'])
+        self.seed_results(rng, user_ids, payloads, options)
+
+        if not options['skip_derived']:
+            for name in DERIVED_COMMANDS:
+                step = time.perf_counter()
+                call_command(name, stdout=self.stdout)
+                self.stdout.write(f"  {name} took {time.perf_counter() - step:.1f}s")
+        self.stdout.write(self.style.SUCCESS(f"Done in {time.perf_counter() - started:.1f}s"))
+
+    def flush(self, prefix):
+        started = time.perf_counter()
+        results, _ = QuizResult.objects.filter(user__username__startswith=prefix).delete()
+        with transaction.atomic():
+            users, _ = Profile.objects.filter(username__startswith=prefix).delete()
+            mcqs, _ = MCQ.objects.filter(topic__startswith=prefix).delete()
+        self.stdout.write(f"Flushed {results} results, {users} user and {mcqs} question rows "
+                          f"(with dependent rows) in {time.perf_counter() - started:.1f}s")
+
+    def seed_users(self, prefix, count):
+        genders = ('Male', 'Female', 'Other')
+        for start in range(0, count, self.batch_size):
+            Profile.objects.bulk_create([
+                Profile(username=f"{prefix}user{i}", password='loadtest', contact=f"{i:010d}", gender=genders[i % 3])
+                for i in range(start, min(start + self.batch_size, count))
+            ])
+        # Re-read ids: MySQL doesn't return them from bulk_create
+        return np.array(
+            Profile.objects.filter(username__startswith=prefix).order_by('id').values_list('id', flat=True),
+            dtype=np.int64,
+        )
+
+    def seed_mcqs(self, prefix, rng, n_topics, n_sub_topics, per_group):
+        mcqs = []
+        for t in range(n_topics):
+            for s in range(n_sub_topics):
+                for difficulty in DIFFICULTIES:
+                    for q in range(per_group):
+                        words = rng.choice(len(WORDS), 12)
+                        options = [' '.join(WORDS[w] for w in rng.choice(len(WORDS), 3)) for _ in LETTERS]
+                        mcqs.append(MCQ(
+                            topic=f"{prefix}topic{t}", sub_topic=f"sub{s}", difficulty_level=difficulty,
+                            question=f"Q{q}: " + ' '.join(WORDS[w] for w in words) + '?',
+                            option_a=options[0], option_b=options[1], option_c=options[2], option_d=options[3],
+                            correct_answer=LETTERS[int(rng.integers(0, 4))],
+                        ))
+        for start in range(0, len(mcqs), self.batch_size):
+            MCQ.objects.bulk_create(mcqs[start:start + self.batch_size])
+
+        groups = {}
+        rows = MCQ.objects.filter(topic__startswith=prefix).order_by('id').values(
+            'id', 'topic', 'sub_topic', 'difficulty_level', 'question',
+            'option_a', 'option_b', 'option_c', 'option_d', 'correct_answer',
+        )
+        for row in rows:
+            groups.setdefault((row['topic'], row['sub_topic'], row['difficulty_level']), []).append(row)
+        return groups
+
+    def build_payloads(self, rng, groups, quiz_size, variants=8):
+        """
+        Compressed questions_data / user_answers blobs, built once and shared
+        across results: a few question sets per group, and for each set one
+        answer sheet per possible number of correct answers.
+        """
+        payloads = []
+        for (topic, sub_topic, difficulty), questions in sorted(groups.items()):
+            n = min(quiz_size, len(questions))
+            for _ in range(variants):
+                chosen = [questions[i] for i in rng.choice(len(questions), n, replace=False)]
+                stored = [{
+                    'id': q['id'], 'question': q['question'], 'option_a': q['option_a'], 'option_b': q['option_b'],
+                    'option_c': q['option_c'], 'option_d': q['option_d'], 'correct_answer': q['correct_answer'],
+                } for q in chosen]
+                sheets = []
+                for correct in range(n + 1):
+                    right = set(rng.choice(n, correct, replace=False).tolist())
+                    answers = []
+                    for i, q in enumerate(chosen):
+                        if i in right:
+                            answers.append(q['correct_answer'])
+                        elif rng.random() < 0.1:
+                            answers.append('')  # left blank
+                        else:
+                            wrong = [c for c in LETTERS if c != q['correct_answer']]
+                            answers.append(wrong[int(rng.integers(0, 3))])
+                    sheets.append(compress_json(answers))
+                payloads.append((topic, sub_topic, DIFFICULTIES.index(difficulty), n, compress_json(stored), sheets))
+        return payloads
+
+    def seed_results(self, rng, user_ids, payloads, options):
+        n_users, total = len(user_ids), options['results']
+        # Heavy-tailed activity: a few users take most of the quizzes
+        activity = rng.lognormal(0.0, 1.0, n_users)
+        counts = rng.multinomial(total, activity / activity.sum())
+        ability = rng.normal(0.0, 1.0, n_users)
+        by_topic = {}
+        for index, (topic, _, difficulty, *_) in enumerate(payloads):
+            by_topic.setdefault(topic, [[], [], []])[difficulty].append(index)
+        topics = sorted(by_topic)
+        topic_offset = rng.normal(0.0, 0.5, len(topics))
+        sizes = np.array([payload[3] for payload in payloads])
+        favourites = rng.integers(0, len(topics), (n_users, 3))
+        now = timezone.now()
+        window = options['days'] * 86400.0
+
+        started = time.perf_counter()
+        written = 0
+        user_chunk = max(1, self.batch_size // max(1, int(counts.mean() or 1)))
+        for first in range(0, n_users, user_chunk):
+            chunk = np.arange(first, min(first + user_chunk, n_users))
+            chunk_counts = counts[chunk]
+            n = int(chunk_counts.sum())
+            if not n:
+                continue
+            user = np.repeat(chunk, chunk_counts)
+            # Position of each attempt in its user's history, 0 (first) .. 1 (latest)
+            offsets = np.repeat(np.cumsum(chunk_counts) - chunk_counts, chunk_counts)
+            rank = np.arange(n) - offsets
+            progress = rank / np.maximum(np.repeat(chunk_counts, chunk_counts) - 1, 1)
+            # Each user's timestamps ascend with their attempts
+            ages = 1.0 - (np.sort(rng.random(n) + user * 2.0) - user * 2.0)
+            taken = now.timestamp() - ages * window
+
+            topic = favourites[user, rng.integers(0, 3, n)]
+            difficulty = np.clip((progress * 3 + rng.normal(0, 0.4, n)).astype(np.int64), 0, 2)
+            choice = rng.random(n)
+            p_correct = expit(ability[user] - DIFFICULTY_OFFSET[difficulty] + 0.8 * progress - topic_offset[topic])
+            seconds = rng.lognormal(np.log(30.0), 0.4, n)
+
+            picked = np.empty(n, dtype=np.int64)
+            for i in range(n):
+                options_for = by_topic[topics[topic[i]]][difficulty[i]]
+                picked[i] = options_for[int(choice[i] * len(options_for))]
+            correct_answers = rng.binomial(sizes[picked], p_correct)
+
+            results = []
+            for i in range(n):
+                topic_name, sub_topic, d, size, questions_blob, sheets = payloads[picked[i]]
+                correct = int(correct_answers[i])
+                results.append(QuizResult(
+                    user_id=int(user_ids[user[i]]), topic=topic_name, sub_topic=sub_topic,
+                    difficulty_level=DIFFICULTIES[d], total_questions=size, correct_answers=correct,
+                    score_percentage=round(correct / size * 100, 2),
+                    time_taken=timedelta(seconds=float(seconds[i] * size)),
+                    date_taken=datetime.fromtimestamp(taken[i], tz=dt_timezone.utc),
+                    questions_data=questions_blob, user_answers=sheets[correct],
+                ))
+            for start in range(0, len(results), self.batch_size):
+                QuizResult.objects.bulk_create(results[start:start + self.batch_size])
+            written += n
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"  {written}/{total} results ({written / elapsed:.0f} results/sec)")
@@ -0,0 +1,65 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from base import suggestion_trace
+from base.ai import SuggestionEngine
+from base.models import Profile, QuizResult
+from base.summary import get_user_summary
+
+
+class Command(BaseCommand):
+    help = ('Run the suggestion engine for a sample of users with tracing on, then dump the trace '
+            'buffer and latency histograms (the buffer is per process; the running server\'s own '
+            'buffer is at /admin-suggestion-traces/)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100, help='Users with quiz history to sample')
+        parser.add_argument('--user', type=int, action='append', default=[], help='Trace this user id (repeatable)')
+        parser.add_argument('--method', default='all',
+                            choices=['get_multiple_suggestions', 'recommend', 'batch_suggestions', 'both', 'all'],
+                            help="'both' is the two per-user calls; 'all' adds one batch call over every user")
+        parser.add_argument('--no-summary', action='store_true',
+                            help='Let get_multiple_suggestions query history itself instead of using a summary')
+        parser.add_argument('--traces', type=int, default=10,
+                            help='Also print the N most recent traces (0 for histograms only)')
+        parser.add_argument('--json', action='store_true', help='Print the full dump as JSON')
+
+    def handle(self, *args, **options):
+        user_ids = options['user'] or list(
+            QuizResult.objects.order_by().values_list('user_id', flat=True).distinct()[:options['users']]
+        )
+        users = list(Profile.objects.filter(id__in=user_ids))
+        if not users:
+            raise CommandError("No users to trace")
+
+        suggestion_trace.reset(max(len(users) * 2 + 1, suggestion_trace.get_config()['CAPACITY']))
+        engine = SuggestionEngine()
+        method = options['method']
+        for user in users:
+            if method in ('get_multiple_suggestions', 'both', 'all'):
+                summary = None if options['no_summary'] else get_user_summary(user.id)
+                engine.get_multiple_suggestions(user, max_suggestions=3, summary=summary)
+            if method in ('recommend', 'both', 'all'):
+                engine.recommend(user)
+        if method in ('batch_suggestions', 'all'):
+            engine.batch_suggestions([user.id for user in users], max_suggestions=3)
+
+        dump = suggestion_trace.dump(limit=options['traces'])
+        if not options['traces']:
+            del dump['traces']
+        if options['json']:
+            self.stdout.write(json.dumps(dump, indent=2))
+            return
+
+        for method, report in dump['histograms'].items():
+            self.stdout.write(self.style.SUCCESS(f"{method}: {report['errors']} errors"))
+            for name, hist in [('total', report['total'])] + list(report['phases'].items()):
+                self.stdout.write(
+                    f"  {name:<12} n={hist['count']:<5} p50 {hist['p50_ms']:.2f}ms  p95 {hist['p95_ms']:.2f}ms  "
+                    f"p99 {hist['p99_ms']:.2f}ms  max {hist['max_ms']:.2f}ms"
+                )
+                buckets = '  '.join(f"{label}:{n}" for label, n in hist['buckets'].items() if n)
+                self.stdout.write(f"  {'':<12} {buckets}")
+        for trace in dump.get('traces', []):
+            self.stdout.write(json.dumps(trace))
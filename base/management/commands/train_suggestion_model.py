@@ -0,0 +1,80 @@
+import pickle
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from base.ai import MLSuggestionEngine
+from base.export import export_queryset, parse_bound
+from base.history_features import iter_history, iter_transitions
+from base.replay import RuleBaseline
+from base.training import accuracy, build_training_set, train_model
+
+
+class Command(BaseCommand):
+    help = 'Train the suggestion model on real quiz history instead of synthetic rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='Only use results taken on/after this ISO date or datetime')
+        parser.add_argument('--until', help='Only use results taken before this ISO date or datetime')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Results read per query')
+        parser.add_argument('--capacity', type=int, default=500_000,
+                            help='Maximum labelled rows kept in memory (uniformly sampled beyond this)')
+        parser.add_argument('--validation', type=float, default=0.2,
+                            help='Fraction of users held out for validation')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--save', action='store_true',
+                            help='Replace the deployed model if the new one validates better')
+        parser.add_argument('--force', action='store_true', help='With --save, replace it regardless')
+
+    def handle(self, *args, **options):
+        if not 0 < options['validation'] < 1:
+            raise CommandError('--validation must be between 0 and 1')
+        try:
+            queryset = export_queryset(since=parse_bound(options['since']), until=parse_bound(options['until']))
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        started = time.perf_counter()
+        dataset = build_training_set(
+            iter_transitions(iter_history(queryset, options['chunk_size'])),
+            capacity=options['capacity'], validation_fraction=options['validation'], seed=options['seed'],
+        )
+        built = time.perf_counter()
+        self.stdout.write(
+            f"Labelled {dataset.train.seen + dataset.validation.seen} decisions in {built - started:.2f}s; "
+            f"training on {dataset.train.size}, validating on {dataset.validation.size}"
+        )
+        if not dataset.train.size:
+            self.stdout.write(self.style.WARNING("Not enough history to train on"))
+            return
+        self.stdout.write(f"  label mix: {dataset.label_counts()}")
+
+        engine = MLSuggestionEngine()
+        try:
+            trained = train_model(engine.model, dataset)
+        except ValueError as e:
+            raise CommandError(str(e))
+        current = accuracy(engine.model, dataset.validation)
+        rules = accuracy(RuleBaseline(), dataset.validation)
+
+        def fmt(value):
+            return f"{value:.1%}" if value is not None else "n/a"
+
+        self.stdout.write(f"Trained in {time.perf_counter() - built:.2f}s")
+        self.stdout.write(f"  new model:     train {fmt(trained['train_accuracy'])}, "
+                          f"validation {fmt(trained['validation_accuracy'])}")
+        self.stdout.write(f"  current model: validation {fmt(current)}")
+        self.stdout.write(f"  rules:         validation {fmt(rules)}")
+
+        if not options['save']:
+            self.stdout.write("Dry run; pass --save to deploy the new model")
+            return
+        improved = (trained['validation_accuracy'] or 0) > (current or 0)
+        if not improved and not options['force']:
+            self.stdout.write(self.style.WARNING("New model does not beat the current one; not saved (use --force)"))
+            return
+        try:
+            engine.replace_model(trained['model'])
+        except (OSError, pickle.PicklingError) as e:
+            raise CommandError(f"Could not save the model to {engine.model_path}: {e}")
+        self.stdout.write(self.style.SUCCESS(f"Saved new model to {engine.model_path}"))
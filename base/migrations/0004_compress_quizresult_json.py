@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:32
+
+import base.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0003_quizresult_questions_data_quizresult_user_answers'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='quizresult',
+            name='questions_data',
+            field=base.fields.CompressedJSONField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='quizresult',
+            name='user_answers',
+            field=base.fields.CompressedJSONField(blank=True, null=True),
+        ),
+    ]
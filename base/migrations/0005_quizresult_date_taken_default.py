@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:36
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0004_compress_quizresult_json'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='quizresult',
+            name='date_taken',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0005_quizresult_date_taken_default'),
+        ('ui', '0003_delete_questionbank'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionStats',
+            fields=[
+                ('mcq', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='ui.mcq')),
+                ('topic', models.CharField(max_length=100)),
+                ('difficulty_level', models.CharField(max_length=50)),
+                ('times_served', models.IntegerField(default=0)),
+                ('times_correct', models.IntegerField(default=0)),
+                ('picks_a', models.IntegerField(default=0)),
+                ('picks_b', models.IntegerField(default=0)),
+                ('picks_c', models.IntegerField(default=0)),
+                ('picks_d', models.IntegerField(default=0)),
+                ('picks_blank', models.IntegerField(default=0)),
+                ('sum_score', models.FloatField(default=0.0)),
+                ('sum_score_sq', models.FloatField(default=0.0)),
+                ('sum_score_correct', models.FloatField(default=0.0)),
+                ('p_correct', models.FloatField(default=0.0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'question_stats',
+                'indexes': [models.Index(fields=['topic', 'p_correct'], name='question_stats_topic_p')],
+            },
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_daily_rollups(apps, schema_editor):
+    # Results saved before this table existed would otherwise read as no
+    # history. Same grouping as the backfill_daily_rollups command.
+    QuizResult = apps.get_model('base', 'QuizResult')
+    DailyTopicRollup = apps.get_model('base', 'DailyTopicRollup')
+    results = (
+        QuizResult.objects.order_by()
+        .values_list('user_id', 'date_taken', 'topic', 'sub_topic', 'difficulty_level',
+                     'score_percentage', 'time_taken')
+    )
+    merged = {}
+    for user_id, date_taken, topic, sub_topic, difficulty, score, time_taken in results.iterator(chunk_size=2000):
+        key = (user_id, timezone.localdate(date_taken), topic, sub_topic or '', difficulty)
+        rollup = merged.get(key)
+        if rollup is None:
+            rollup = merged[key] = DailyTopicRollup(
+                user_id=key[0], day=key[1], topic=key[2], sub_topic=key[3], difficulty_level=key[4],
+                quiz_count=0, score_sum=0.0, best_score=0.0, time_seconds=0.0,
+            )
+        score = float(score or 0.0)
+        rollup.quiz_count += 1
+        rollup.score_sum += score
+        rollup.best_score = max(rollup.best_score, score)
+        rollup.time_seconds += time_taken.total_seconds() if time_taken else 0.0
+        if rollup.last_taken is None or date_taken > rollup.last_taken:
+            rollup.last_taken = date_taken
+
+    DailyTopicRollup.objects.bulk_create(list(merged.values()), batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0006_questionstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyTopicRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('topic', models.CharField(max_length=100)),
+                ('sub_topic', models.CharField(blank=True, default='', max_length=100)),
+                ('difficulty_level', models.CharField(max_length=50)),
+                ('quiz_count', models.IntegerField(default=0)),
+                ('score_sum', models.FloatField(default=0.0)),
+                ('best_score', models.FloatField(default=0.0)),
+                ('time_seconds', models.FloatField(default=0.0)),
+                ('last_taken', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='base.profile')),
+            ],
+            options={
+                'db_table': 'daily_topic_rollups',
+                'constraints': [models.UniqueConstraint(fields=('user', 'day', 'topic', 'sub_topic', 'difficulty_level'), name='daily_topic_rollup_unique')],
+            },
+        ),
+        migrations.RunPython(backfill_daily_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0007_dailytopicrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_users', models.IntegerField(default=0)),
+                ('total_uploads', models.IntegerField(default=0)),
+                ('uploads_with_pdfs', models.IntegerField(default=0)),
+                ('easy_uploads', models.IntegerField(default=0)),
+                ('medium_uploads', models.IntegerField(default=0)),
+                ('hard_uploads', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'catalog_stats',
+            },
+        ),
+        migrations.CreateModel(
+            name='CatalogTopicCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topic', models.CharField(max_length=100)),
+                ('difficulty_level', models.CharField(max_length=20)),
+                ('question_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'catalog_topic_counts',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='topicupload',
+            index=models.Index(fields=['topic_name'], name='topicupload_topic_name'),
+        ),
+        migrations.AddConstraint(
+            model_name='catalogtopiccount',
+            constraint=models.UniqueConstraint(fields=('topic', 'difficulty_level'), name='catalog_topic_count_unique'),
+        ),
+    ]
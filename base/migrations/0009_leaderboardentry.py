@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0008_catalog_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topic', models.CharField(max_length=100)),
+                ('difficulty_level', models.CharField(max_length=50)),
+                ('best_score', models.FloatField(default=0.0)),
+                ('best_time_seconds', models.FloatField(default=0.0)),
+                ('attempts', models.IntegerField(default=0)),
+                ('achieved_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='base.profile')),
+            ],
+            options={
+                'db_table': 'leaderboard_entries',
+                'indexes': [models.Index(fields=['topic', 'difficulty_level', '-best_score', 'best_time_seconds', 'achieved_at', 'user'], name='leaderboard_rank')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'topic', 'difficulty_level'), name='leaderboard_entry_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0009_leaderboardentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topic', models.CharField(max_length=100)),
+                ('difficulty_level', models.CharField(max_length=50)),
+                ('shard', models.SmallIntegerField(default=0)),
+                ('result_count', models.IntegerField(default=0)),
+                ('score_sketch', models.JSONField(default=dict)),
+                ('time_sketch', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'score_sketches',
+                'constraints': [models.UniqueConstraint(fields=('topic', 'difficulty_level', 'shard'), name='score_sketch_shard_unique')],
+            },
+        ),
+    ]
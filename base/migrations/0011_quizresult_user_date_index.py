@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0010_scoresketch'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='quizresult',
+            index=models.Index(fields=['user', 'date_taken', 'id'], name='quiz_result_user_date'),
+        ),
+    ]
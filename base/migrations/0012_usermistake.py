@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0011_quizresult_user_date_index'),
+        ('ui', '0003_delete_questionbank'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserMistake',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('times_missed', models.IntegerField(default=0)),
+                ('last_missed', models.DateTimeField(blank=True, null=True)),
+                ('last_correct', models.DateTimeField(blank=True, null=True)),
+                ('outstanding', models.BooleanField(default=True)),
+                ('mcq', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='ui.mcq')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='base.profile')),
+            ],
+            options={
+                'db_table': 'user_mistakes',
+                'indexes': [models.Index(fields=['user', 'outstanding', '-times_missed', '-last_missed'], name='user_mistake_review')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'mcq'), name='user_mistake_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:50
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0012_usermistake'),
+        ('ui', '0003_delete_questionbank'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ease_factor', models.FloatField(default=2.5)),
+                ('interval_days', models.FloatField(default=0.0)),
+                ('repetitions', models.IntegerField(default=0)),
+                ('last_reviewed', models.DateTimeField(blank=True, null=True)),
+                ('due_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('mcq', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='ui.mcq')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='base.profile')),
+            ],
+            options={
+                'db_table': 'review_states',
+                'indexes': [models.Index(fields=['user', 'due_at'], name='review_state_due')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'mcq'), name='review_state_unique')],
+            },
+        ),
+    ]
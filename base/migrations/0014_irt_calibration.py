@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0013_reviewstate'),
+        ('ui', '0003_delete_questionbank'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemCalibration',
+            fields=[
+                ('mcq', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='calibration', serialize=False, to='ui.mcq')),
+                ('model', models.CharField(choices=[('1PL', '1PL'), ('2PL', '2PL')], max_length=3)),
+                ('difficulty', models.FloatField()),
+                ('discrimination', models.FloatField(default=1.0)),
+                ('responses', models.IntegerField(default=0)),
+                ('calibrated_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'item_calibrations',
+            },
+        ),
+        migrations.CreateModel(
+            name='UserAbility',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ability', serialize=False, to='base.profile')),
+                ('ability', models.FloatField()),
+                ('responses', models.IntegerField(default=0)),
+                ('calibrated_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'user_abilities',
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+from django.db import migrations
+
+
+# Frozen copy of base.question_search's FTS5 setup as of this migration, so
+# later changes to that module can't change what this migration does
+COLUMNS = ('question', 'option_a', 'option_b', 'option_c', 'option_d')
+
+
+def fts_statements(table):
+    columns = ', '.join(COLUMNS)
+    new_values = ', '.join(f'new.{c}' for c in COLUMNS)
+    old_values = ', '.join(f'old.{c}' for c in COLUMNS)
+    delete_old = f"INSERT INTO mcq_search(mcq_search, rowid, {columns}) VALUES ('delete', old.id, {old_values});"
+    insert_new = f'INSERT INTO mcq_search(rowid, {columns}) VALUES (new.id, {new_values});'
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS mcq_search USING fts5({columns}, content='{table}', content_rowid='id')",
+        'DROP TRIGGER IF EXISTS mcq_search_insert',
+        'DROP TRIGGER IF EXISTS mcq_search_delete',
+        'DROP TRIGGER IF EXISTS mcq_search_update',
+        f'CREATE TRIGGER mcq_search_insert AFTER INSERT ON {table} BEGIN {insert_new} END',
+        f'CREATE TRIGGER mcq_search_delete AFTER DELETE ON {table} BEGIN {delete_old} END',
+        f'CREATE TRIGGER mcq_search_update AFTER UPDATE ON {table} BEGIN {delete_old} {insert_new} END',
+        "INSERT INTO mcq_search(mcq_search) VALUES ('rebuild')",
+    ]
+
+
+def create_fts_index(apps, schema_editor):
+    # Other databases use the on-disk token index in base.question_search
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for statement in fts_statements(apps.get_model('ui', 'MCQ')._meta.db_table):
+            cursor.execute(statement)
+
+
+def drop_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for trigger in ('insert', 'delete', 'update'):
+            cursor.execute(f'DROP TRIGGER IF EXISTS mcq_search_{trigger}')
+        cursor.execute('DROP TABLE IF EXISTS mcq_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0015_quizresult_date_index'),
+        ('ui', '0003_delete_questionbank'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_index, drop_fts_index),
+    ]
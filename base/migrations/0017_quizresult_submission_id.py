@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0016_question_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizresult',
+            name='submission_id',
+            field=models.UUIDField(blank=True, editable=False, null=True, unique=True),
+        ),
+    ]
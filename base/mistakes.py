@@ -0,0 +1,80 @@
+from __future__ import annotations
+from typing import Any, Dict, Iterable, List, Tuple
+from django.db import transaction
+from django.db.models import Q
+from .models import QuizResult, UserMistake
+from .review_modes import MIXED_DIFFICULTY as REVIEW_DIFFICULTY, REVIEW_TOPIC
+
+MistakeKey = Tuple[int, int]
+
+
+def collect_outcomes(results: Iterable[QuizResult]) -> Dict[MistakeKey, Dict[str, Any]]:
+    """Per (user, mcq): misses in the batch and when the question was last missed/answered right"""
+    outcomes: Dict[MistakeKey, Dict[str, Any]] = {}
+    for result in results:
+        answers = result.user_answers or []
+        for i, q in enumerate(result.questions_data or []):
+            if not isinstance(q, dict) or q.get("id") is None or not q.get("correct_answer"):
+                continue
+            if isinstance(answers, dict):
+                answer = answers.get(str(i)) or ""
+            else:
+                answer = answers[i] if i < len(answers) else ""
+            outcome = outcomes.setdefault(
+                (result.user_id, int(q["id"])), {"missed": 0, "last_missed": None, "last_correct": None}
+            )
+            # Unanswered questions count as missed
+            if (answer or "").upper() == q["correct_answer"]:
+                if outcome["last_correct"] is None or result.date_taken > outcome["last_correct"]:
+                    outcome["last_correct"] = result.date_taken
+            else:
+                outcome["missed"] += 1
+                if outcome["last_missed"] is None or result.date_taken > outcome["last_missed"]:
+                    outcome["last_missed"] = result.date_taken
+    return outcomes
+
+
+def record_mistakes(results: Iterable[QuizResult]):
+    """Fold a batch of results into the mistake index (insert missing, lock, bulk update)"""
+    outcomes = collect_outcomes(results)
+    if not outcomes:
+        return
+    from ui.models import MCQ
+
+    with transaction.atomic():
+        known = set(MCQ.objects.filter(id__in={k[1] for k in outcomes}).values_list("id", flat=True))
+        outcomes = {k: o for k, o in outcomes.items() if k[1] in known}
+        missed = [k for k, o in outcomes.items() if o["missed"]]
+        if missed:
+            UserMistake.objects.bulk_create(
+                [UserMistake(user_id=user_id, mcq_id=mcq_id, times_missed=0) for user_id, mcq_id in missed],
+                ignore_conflicts=True,
+            )
+        by_user: Dict[int, set] = {}
+        for user_id, mcq_id in outcomes:
+            by_user.setdefault(user_id, set()).add(mcq_id)
+        match = Q()
+        for user_id, mcq_ids in by_user.items():
+            match |= Q(user_id=user_id, mcq_id__in=mcq_ids)
+        rows = list(UserMistake.objects.select_for_update().filter(match))
+        for row in rows:
+            outcome = outcomes[(row.user_id, row.mcq_id)]
+            row.times_missed += outcome["missed"]
+            if outcome["last_missed"] and (row.last_missed is None or outcome["last_missed"] > row.last_missed):
+                row.last_missed = outcome["last_missed"]
+            if outcome["last_correct"] and (row.last_correct is None or outcome["last_correct"] > row.last_correct):
+                row.last_correct = outcome["last_correct"]
+            row.outstanding = row.last_correct is None or (
+                row.last_missed is not None and row.last_missed >= row.last_correct
+            )
+        UserMistake.objects.bulk_update(rows, ["times_missed", "last_missed", "last_correct", "outstanding"])
+
+
+def review_questions(user_id: int, limit: int = 10) -> List[Any]:
+    """The user's most-missed outstanding questions across all topics, in one indexed query"""
+    rows = (
+        UserMistake.objects.filter(user_id=user_id, outstanding=True)
+        .select_related("mcq")
+        .order_by("-times_missed", "-last_missed")[:limit]
+    )
+    return [row.mcq for row in rows]
@@ -1,4 +1,9 @@
 from django.db import models
+from django.utils import timezone
+
+from ui.models import MCQ
+
+from .fields import CompressedJSONField
 
 # base/models.py
 class Profile(models.Model):
@@ -27,6 +32,11 @@ class TopicUpload(models.Model):
     )
     pdf = models.FileField(upload_to="pdfs/", blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['topic_name'], name='topicupload_topic_name'),
+        ]
+
     def __str__(self):
         return f"{self.topic_name} ({self.difficulty_level})"
 
@@ -39,13 +49,255 @@ class QuizResult(models.Model):
     correct_answers = models.IntegerField()
     score_percentage = models.FloatField()
     time_taken = models.DurationField(blank=True, null=True)
-    date_taken = models.DateTimeField(auto_now_add=True)
-    questions_data = models.TextField(blank=True, null=True)  # Store quiz questions as JSON
-    user_answers = models.TextField(blank=True, null=True)    # Store user answers as JSON
+    date_taken = models.DateTimeField(default=timezone.now)  # set explicitly for buffered/offline submissions
+    questions_data = CompressedJSONField(blank=True, null=True)  # Quiz questions, zlib-compressed JSON
+    user_answers = CompressedJSONField(blank=True, null=True)    # User answers, zlib-compressed JSON
+    # Assigned once per submission; identifies the row across bulk inserts and re-saves
+    submission_id = models.UUIDField(unique=True, null=True, blank=True, editable=False)
 
     class Meta:
         db_table = 'quiz_results'
         ordering = ['-date_taken']
+        indexes = [
+            # Keyset pagination of a user's history on (date_taken, id)
+            models.Index(fields=['user', 'date_taken', 'id'], name='quiz_result_user_date'),
+            # Time-ordered replays over all users' history
+            models.Index(fields=['date_taken', 'id'], name='quiz_result_date'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.topic} ({self.score_percentage}%)"
+
+
+class QuestionStats(models.Model):
+    """Running item-analysis counters for one MCQ, updated on each submission"""
+    mcq = models.OneToOneField(MCQ, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    topic = models.CharField(max_length=100)
+    difficulty_level = models.CharField(max_length=50)
+    times_served = models.IntegerField(default=0)
+    times_correct = models.IntegerField(default=0)
+    picks_a = models.IntegerField(default=0)
+    picks_b = models.IntegerField(default=0)
+    picks_c = models.IntegerField(default=0)
+    picks_d = models.IntegerField(default=0)
+    picks_blank = models.IntegerField(default=0)
+    # Point-biserial inputs: quiz scores of everyone served / of correct responders
+    sum_score = models.FloatField(default=0.0)
+    sum_score_sq = models.FloatField(default=0.0)
+    sum_score_correct = models.FloatField(default=0.0)
+    p_correct = models.FloatField(default=0.0)  # times_correct / times_served, kept for indexing
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'question_stats'
+        indexes = [
+            models.Index(fields=['topic', 'p_correct'], name='question_stats_topic_p'),
+        ]
+
+    def __str__(self):
+        return f"MCQ {self.mcq_id}: {self.times_correct}/{self.times_served}"
+
+
+class DailyTopicRollup(models.Model):
+    """Per-user daily aggregate of quiz results for one (topic, sub_topic, difficulty)"""
+    user = models.ForeignKey(Profile, on_delete=models.CASCADE)
+    day = models.DateField()
+    topic = models.CharField(max_length=100)
+    sub_topic = models.CharField(max_length=100, blank=True, default='')
+    difficulty_level = models.CharField(max_length=50)
+    quiz_count = models.IntegerField(default=0)
+    score_sum = models.FloatField(default=0.0)
+    best_score = models.FloatField(default=0.0)
+    time_seconds = models.FloatField(default=0.0)
+    last_taken = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'daily_topic_rollups'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'day', 'topic', 'sub_topic', 'difficulty_level'],
+                name='daily_topic_rollup_unique',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.day} {self.topic} ({self.quiz_count})"
+
+
+class CatalogStats(models.Model):
+    """Single-row snapshot of user/upload counters shown on the admin dashboard"""
+    total_users = models.IntegerField(default=0)
+    total_uploads = models.IntegerField(default=0)
+    uploads_with_pdfs = models.IntegerField(default=0)
+    easy_uploads = models.IntegerField(default=0)
+    medium_uploads = models.IntegerField(default=0)
+    hard_uploads = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'catalog_stats'
+
+    def __str__(self):
+        return f"Catalog stats ({self.total_users} users, {self.total_uploads} uploads)"
+
+
+class CatalogTopicCount(models.Model):
+    """Number of MCQs per (topic, difficulty), maintained on MCQ writes"""
+    topic = models.CharField(max_length=100)
+    difficulty_level = models.CharField(max_length=20)
+    question_count = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'catalog_topic_counts'
+        constraints = [
+            models.UniqueConstraint(fields=['topic', 'difficulty_level'], name='catalog_topic_count_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} ({self.difficulty_level}): {self.question_count}"
+
+
+class LeaderboardEntry(models.Model):
+    """A user's best attempt for one (topic, difficulty), maintained on submission"""
+    user = models.ForeignKey(Profile, on_delete=models.CASCADE)
+    topic = models.CharField(max_length=100)
+    difficulty_level = models.CharField(max_length=50)
+    best_score = models.FloatField(default=0.0)
+    best_time_seconds = models.FloatField(default=0.0)  # time of the best attempt, breaks ties
+    attempts = models.IntegerField(default=0)
+    achieved_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'leaderboard_entries'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'topic', 'difficulty_level'], name='leaderboard_entry_unique'),
+        ]
+        indexes = [
+            # Serves both top-K (index order, the full BOARD_ORDER) and "my rank" (range count)
+            models.Index(
+                fields=['topic', 'difficulty_level', '-best_score', 'best_time_seconds', 'achieved_at', 'user'],
+                name='leaderboard_rank',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.topic}/{self.difficulty_level}: {self.best_score}"
+
+
+class ScoreSketch(models.Model):
+    """
+    Mergeable quantile sketches of score and completion time for one shard of
+    a (topic, difficulty); readers merge every shard of a key.
+    """
+    topic = models.CharField(max_length=100)
+    difficulty_level = models.CharField(max_length=50)
+    shard = models.SmallIntegerField(default=0)
+    result_count = models.IntegerField(default=0)
+    score_sketch = models.JSONField(default=dict)
+    time_sketch = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'score_sketches'
+        constraints = [
+            models.UniqueConstraint(fields=['topic', 'difficulty_level', 'shard'], name='score_sketch_shard_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} ({self.difficulty_level}) shard {self.shard}: {self.result_count} results"
+
+
+class UserMistake(models.Model):
+    """A question a user has answered wrongly, kept up to date on each submission"""
+    user = models.ForeignKey(Profile, on_delete=models.CASCADE)
+    mcq = models.ForeignKey(MCQ, on_delete=models.CASCADE)
+    times_missed = models.IntegerField(default=0)
+    last_missed = models.DateTimeField(null=True, blank=True)
+    last_correct = models.DateTimeField(null=True, blank=True)
+    # True while the latest answer to this question was wrong; cleared by a correct answer
+    outstanding = models.BooleanField(default=True)
+
+    class Meta:
+        db_table = 'user_mistakes'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'mcq'], name='user_mistake_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'outstanding', '-times_missed', '-last_missed'],
+                         name='user_mistake_review'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} missed MCQ {self.mcq_id} x{self.times_missed}"
+
+
+class ReviewState(models.Model):
+    """SM-2 spaced-repetition state for one (user, question)"""
+    user = models.ForeignKey(Profile, on_delete=models.CASCADE)
+    mcq = models.ForeignKey(MCQ, on_delete=models.CASCADE)
+    ease_factor = models.FloatField(default=2.5)
+    interval_days = models.FloatField(default=0.0)
+    repetitions = models.IntegerField(default=0)  # consecutive correct reviews
+    last_reviewed = models.DateTimeField(null=True, blank=True)
+    due_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'review_states'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'mcq'], name='review_state_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'due_at'], name='review_state_due'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} MCQ {self.mcq_id} due {self.due_at:%Y-%m-%d}"
+
+
+class ItemCalibration(models.Model):
+    """IRT parameters of one MCQ from the latest calibration run"""
+    mcq = models.OneToOneField(MCQ, on_delete=models.CASCADE, primary_key=True, related_name='calibration')
+    model = models.CharField(max_length=3, choices=[('1PL', '1PL'), ('2PL', '2PL')])
+    difficulty = models.FloatField()  # b, on the ability scale
+    discrimination = models.FloatField(default=1.0)  # a; always 1 for 1PL
+    responses = models.IntegerField(default=0)
+    calibrated_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'item_calibrations'
+
+    def __str__(self):
+        return f"MCQ {self.mcq_id}: b={self.difficulty:.2f} a={self.discrimination:.2f}"
+
+
+class UserAbility(models.Model):
+    """IRT ability estimate of one user from the latest calibration run"""
+    user = models.OneToOneField(Profile, on_delete=models.CASCADE, primary_key=True, related_name='ability')
+    ability = models.FloatField()  # theta
+    responses = models.IntegerField(default=0)
+    calibrated_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'user_abilities'
+
+    def __str__(self):
+        return f"{self.user_id}: theta={self.ability:.2f}"
+
+
+class IndexChange(models.Model):
+    """
+    A question-bank change not yet folded into an on-disk index. Every
+    process appends here and applies rows past the id its index has seen.
+    """
+    index = models.CharField(max_length=50)
+    key = models.CharField(max_length=255)  # a topic or an MCQ id, depending on the index
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'index_changes'
+        indexes = [
+            models.Index(fields=['index', 'id'], name='index_change_index_id'),
+        ]
+
+    def __str__(self):
+        return f"{self.index}: {self.key}"
@@ -0,0 +1,441 @@
+from __future__ import annotations
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import math
+import os
+import pickle
+import re
+import threading
+import numpy as np
+from django.conf import settings
+from django.db import connection
+from ui.models import MCQ
+from . import index_changes
+
+MAX_LIMIT = 100
+CHANGE_LOG = "question_search"  # IndexChange.index for edited/deleted MCQ ids
+FTS_TABLE = "mcq_search"
+# BM25 parameters (the same defaults SQLite's bm25() uses)
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Edited/deleted questions leave dead slots behind; rebuild past this share
+COMPACT_DEAD_FRACTION = 0.25
+DIFFICULTY_CODES = {"Easy": 0, "Medium": 1, "Hard": 2}
+
+# Letters and digits, like FTS5's default unicode61 tokenizer
+_TOKEN_RE = re.compile(r"[^\W_]+")
+_TEXT_FIELDS = ("question", "option_a", "option_b", "option_c", "option_d")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def index_path() -> str:
+    index_dir = getattr(settings, 'QUIZ_INDEX_DIR', os.path.join(settings.BASE_DIR, 'indexes'))
+    return os.path.join(str(index_dir), 'question_search.pkl')
+
+
+# --- SQLite: FTS5 external-content table kept in sync by triggers ---------
+
+def _fts_statements(table: str) -> List[str]:
+    columns = ", ".join(_TEXT_FIELDS)
+    new_values = ", ".join(f"new.{f}" for f in _TEXT_FIELDS)
+    old_values = ", ".join(f"old.{f}" for f in _TEXT_FIELDS)
+    delete_old = (f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) "
+                  f"VALUES ('delete', old.id, {old_values});")
+    insert_new = f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        f"{columns}, content='{table}', content_rowid='id')",
+        f"DROP TRIGGER IF EXISTS {FTS_TABLE}_insert",
+        f"DROP TRIGGER IF EXISTS {FTS_TABLE}_delete",
+        f"DROP TRIGGER IF EXISTS {FTS_TABLE}_update",
+        f"CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON {table} BEGIN {insert_new} END",
+        f"CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON {table} BEGIN {delete_old} END",
+        f"CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE ON {table} BEGIN {delete_old} {insert_new} END",
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+    ]
+
+
+def install_sqlite_fts(conn=None, table: Optional[str] = None):
+    """
+    Create (or repair) the FTS5 index and its triggers, then re-index every
+    question. SQLite-only; a table rebuild by a later migration drops the
+    triggers, so rerun this via ``rebuild_question_search`` after one.
+    """
+    conn = conn or connection
+    with conn.cursor() as cursor:
+        for statement in _fts_statements(table or MCQ._meta.db_table):
+            cursor.execute(statement)
+    _fts_state.clear()
+
+
+_fts_state: Dict[str, bool] = {}
+
+
+def uses_sqlite_fts() -> bool:
+    if connection.vendor != "sqlite":
+        return False
+    if connection.alias not in _fts_state:
+        _fts_state[connection.alias] = FTS_TABLE in connection.introspection.table_names()
+    return _fts_state[connection.alias]
+
+
+def _fts_search(terms: List[str], topic: Optional[str], difficulty: Optional[str],
+                limit: int, offset: int) -> List[Tuple[int, float]]:
+    # Quote every term so user input can't use FTS5 query syntax; terms are ANDed
+    match = " ".join(f'"{t}"' for t in terms)
+    table = MCQ._meta.db_table
+    sql = (f"SELECT m.id, bm25({FTS_TABLE}) AS rank FROM {FTS_TABLE} "
+           f"JOIN {table} m ON m.id = {FTS_TABLE}.rowid WHERE {FTS_TABLE} MATCH %s")
+    params: List[Any] = [match]
+    if topic:
+        sql += " AND m.topic = %s"
+        params.append(topic)
+    if difficulty:
+        sql += " AND m.difficulty_level = %s"
+        params.append(difficulty)
+    sql += " ORDER BY rank LIMIT %s OFFSET %s"
+    params += [limit, offset]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        # bm25() is lower-is-better; flip it so higher scores rank first everywhere
+        return [(mcq_id, -rank) for mcq_id, rank in cursor.fetchall()]
+
+
+# --- Other databases: in-process inverted index persisted to disk ---------
+
+class TokenIndex:
+    """
+    Inverted index over question and option text with BM25 ranking.
+
+    Each indexed question gets a slot; per-slot metadata lives in flat arrays
+    and each term's postings are parallel (slot, term frequency) arrays in
+    ascending slot order, so a query is a few vectorised searchsorted passes.
+    Edits and deletes only mark the old slot dead; ``compact`` reclaims them.
+    A saved index is only read, never changed: updates go to a ``copy``.
+    """
+
+    def __init__(self):
+        self.doc_ids = array("q")
+        self.lengths = array("I")
+        self.topics = array("i")
+        self.difficulties = array("b")
+        self.alive = bytearray()
+        self.topic_codes: Dict[str, int] = {}
+        self.slot_of: Dict[int, int] = {}
+        self.postings: Dict[str, Tuple[array, array]] = {}
+        self.last_id = 0  # highest MCQ id indexed; newer rows are picked up by id
+        self.change_id = 0  # newest IndexChange folded in
+        self.live = 0
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return self.live
+
+    @property
+    def dead(self) -> int:
+        return len(self.alive) - self.live
+
+    def add(self, mcq_id: int, topic: Optional[str], difficulty: str, text: str):
+        self.remove(mcq_id)
+        slot = len(self.doc_ids)
+        counts: Dict[str, int] = {}
+        for term in tokenize(text):
+            counts[term] = counts.get(term, 0) + 1
+        for term, tf in counts.items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = (array("i"), array("H"))
+            postings[0].append(slot)
+            postings[1].append(min(tf, 65535))
+        length = sum(counts.values())
+        self.doc_ids.append(mcq_id)
+        self.lengths.append(length)
+        self.topics.append(self.topic_codes.setdefault(topic or "", len(self.topic_codes)))
+        self.difficulties.append(DIFFICULTY_CODES.get(difficulty, -1))
+        self.alive.append(1)
+        self.slot_of[mcq_id] = slot
+        self.live += 1
+        self.total_length += length
+        self.last_id = max(self.last_id, mcq_id)
+
+    def remove(self, mcq_id: int):
+        slot = self.slot_of.pop(mcq_id, None)
+        if slot is not None:
+            self.alive[slot] = 0
+            self.live -= 1
+            self.total_length -= self.lengths[slot]
+
+    def search(self, terms: List[str], topic: Optional[str] = None, difficulty: Optional[str] = None,
+               limit: int = 20, offset: int = 0) -> List[Tuple[int, float]]:
+        """(mcq id, BM25 score) for questions containing every term, best first"""
+        postings = [self.postings.get(t) for t in dict.fromkeys(terms)]
+        if not terms or any(p is None for p in postings) or not self.live:
+            return []
+        postings.sort(key=lambda p: len(p[0]))  # rarest term first keeps candidates small
+
+        slots = np.frombuffer(postings[0][0], dtype=np.int32)
+        mask = np.frombuffer(self.alive, dtype=np.uint8)[slots] == 1
+        if topic:
+            code = self.topic_codes.get(topic)
+            if code is None:
+                return []
+            mask &= np.frombuffer(self.topics, dtype=np.int32)[slots] == code
+        if difficulty:
+            mask &= np.frombuffer(self.difficulties, dtype=np.int8)[slots] == DIFFICULTY_CODES.get(difficulty, -2)
+        keep = np.flatnonzero(mask)
+        candidates = slots[keep]
+        tfs = [np.frombuffer(postings[0][1], dtype=np.uint16)[keep].astype(np.float64)]
+        for term_slots, term_tfs in postings[1:]:
+            term_slots = np.frombuffer(term_slots, dtype=np.int32)
+            pos = np.minimum(np.searchsorted(term_slots, candidates), len(term_slots) - 1)
+            found = term_slots[pos] == candidates
+            candidates, pos = candidates[found], pos[found]
+            tfs = [tf[found] for tf in tfs]
+            tfs.append(np.frombuffer(term_tfs, dtype=np.uint16)[pos].astype(np.float64))
+        if not len(candidates):
+            return []
+
+        n = self.live
+        avg_length = self.total_length / n if n else 1.0
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * np.frombuffer(self.lengths, dtype=np.uint32)[candidates]
+                          / max(avg_length, 1e-9))
+        scores = np.zeros(len(candidates))
+        for (term_slots, _), tf in zip(postings, tfs):
+            # Document frequency counts dead slots too until the next compaction
+            df = len(term_slots)
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            scores += idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        wanted = min(offset + limit, len(candidates))
+        top = np.argpartition(-scores, wanted - 1)[:wanted] if wanted < len(candidates) else np.arange(len(candidates))
+        top = top[np.lexsort((candidates[top], -scores[top]))][offset:]
+        doc_ids = np.frombuffer(self.doc_ids, dtype=np.int64)
+        return [(int(doc_ids[candidates[i]]), float(scores[i])) for i in top]
+
+    def compact(self) -> "TokenIndex":
+        """A copy without dead slots; postings stay in ascending slot order"""
+        compacted = TokenIndex()
+        remap = np.full(len(self.alive), -1, dtype=np.int64)
+        live_slots = np.flatnonzero(np.frombuffer(self.alive, dtype=np.uint8))
+        remap[live_slots] = np.arange(len(live_slots))
+        for name in ("doc_ids", "lengths", "topics", "difficulties"):
+            source = getattr(self, name)
+            getattr(compacted, name).frombytes(np.frombuffer(source, dtype=source.typecode)[live_slots].tobytes())
+        compacted.alive = bytearray(b"\x01" * len(live_slots))
+        compacted.topic_codes = dict(self.topic_codes)
+        compacted.slot_of = {int(d): i for i, d in enumerate(np.frombuffer(compacted.doc_ids, dtype=np.int64))}
+        for term, (slots, tfs) in self.postings.items():
+            new_slots = remap[np.frombuffer(slots, dtype=np.int32)]
+            keep = new_slots >= 0
+            if keep.any():
+                compacted.postings[term] = (
+                    array("i", new_slots[keep].astype(np.int32).tobytes()),
+                    array("H", np.frombuffer(tfs, dtype=np.uint16)[keep].tobytes()),
+                )
+        compacted.last_id = self.last_id
+        compacted.change_id = self.change_id
+        compacted.live = len(live_slots)
+        compacted.total_length = self.total_length
+        return compacted
+
+    def copy(self) -> "TokenIndex":
+        return pickle.loads(pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def save(self, path: str):
+        index_changes.write_pickle(self, path)
+
+    @classmethod
+    def load(cls, path: str) -> "TokenIndex":
+        with open(path, "rb") as f:
+            index = pickle.load(f)
+        index.__dict__.setdefault("change_id", 0)  # saved before changes were logged
+        return index
+
+
+def _question_text(row: Tuple) -> str:
+    return " ".join(part for part in row if part)
+
+
+def index_rows(index: TokenIndex, queryset, chunk_size: int = 5000) -> int:
+    """Add ``queryset``'s questions to ``index`` in keyset batches by id"""
+    queryset = queryset.order_by("id").values_list("id", "topic", "difficulty_level", *_TEXT_FIELDS)
+    added = 0
+    last_id = 0
+    while True:
+        rows = list(queryset.filter(id__gt=last_id)[:chunk_size])
+        if not rows:
+            return added
+        for mcq_id, topic, difficulty, *text in rows:
+            index.add(mcq_id, topic, difficulty, _question_text(text))
+        added += len(rows)
+        last_id = rows[-1][0]
+
+
+def build_token_index(queryset=None, chunk_size: int = 5000) -> TokenIndex:
+    index = TokenIndex()
+    index_rows(index, queryset if queryset is not None else MCQ.objects.all(), chunk_size)
+    return index
+
+
+# Process-wide copy, reloaded when another process rewrites the file
+_index: Optional[TokenIndex] = None
+_index_mtime: Optional[float] = None
+_lock = threading.Lock()
+_building = False  # a background build is running in this process
+
+
+def _mtime() -> Optional[float]:
+    try:
+        return os.path.getmtime(index_path())
+    except OSError:
+        return None
+
+
+def _store(index: TokenIndex):
+    global _index, _index_mtime
+    path = index_path()
+    index.save(path)
+    _index, _index_mtime = index, os.path.getmtime(path)
+
+
+def _is_current(index: TokenIndex) -> bool:
+    return not (MCQ.objects.filter(id__gt=index.last_id).exists()
+                or index_changes.has_pending(CHANGE_LOG, index.change_id))
+
+
+def _build() -> TokenIndex:
+    # The change log position is taken first, so edits made during the build are applied after it
+    change_id = index_changes.latest(CHANGE_LOG)
+    index = build_token_index()
+    index.change_id = change_id
+    return index
+
+
+def rebuild() -> Optional[TokenIndex]:
+    """Rebuild whichever index backs search; returns the token index when that's the one"""
+    if uses_sqlite_fts():
+        install_sqlite_fts()
+        return None
+    index = _build()
+    with _lock:
+        _store(index)
+    index_changes.prune(CHANGE_LOG, index.change_id)
+    return index
+
+
+def _apply_changes(index: TokenIndex) -> TokenIndex:
+    # Caller holds _lock; the saved copy is never changed in place
+    index = index.copy()
+    change_id, changed = index_changes.pending(CHANGE_LOG, index.change_id)
+    dirty = {int(mcq_id) for mcq_id in changed}
+    index_rows(index, MCQ.objects.filter(id__gt=index.last_id))
+    for mcq_id in dirty:
+        index.remove(mcq_id)
+    index_rows(index, MCQ.objects.filter(id__in=dirty, id__lte=index.last_id))
+    index.change_id = change_id
+    if index.dead > COMPACT_DEAD_FRACTION * len(index.alive):
+        index = index.compact()
+    _store(index)
+    return index
+
+
+def _build_in_background():
+    global _building
+    try:
+        rebuild()
+    except Exception as e:
+        print(f"Question search build failed: {e}")
+    finally:
+        connection.close()
+        with _lock:
+            _building = False
+
+
+def start_background_build():
+    """Build the token index on a daemon thread unless one is already running here"""
+    global _building
+    with _lock:
+        if _building:
+            return
+        _building = True
+    threading.Thread(target=_build_in_background, name="question-search-build", daemon=True).start()
+
+
+def get_token_index() -> TokenIndex:
+    """
+    The token index, brought up to date first: questions inserted since it
+    was saved are appended by id, and ones edited/deleted in any process
+    are re-read. Searches share the current copy without locking; the lock
+    is only taken to load or update it, and updates go to a fresh copy.
+    Until the first build (``rebuild_question_search``) this is empty and a
+    build is started in the background rather than run inside the request.
+    """
+    global _index, _index_mtime
+    index, mtime = _index, _index_mtime
+    if index is not None and mtime == _mtime() and _is_current(index):
+        return index
+    with _lock:
+        mtime = _mtime()
+        if mtime is None:
+            _index = None
+        elif _index is None or mtime != _index_mtime:
+            _index, _index_mtime = TokenIndex.load(index_path()), mtime
+        if _index is not None:
+            return _index if _is_current(_index) else _apply_changes(_index)
+    start_background_build()
+    return TokenIndex()
+
+
+def search_questions(query: str, topic: Optional[str] = None, difficulty: Optional[str] = None,
+                     limit: int = 20, offset: int = 0, include_answer: bool = False) -> Dict[str, Any]:
+    """Ranked questions matching every word of ``query``, optionally within a topic/difficulty"""
+    terms = tokenize(query or "")
+    limit = max(1, min(limit, MAX_LIMIT))
+    offset = max(0, offset)
+    backend = "sqlite_fts5" if uses_sqlite_fts() else "token_index"
+    if not terms:
+        return {"query": query, "backend": backend, "results": []}
+    if backend == "sqlite_fts5":
+        hits = _fts_search(terms, topic, difficulty, limit, offset)
+    else:
+        hits = get_token_index().search(terms, topic, difficulty, limit, offset)
+
+    by_id = MCQ.objects.in_bulk([mcq_id for mcq_id, _ in hits])
+    results = []
+    for mcq_id, score in hits:
+        mcq = by_id.get(mcq_id)
+        if mcq is None:  # deleted since it was indexed
+            continue
+        row = {
+            "id": mcq.id,
+            "topic": mcq.topic,
+            "sub_topic": mcq.sub_topic,
+            "difficulty_level": mcq.difficulty_level,
+            "question": mcq.question,
+            "options": {"A": mcq.option_a, "B": mcq.option_b, "C": mcq.option_c, "D": mcq.option_d},
+            "score": round(score, 4),
+        }
+        if include_answer:
+            row["correct_answer"] = mcq.correct_answer
+        results.append(row)
+    return {"query": query, "backend": backend, "results": results}
+
+
+def mark_dirty(mcq_ids: Iterable[int]):
+    index_changes.record(CHANGE_LOG, mcq_ids)
+
+
+# Signal handlers (connected in BaseConfig.ready). New rows are found by id,
+# so only edits and deletes need recording; FTS5 triggers cover SQLite.
+
+def mcq_post_save(sender, instance, created, **kwargs):
+    if not created and not uses_sqlite_fts():
+        mark_dirty([instance.pk])
+
+
+def mcq_post_delete(sender, instance, **kwargs):
+    if not uses_sqlite_fts():
+        mark_dirty([instance.pk])
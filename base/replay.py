@@ -0,0 +1,138 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import pickle
+import numpy as np
+from .history_features import ACTIONS, N_FEATURES, NEXT_TOPIC, Transition
+
+PASS_SCORE = 70.0
+
+
+def load_model(path: str):
+    """Load a suggestion model pickled in MLSuggestionEngine's format (or a bare estimator)"""
+    with open(path, "rb") as f:
+        data = pickle.load(f)
+    return data["model"] if isinstance(data, dict) else data
+
+
+class RuleBaseline:
+    """The hand-written mastery rules the synthetic training data was drawn from"""
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        easy = (X[:, 0] >= 5) & (X[:, 1] > 80)
+        medium = (X[:, 2] >= 5) & (X[:, 3] > 75)
+        hard = (X[:, 4] >= 3) & (X[:, 5] > 80)
+        return np.select([hard & medium & easy, medium & easy, easy], [NEXT_TOPIC, 2, 1], default=0)
+
+
+@dataclass
+class ModelReport:
+    """Running replay metrics for one candidate model"""
+    name: str
+    decisions: int = 0
+    matched: int = 0  # prediction == what the user actually did next
+    predicted: np.ndarray = field(default_factory=lambda: np.zeros(len(ACTIONS), dtype=np.int64))
+    # Next-quiz outcomes, split by whether the user happened to follow the suggestion
+    followed_score: float = 0.0
+    followed_passed: int = 0
+    other_score: float = 0.0
+    other_passed: int = 0
+
+    def update(self, predictions: np.ndarray, actual: np.ndarray, next_score: np.ndarray):
+        followed = predictions == actual
+        passed = next_score >= PASS_SCORE
+        self.decisions += len(predictions)
+        self.matched += int(followed.sum())
+        self.predicted += np.bincount(predictions, minlength=len(ACTIONS))
+        self.followed_score += float(next_score[followed].sum())
+        self.followed_passed += int(passed[followed].sum())
+        self.other_score += float(next_score[~followed].sum())
+        self.other_passed += int(passed[~followed].sum())
+
+    def to_dict(self) -> Dict[str, Any]:
+        other = self.decisions - self.matched
+
+        def ratio(value, count):
+            return round(value / count, 4) if count else None
+
+        return {
+            "model": self.name,
+            "decisions": self.decisions,
+            "agreement_with_users": ratio(self.matched, self.decisions),
+            "prediction_mix": {action: int(n) for action, n in zip(ACTIONS, self.predicted)},
+            "followed": {
+                "count": self.matched,
+                "mean_next_score": ratio(self.followed_score, self.matched),
+                "next_pass_rate": ratio(self.followed_passed, self.matched),
+            },
+            "not_followed": {
+                "count": other,
+                "mean_next_score": ratio(self.other_score, other),
+                "next_pass_rate": ratio(self.other_passed, other),
+            },
+        }
+
+
+class ReplaySimulator:
+    """
+    Score candidate suggestion models against what users actually did next.
+
+    Transitions are buffered into preallocated arrays and every model
+    predicts a whole batch at once.
+    """
+
+    def __init__(self, models: Dict[str, Any], batch_size: int = 10000):
+        self.models = models
+        self.batch_size = batch_size
+        self.reports = {name: ModelReport(name) for name in models}
+        names = list(models)
+        self._pairs = [(a, b) for i, a in enumerate(names) for b in names[i + 1:]]
+        self._pair_agree = {pair: 0 for pair in self._pairs}
+        self._features = np.zeros((batch_size, N_FEATURES))
+        self._actual = np.zeros(batch_size, dtype=np.int64)
+        self._next_score = np.zeros(batch_size)
+        self._filled = 0
+        self.transitions = 0
+        self.topic_changes = 0
+
+    def add(self, transition: Transition):
+        features, _, _, action, next_score, _ = transition
+        i = self._filled
+        self._features[i] = features
+        self._actual[i] = action
+        self._next_score[i] = next_score
+        self._filled += 1
+        if self._filled == self.batch_size:
+            self.flush()
+
+    def flush(self):
+        n = self._filled
+        if not n:
+            return
+        X, actual, next_score = self._features[:n], self._actual[:n], self._next_score[:n]
+        predictions = {}
+        for name, model in self.models.items():
+            predictions[name] = np.asarray(model.predict(X), dtype=np.int64)
+            self.reports[name].update(predictions[name], actual, next_score)
+        for a, b in self._pairs:
+            self._pair_agree[(a, b)] += int((predictions[a] == predictions[b]).sum())
+        self.transitions += n
+        self.topic_changes += int((actual == NEXT_TOPIC).sum())
+        self._filled = 0
+
+    def run(self, transitions: Iterable[Transition]) -> Dict[str, Any]:
+        for transition in transitions:
+            self.add(transition)
+        self.flush()
+        return self.report()
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "transitions": self.transitions,
+            "topic_change_rate": round(self.topic_changes / self.transitions, 4) if self.transitions else None,
+            "models": [report.to_dict() for report in self.reports.values()],
+            "pairwise_agreement": {
+                f"{a} vs {b}": round(agree / self.transitions, 4) if self.transitions else None
+                for (a, b), agree in self._pair_agree.items()
+            },
+        }
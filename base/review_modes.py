@@ -0,0 +1,27 @@
+from __future__ import annotations
+from typing import Iterable, List
+from django.db.models import Q
+from .models import QuizResult
+
+# Review quizzes mix questions from many topics and levels. They are saved
+# under a pseudo-topic with this difficulty and kept out of every per-topic
+# statistic (leaderboards, sketches, question stats, topic charts and
+# suggestions). They still count towards a user's dashboard totals.
+MIXED_DIFFICULTY = "Mixed"
+REVIEW_TOPIC = "Mistake Review"
+DUE_TOPIC = "Spaced Review"
+REVIEW_TOPICS = (REVIEW_TOPIC, DUE_TOPIC)
+
+
+def is_review_quiz(topic: str, difficulty_level: str) -> bool:
+    return difficulty_level == MIXED_DIFFICULTY or topic in REVIEW_TOPICS
+
+
+def review_quiz_q() -> Q:
+    """The same predicate as ``is_review_quiz``, for querysets"""
+    return Q(difficulty_level=MIXED_DIFFICULTY) | Q(topic__in=REVIEW_TOPICS)
+
+
+def topic_results(results: Iterable[QuizResult]) -> List[QuizResult]:
+    """The results that belong to a real (topic, difficulty)"""
+    return [r for r in results if not is_review_quiz(r.topic, r.difficulty_level)]
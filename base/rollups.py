@@ -0,0 +1,70 @@
+from __future__ import annotations
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Tuple
+from django.db import transaction
+from django.utils import timezone
+from .models import DailyTopicRollup, QuizResult
+
+RollupKey = Tuple[int, Any, str, str, str]
+
+
+def rollup_key(result: QuizResult) -> RollupKey:
+    return (
+        result.user_id,
+        timezone.localdate(result.date_taken),
+        result.topic,
+        result.sub_topic or '',
+        result.difficulty_level,
+    )
+
+
+def collect_deltas(results: Iterable[QuizResult]) -> Dict[RollupKey, Dict[str, Any]]:
+    deltas: Dict[RollupKey, Dict[str, Any]] = defaultdict(
+        lambda: {'quiz_count': 0, 'score_sum': 0.0, 'best_score': 0.0, 'time_seconds': 0.0, 'last_taken': None}
+    )
+    for result in results:
+        delta = deltas[rollup_key(result)]
+        score = float(result.score_percentage or 0.0)
+        delta['quiz_count'] += 1
+        delta['score_sum'] += score
+        delta['best_score'] = max(delta['best_score'], score)
+        delta['time_seconds'] += result.time_taken.total_seconds() if result.time_taken else 0.0
+        if delta['last_taken'] is None or result.date_taken > delta['last_taken']:
+            delta['last_taken'] = result.date_taken
+    return deltas
+
+
+def record_daily_rollups(results: Iterable[QuizResult]):
+    """Fold a batch of results into DailyTopicRollup (insert missing, lock, bulk update)"""
+    deltas = collect_deltas(results)
+    if not deltas:
+        return
+    with transaction.atomic():
+        DailyTopicRollup.objects.bulk_create(
+            [DailyTopicRollup(user_id=k[0], day=k[1], topic=k[2], sub_topic=k[3], difficulty_level=k[4])
+             for k in deltas],
+            ignore_conflicts=True,
+        )
+        rows = list(
+            DailyTopicRollup.objects.select_for_update().filter(
+                user_id__in={k[0] for k in deltas},
+                day__in={k[1] for k in deltas},
+                topic__in={k[2] for k in deltas},
+            )
+        )
+        touched = []
+        for row in rows:
+            delta = deltas.get((row.user_id, row.day, row.topic, row.sub_topic, row.difficulty_level))
+            if delta is None:
+                continue
+            row.quiz_count += delta['quiz_count']
+            row.score_sum += delta['score_sum']
+            row.best_score = max(row.best_score, delta['best_score'])
+            row.time_seconds += delta['time_seconds']
+            if row.last_taken is None or delta['last_taken'] > row.last_taken:
+                row.last_taken = delta['last_taken']
+            touched.append(row)
+        DailyTopicRollup.objects.bulk_update(
+            touched, ['quiz_count', 'score_sum', 'best_score', 'time_seconds', 'last_taken']
+        )
+
@@ -0,0 +1,215 @@
+from __future__ import annotations
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import math
+import random
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import QuizResult, ScoreSketch
+
+BANDS_CACHE_KEY = "sketches:bands"
+BANDS_TIMEOUT = 300
+BAND_QUANTILES = (0.1, 0.5, 0.9)
+# Each batch merges into one randomly chosen shard row per key, so concurrent
+# submitters to a popular topic rarely wait on the same row lock
+SKETCH_SHARDS = 8
+
+SketchKey = Tuple[str, str]
+
+
+class QuantileSketch:
+    """
+    Mergeable streaming quantile sketch with relative-error guarantees
+    (DDSketch-style logarithmic buckets).
+
+    Every value lands in bucket ``ceil(log_gamma(value))`` so a quantile is
+    reported within ``relative_accuracy`` of the true value. Two sketches
+    merge by adding bucket counts, which makes incremental updates a plain
+    counter increment. Memory is bounded by ``max_buckets``: when exceeded,
+    the lowest buckets are collapsed together.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 2048):
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0  # values <= 0 (e.g. a 0% score)
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def add(self, value: float, weight: int = 1):
+        value = float(value)
+        if value <= 0:
+            self.zero_count += weight
+        else:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.buckets[index] = self.buckets.get(index, 0) + weight
+            if len(self.buckets) > self.max_buckets:
+                self._collapse()
+        self.count += weight
+        self.total += value * weight
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: "QuantileSketch"):
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        for index, n in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + n
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    def _collapse(self):
+        indexes = sorted(self.buckets)
+        excess = len(indexes) - self.max_buckets + 1
+        folded = sum(self.buckets.pop(i) for i in indexes[:excess])
+        target = indexes[excess]
+        self.buckets[target] += folded
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0 if self.min is None or self.min <= 0 else self.min
+        seen = self.zero_count
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                # Bucket midpoint, which is within relative_accuracy of any value in it
+                value = 2 * self.gamma ** index / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "alpha": self.relative_accuracy,
+            "buckets": {str(i): n for i, n in self.buckets.items()},
+            "zero": self.zero_count,
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "QuantileSketch":
+        data = data or {}
+        sketch = cls(relative_accuracy=data.get("alpha", 0.01))
+        sketch.buckets = {int(i): n for i, n in data.get("buckets", {}).items()}
+        sketch.zero_count = data.get("zero", 0)
+        sketch.count = data.get("count", 0)
+        sketch.total = data.get("total", 0.0)
+        sketch.min = data.get("min")
+        sketch.max = data.get("max")
+        return sketch
+
+
+def _seconds(result: QuizResult) -> Optional[float]:
+    return result.time_taken.total_seconds() if result.time_taken else None
+
+
+def collect_sketches(rows: Iterable[Tuple[str, str, Optional[float], Optional[float]]]
+                     ) -> Dict[SketchKey, Tuple[QuantileSketch, QuantileSketch]]:
+    """Build (score, seconds) sketches per (topic, difficulty) from plain value rows"""
+    sketches: Dict[SketchKey, Tuple[QuantileSketch, QuantileSketch]] = {}
+    for topic, difficulty, score, seconds in rows:
+        pair = sketches.get((topic, difficulty))
+        if pair is None:
+            pair = sketches[(topic, difficulty)] = (QuantileSketch(), QuantileSketch())
+        pair[0].add(score or 0.0)
+        if seconds is not None:
+            pair[1].add(seconds)
+    return sketches
+
+
+def merge_into_table(sketches: Dict[SketchKey, Tuple[QuantileSketch, QuantileSketch]], shard: Optional[int] = None):
+    """
+    Merge per-key sketches into one shard of the ScoreSketch rows (insert
+    missing, lock, bulk update). The shard is picked at random unless given.
+    """
+    if not sketches:
+        return
+    if shard is None:
+        shard = random.randrange(SKETCH_SHARDS)
+    with transaction.atomic():
+        ScoreSketch.objects.bulk_create(
+            [ScoreSketch(topic=topic, difficulty_level=difficulty, shard=shard) for topic, difficulty in sketches],
+            ignore_conflicts=True,
+        )
+        match = Q()
+        for topic, difficulty in sketches:
+            match |= Q(topic=topic, difficulty_level=difficulty)
+        # Keys are locked in a fixed order so batches touching several can't deadlock
+        rows = list(
+            ScoreSketch.objects.select_for_update().filter(match, shard=shard).order_by("topic", "difficulty_level")
+        )
+        now = timezone.now()
+        for row in rows:
+            score_delta, time_delta = sketches[(row.topic, row.difficulty_level)]
+            score = QuantileSketch.from_dict(row.score_sketch)
+            score.merge(score_delta)
+            seconds = QuantileSketch.from_dict(row.time_sketch)
+            seconds.merge(time_delta)
+            row.score_sketch = score.to_dict()
+            row.time_sketch = seconds.to_dict()
+            row.result_count = score.count
+            row.updated_at = now
+        ScoreSketch.objects.bulk_update(rows, ["score_sketch", "time_sketch", "result_count", "updated_at"])
+
+
+def load_sketches() -> Dict[SketchKey, Tuple[QuantileSketch, QuantileSketch]]:
+    """(score, seconds) sketches per (topic, difficulty), with their shards merged"""
+    sketches: Dict[SketchKey, Tuple[QuantileSketch, QuantileSketch]] = {}
+    for row in ScoreSketch.objects.order_by("topic", "difficulty_level", "shard"):
+        score = QuantileSketch.from_dict(row.score_sketch)
+        seconds = QuantileSketch.from_dict(row.time_sketch)
+        pair = sketches.get((row.topic, row.difficulty_level))
+        if pair is None:
+            sketches[(row.topic, row.difficulty_level)] = (score, seconds)
+        else:
+            pair[0].merge(score)
+            pair[1].merge(seconds)
+    return sketches
+
+
+def record_sketches(results: Iterable[QuizResult]):
+    """Fold a batch of new results into the per-topic score and time sketches"""
+    merge_into_table(collect_sketches(
+        (r.topic, r.difficulty_level, r.score_percentage, _seconds(r)) for r in results
+    ))
+
+
+def get_score_bands() -> List[Dict[str, Any]]:
+    """p10/p50/p90 score and completion time per (topic, difficulty), cached briefly"""
+    bands = cache.get(BANDS_CACHE_KEY)
+    if bands is not None:
+        return bands
+    bands = []
+    for (topic, difficulty), (score, seconds) in load_sketches().items():
+        band = {"topic": topic, "difficulty_level": difficulty, "count": score.count}
+        for q in BAND_QUANTILES:
+            label = f"p{int(q * 100)}"
+            value = score.quantile(q)
+            band[f"score_{label}"] = round(value, 1) if value is not None else None
+            value = seconds.quantile(q)
+            band[f"seconds_{label}"] = round(value) if value is not None else None
+        bands.append(band)
+    cache.set(BANDS_CACHE_KEY, bands, BANDS_TIMEOUT)
+    return bands
@@ -0,0 +1,102 @@
+from __future__ import annotations
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from datetime import datetime, timedelta
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import QuizResult, ReviewState
+from .review_modes import DUE_TOPIC, MIXED_DIFFICULTY as DUE_DIFFICULTY
+
+MIN_EASE = 1.3
+# SM-2 response quality (0-5); only right/wrong is known per question
+QUALITY_CORRECT = 4
+QUALITY_WRONG = 1
+
+ReviewKey = Tuple[int, int]
+
+
+def sm2_step(ease: float, interval: float, repetitions: int, quality: int) -> Tuple[float, float, int]:
+    """One SM-2 update; returns the new (ease factor, interval in days, repetitions)"""
+    if quality >= 3:
+        if repetitions == 0:
+            interval = 1.0
+        elif repetitions == 1:
+            interval = 6.0
+        else:
+            interval = round(interval * ease)
+        repetitions += 1
+    else:
+        repetitions = 0
+        interval = 1.0
+    ease = max(MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    return ease, interval, repetitions
+
+
+def collect_reviews(results: Iterable[QuizResult]) -> Dict[ReviewKey, List[Tuple[datetime, int]]]:
+    """Per (user, mcq): the (time, quality) reviews in a batch, oldest first"""
+    reviews: Dict[ReviewKey, List[Tuple[datetime, int]]] = {}
+    for result in results:
+        answers = result.user_answers or []
+        for i, q in enumerate(result.questions_data or []):
+            if not isinstance(q, dict) or q.get("id") is None or not q.get("correct_answer"):
+                continue
+            if isinstance(answers, dict):
+                answer = answers.get(str(i)) or ""
+            else:
+                answer = answers[i] if i < len(answers) else ""
+            quality = QUALITY_CORRECT if (answer or "").upper() == q["correct_answer"] else QUALITY_WRONG
+            reviews.setdefault((result.user_id, int(q["id"])), []).append((result.date_taken, quality))
+    for history in reviews.values():
+        history.sort(key=lambda review: review[0])
+    return reviews
+
+
+def apply_reviews(state: ReviewState, history: List[Tuple[datetime, int]]):
+    for reviewed_at, quality in history:
+        if state.last_reviewed and reviewed_at <= state.last_reviewed:
+            continue  # Already applied (e.g. a replayed spool batch)
+        state.ease_factor, state.interval_days, state.repetitions = sm2_step(
+            state.ease_factor, state.interval_days, state.repetitions, quality
+        )
+        state.last_reviewed = reviewed_at
+        state.due_at = reviewed_at + timedelta(days=state.interval_days)
+
+
+def record_reviews(results: Iterable[QuizResult]):
+    """Advance review schedules for every question in a batch (insert missing, lock, bulk update)"""
+    reviews = collect_reviews(results)
+    if not reviews:
+        return
+    from ui.models import MCQ
+
+    with transaction.atomic():
+        known = set(MCQ.objects.filter(id__in={k[1] for k in reviews}).values_list("id", flat=True))
+        reviews = {k: h for k, h in reviews.items() if k[1] in known}
+        if not reviews:
+            return
+        ReviewState.objects.bulk_create(
+            [ReviewState(user_id=user_id, mcq_id=mcq_id) for user_id, mcq_id in reviews],
+            ignore_conflicts=True,
+        )
+        by_user: Dict[int, set] = {}
+        for user_id, mcq_id in reviews:
+            by_user.setdefault(user_id, set()).add(mcq_id)
+        match = Q()
+        for user_id, mcq_ids in by_user.items():
+            match |= Q(user_id=user_id, mcq_id__in=mcq_ids)
+        rows = list(ReviewState.objects.select_for_update().filter(match))
+        for row in rows:
+            apply_reviews(row, reviews[(row.user_id, row.mcq_id)])
+        ReviewState.objects.bulk_update(
+            rows, ["ease_factor", "interval_days", "repetitions", "last_reviewed", "due_at"]
+        )
+
+
+def due_questions(user_id: int, limit: int = 10, now: Optional[datetime] = None) -> List[Any]:
+    """The user's most overdue questions, read from the (user, due_at) index"""
+    rows = (
+        ReviewState.objects.filter(user_id=user_id, due_at__lte=now or timezone.now())
+        .select_related("mcq")
+        .order_by("due_at")[:limit]
+    )
+    return [row.mcq for row in rows]
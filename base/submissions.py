@@ -0,0 +1,172 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Sequence, Tuple
+from datetime import timedelta
+import uuid
+from django.db import transaction
+from .analytics_cache import bump_history_version
+from .grading import GradeResult, answer_key_cache, grade, normalize_answers
+from .item_analysis import record_question_stats
+from .leaderboard import record_leaderboard
+from .sketches import record_sketches
+from .mistakes import record_mistakes
+from .models import Profile, QuizResult
+from .review_modes import MIXED_DIFFICULTY, REVIEW_TOPICS, is_review_quiz, topic_results
+from .rollups import record_daily_rollups
+from .spaced_repetition import record_reviews
+
+MAX_BATCH_SIZE = 100
+
+
+class SubmissionError(ValueError):
+    """Raised when a submitted quiz payload is malformed"""
+
+
+def _question_ids(data: Dict[str, Any]) -> List[int]:
+    questions = data.get('questions', [])
+    if not isinstance(questions, list):
+        raise SubmissionError("'questions' must be a list")
+    ids = []
+    for q in questions:
+        if not isinstance(q, dict) or q.get('id') is None:
+            raise SubmissionError('Every question must include its id')
+        try:
+            ids.append(int(q['id']))
+        except (TypeError, ValueError):
+            raise SubmissionError(f"Invalid question id: {q['id']!r}")
+    return ids
+
+
+def _check_questions(question_ids: List[int], topic: str, difficulty_level: str):
+    """
+    A quiz needs at least one question, each submitted once; every question
+    must exist and, outside review quizzes, match the claimed topic and difficulty
+    """
+    if not question_ids:
+        raise SubmissionError('A quiz must include at least one question')
+    if len(set(question_ids)) != len(question_ids):
+        raise SubmissionError('Each question may only be submitted once')
+    entries = answer_key_cache.get_entries(question_ids)
+    unknown = [i for i in question_ids if i not in entries]
+    if unknown:
+        raise SubmissionError(f"Unknown question ids: {unknown}")
+    if is_review_quiz(topic, difficulty_level):
+        if topic not in REVIEW_TOPICS or difficulty_level != MIXED_DIFFICULTY:
+            raise SubmissionError(f"Review quizzes must be one of {list(REVIEW_TOPICS)} at '{MIXED_DIFFICULTY}'")
+        return
+    mismatched = [i for i in question_ids if entries[i][1:] != (topic, difficulty_level)]
+    if mismatched:
+        raise SubmissionError(f"Questions {mismatched} are not {topic} ({difficulty_level}) questions")
+
+
+def build_quiz_result(user: Profile, data: Dict[str, Any]) -> Tuple[QuizResult, GradeResult]:
+    """Validate and grade one submission, returning an unsaved QuizResult and its grade"""
+    if not isinstance(data, dict):
+        raise SubmissionError('Submission must be an object')
+    for field in ('topic', 'difficulty_level', 'time_taken'):
+        if data.get(field) in (None, ''):
+            raise SubmissionError(f"Missing field '{field}'")
+    try:
+        time_taken = timedelta(seconds=float(data['time_taken']))
+    except (TypeError, ValueError):
+        raise SubmissionError("'time_taken' must be a number of seconds")
+
+    questions = data.get('questions', [])
+    question_ids = _question_ids(data)
+    _check_questions(question_ids, data['topic'], data['difficulty_level'])
+    # Grade on the server against the cached answer key; client-side
+    # correct_answers/score_percentage are ignored.
+    graded = grade(question_ids, data.get('user_answers', []))
+
+    # Store the answer key alongside the questions for the review screen
+    stored_questions = [
+        {
+            'id': q['id'],
+            'question': q.get('question', ''),
+            'option_a': q.get('option_a', ''),
+            'option_b': q.get('option_b', ''),
+            'option_c': q.get('option_c', ''),
+            'option_d': q.get('option_d', ''),
+            'correct_answer': key,
+        }
+        for q, key in zip(questions, graded.answer_key)
+    ]
+
+    result = QuizResult(
+        user=user,
+        topic=data['topic'],
+        sub_topic=data.get('sub_topic', ''),
+        difficulty_level=data['difficulty_level'],
+        total_questions=graded.total_questions,
+        correct_answers=graded.correct_answers,
+        score_percentage=graded.score_percentage,
+        time_taken=time_taken,
+        questions_data=stored_questions,
+        user_answers=normalize_answers(data.get('user_answers', []), len(question_ids)),
+    )
+    return result, graded
+
+
+def save_results(results: Sequence[QuizResult]) -> List[QuizResult]:
+    """Insert graded results and update derived statistics in one transaction"""
+    if not results:
+        return []
+    for result in results:
+        if result.submission_id is None:
+            result.submission_id = uuid.uuid4()
+    with transaction.atomic():
+        if len(results) == 1:
+            results[0].save()
+        else:
+            QuizResult.objects.bulk_create(results)
+            if results[0].pk is None:
+                # Backends that can't return ids from a multi-row insert
+                # (MySQL): map rows back by their unique submission id
+                ids = dict(QuizResult.objects.filter(
+                    submission_id__in=[r.submission_id for r in results],
+                ).values_list('submission_id', 'id'))
+                for result in results:
+                    result.pk = ids[result.submission_id]
+        # Derived statistics are updated once per batch. Review quizzes only
+        # count towards the user's own totals (rollups, filtered at read time)
+        # and feed the mistake and review schedules.
+        per_topic = topic_results(results)
+        record_question_stats(per_topic)
+        record_daily_rollups(results)
+        record_leaderboard(per_topic)
+        record_sketches(per_topic)
+        record_mistakes(results)
+        record_reviews(results)
+        user_ids = {r.user_id for r in results}
+        transaction.on_commit(lambda: bump_history_version(user_ids))
+    return list(results)
+
+
+def submit_batch(user: Profile, payloads: Sequence[Any]) -> List[Dict[str, Any]]:
+    """Validate, grade and insert many submissions; returns per-item ids or errors"""
+    # Warm the answer-key cache for the whole batch with one query
+    all_ids = []
+    for data in payloads:
+        try:
+            all_ids.extend(_question_ids(data) if isinstance(data, dict) else [])
+        except SubmissionError:
+            pass
+    answer_key_cache.get_many(all_ids)
+
+    items: List[Dict[str, Any]] = []
+    valid: List[QuizResult] = []
+    for index, data in enumerate(payloads):
+        try:
+            result, graded = build_quiz_result(user, data)
+        except SubmissionError as e:
+            items.append({'index': index, 'success': False, 'error': str(e)})
+            continue
+        valid.append(result)
+        items.append({'index': index, 'success': True, 'result': result, **graded.to_dict()})
+
+    save_results(valid)
+
+    for item in items:
+        result = item.pop('result', None)
+        if result is not None:
+            item['result_id'] = result.pk
+    return items
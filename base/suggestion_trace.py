@@ -0,0 +1,214 @@
+from __future__ import annotations
+from collections import deque
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+import itertools
+import time
+import numpy as np
+from django.conf import settings
+
+DEFAULTS = {
+    'ENABLED': True,
+    # Most recent calls kept per process
+    'CAPACITY': 500,
+}
+# Upper bounds (ms) of the latency histogram buckets; slower calls land in the overflow bucket
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000)
+
+
+def get_config() -> Dict[str, Any]:
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, 'QUIZ_SUGGESTION_TRACE', {}))
+    return config
+
+
+class _Phase:
+    __slots__ = ("trace", "name", "started")
+
+    def __init__(self, trace: "Trace", name: str):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        phases = self.trace.phases
+        phases[self.name] = phases.get(self.name, 0.0) + elapsed
+
+
+class Trace:
+    """
+    Timings and model inputs/outputs for one suggestion call.
+
+    Phases that run more than once (e.g. predict per topic) are summed.
+    Values are kept raw and only formatted when the buffer is dumped.
+    """
+    __slots__ = ("id", "method", "user_id", "users", "started_at", "started", "total", "phases",
+                 "predictions", "errors", "suggestions")
+
+    def __init__(self, trace_id: int, method: str, user_id: Optional[int]):
+        self.id = trace_id
+        self.method = method
+        self.user_id = user_id
+        self.users = 1  # users the call covered; a batch sets its size on finish
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.total = 0.0
+        self.phases: Dict[str, float] = {}
+        self.predictions: List[tuple] = []
+        self.errors: List[tuple] = []
+        self.suggestions = 0
+
+    def phase(self, name: str) -> _Phase:
+        return _Phase(self, name)
+
+    def prediction(self, topic: Optional[str], features: np.ndarray, action: str, confidence: float):
+        self.predictions.append((topic, features, action, confidence))
+
+    def error(self, topic: Optional[str], exc: BaseException):
+        self.errors.append((topic, f"{type(exc).__name__}: {exc}"))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "user_id": self.user_id,
+            "users": self.users,
+            "started_at": datetime.fromtimestamp(self.started_at, tz=timezone.utc).isoformat(),
+            "total_ms": round(self.total * 1000, 3),
+            "phases_ms": {name: round(seconds * 1000, 3) for name, seconds in self.phases.items()},
+            "predictions": [
+                {"topic": topic, "features": np.asarray(features).ravel().tolist(),
+                 "action": action, "confidence": round(float(confidence), 2)}
+                for topic, features, action, confidence in self.predictions
+            ],
+            "errors": [{"topic": topic, "error": error} for topic, error in self.errors],
+            "suggestions": self.suggestions,
+        }
+
+
+class _NullTrace:
+    """Stand-in when tracing is off, so call sites need no checks"""
+    __slots__ = ()
+    _phase = nullcontext()
+
+    def phase(self, name: str):
+        return self._phase
+
+    def prediction(self, *args):
+        pass
+
+    def error(self, *args):
+        pass
+
+
+NULL_TRACE = _NullTrace()
+
+
+class TraceBuffer:
+    """Fixed-size ring of the most recent traces (deque appends are thread-safe)"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._traces: deque = deque(maxlen=capacity)
+        self._ids = itertools.count(1)
+
+    def start(self, method: str, user_id: Optional[int]) -> Trace:
+        return Trace(next(self._ids), method, user_id)
+
+    def finish(self, trace: Trace, suggestions: int = 0, users: Optional[int] = None):
+        trace.total = time.perf_counter() - trace.started
+        trace.suggestions = suggestions
+        if users is not None:
+            trace.users = users
+        self._traces.append(trace)
+
+    def snapshot(self, method: Optional[str] = None) -> List[Trace]:
+        """Buffered traces, oldest first"""
+        traces = list(self._traces)
+        return [t for t in traces if t.method == method] if method else traces
+
+    def clear(self):
+        self._traces.clear()
+
+    def __len__(self) -> int:
+        return len(self._traces)
+
+
+_buffer: Optional[TraceBuffer] = None
+
+
+def get_buffer() -> TraceBuffer:
+    global _buffer
+    if _buffer is None:
+        _buffer = TraceBuffer(int(get_config()['CAPACITY']))
+    return _buffer
+
+
+def reset(capacity: Optional[int] = None) -> TraceBuffer:
+    """Replace this process's buffer with an empty one"""
+    global _buffer
+    _buffer = TraceBuffer(capacity or int(get_config()['CAPACITY']))
+    return _buffer
+
+
+def start(method: str, user) -> Trace | _NullTrace:
+    if not get_config()['ENABLED']:
+        return NULL_TRACE
+    return get_buffer().start(method, getattr(user, "id", None))
+
+
+def finish(trace, suggestions: int = 0, users: Optional[int] = None):
+    if trace is not NULL_TRACE:
+        get_buffer().finish(trace, suggestions, users)
+
+
+def histogram(seconds: Iterable[float]) -> Dict[str, Any]:
+    values = np.fromiter(seconds, dtype=np.float64) * 1000.0
+    if not len(values):
+        return {"count": 0}
+    counts = np.bincount(np.searchsorted(LATENCY_BUCKETS_MS, values), minlength=len(LATENCY_BUCKETS_MS) + 1)
+    labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "count": int(len(values)),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(float(values.max()), 3),
+        "buckets": {label: int(n) for label, n in zip(labels, counts)},
+    }
+
+
+def latency_histograms(traces: List[Trace]) -> Dict[str, Any]:
+    """Per-method total and per-phase latency distributions"""
+    by_method: Dict[str, List[Trace]] = {}
+    for trace in traces:
+        by_method.setdefault(trace.method, []).append(trace)
+    report = {}
+    for method, method_traces in by_method.items():
+        phases = sorted({name for t in method_traces for name in t.phases})
+        report[method] = {
+            "total": histogram(t.total for t in method_traces),
+            "phases": {name: histogram(t.phases[name] for t in method_traces if name in t.phases)
+                       for name in phases},
+            "errors": sum(len(t.errors) for t in method_traces),
+        }
+    return report
+
+
+def dump(method: Optional[str] = None, limit: Optional[int] = None) -> Dict[str, Any]:
+    """This process's buffer as JSON-ready data, newest traces first"""
+    buffer = get_buffer()
+    traces = buffer.snapshot(method)
+    newest = traces[::-1][:limit] if limit is not None else traces[::-1]
+    return {
+        "enabled": bool(get_config()['ENABLED']),
+        "capacity": buffer.capacity,
+        "buffered": len(traces),
+        "histograms": latency_histograms(traces),
+        "traces": [t.to_dict() for t in newest],
+    }
@@ -0,0 +1,166 @@
+from __future__ import annotations
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from django.db.models import Max, Min, Sum
+from django.utils import timezone
+from .models import DailyTopicRollup
+from .review_modes import is_review_quiz
+
+DIFFICULTIES = ("Easy", "Medium", "Hard")
+
+
+@dataclass
+class UserSummary:
+    """
+    Everything the dashboard and analytics pages need about a user's history,
+    built from one grouped read of their DailyTopicRollup rows.
+
+    The header totals count every quiz; the per-topic breakdowns (charts and
+    suggestion features) leave out review quizzes.
+    """
+    user_id: int
+    rows: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def topic_rows(self) -> List[Dict[str, Any]]:
+        return [r for r in self.rows if not is_review_quiz(r["topic"], r["difficulty_level"])]
+
+    @property
+    def total_quizzes(self) -> int:
+        return sum(r["quiz_count"] for r in self.rows)
+
+    @property
+    def has_history(self) -> bool:
+        """Whether the user has taken a topic quiz (review quizzes alone don't count)"""
+        return bool(self.topic_rows)
+
+    @property
+    def avg_score(self) -> float:
+        total = self.total_quizzes
+        return sum(r["score_sum"] for r in self.rows) / total if total else 0.0
+
+    @property
+    def best_score(self) -> float:
+        return max((r["best_score"] for r in self.rows), default=0.0)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(r["time_seconds"] for r in self.rows)
+
+    @property
+    def total_time_str(self) -> str:
+        return f"{int(self.total_seconds / 60)}m"
+
+    def topic_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-topic difficulty breakdown used as suggestion-engine features"""
+        return self._rollup(lambda r: r["topic"])
+
+    def sub_topic_stats(self) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """Same breakdown per (topic, sub_topic), for rows that have a sub-topic"""
+        return self._rollup(lambda r: (r["topic"], r["sub_topic"]), lambda r: bool(r["sub_topic"]))
+
+    def _rollup(self, key, include=None) -> Dict[Any, Dict[str, Any]]:
+        # Roll the (topic, sub_topic, difficulty) rows up to ``key``
+        topics: Dict[Any, Dict[str, Any]] = {}
+        for r in self.topic_rows:
+            if include is not None and not include(r):
+                continue
+            t = topics.setdefault(key(r), {
+                "by_difficulty": {d: {"count": 0, "score_sum": 0.0} for d in DIFFICULTIES},
+                "count": 0, "score_sum": 0.0, "first_day": None, "latest": None,
+            })
+            t["count"] += r["quiz_count"]
+            t["score_sum"] += r["score_sum"]
+            if r["difficulty_level"] in t["by_difficulty"]:
+                bucket = t["by_difficulty"][r["difficulty_level"]]
+                bucket["count"] += r["quiz_count"]
+                bucket["score_sum"] += r["score_sum"]
+            if t["first_day"] is None or r["first_day"] < t["first_day"]:
+                t["first_day"] = r["first_day"]
+            if r["latest"] and (t["latest"] is None or r["latest"] > t["latest"]):
+                t["latest"] = r["latest"]
+        return topics
+
+    def chart_data(self) -> Dict[str, Any]:
+        """Topic performance and topic/sub-topic history for the analytics charts"""
+        by_topic: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0])
+        by_sub_topic: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for r in self.topic_rows:
+            by_topic[r["topic"]][0] += r["quiz_count"]
+            by_topic[r["topic"]][1] += r["score_sum"]
+            entry = by_sub_topic.setdefault(
+                (r["topic"], r["sub_topic"]), {"quiz_count": 0, "score_sum": 0.0, "best_score": 0.0, "latest": None}
+            )
+            entry["quiz_count"] += r["quiz_count"]
+            entry["score_sum"] += r["score_sum"]
+            entry["best_score"] = max(entry["best_score"], r["best_score"])
+            if r["latest"] and (entry["latest"] is None or r["latest"] > entry["latest"]):
+                entry["latest"] = r["latest"]
+
+        topic_avgs = sorted(
+            ((topic, score_sum / count) for topic, (count, score_sum) in by_topic.items() if count),
+            key=lambda item: -item[1],
+        )[:6]  # Top 6 topics
+
+        history = []
+        for (topic, sub_topic), entry in by_sub_topic.items():
+            if not entry["quiz_count"]:
+                continue
+            history.append({
+                "topic": topic,
+                "sub_topic": sub_topic,
+                "quiz_count": entry["quiz_count"],
+                "avg_score": round(entry["score_sum"] / entry["quiz_count"], 1),
+                "best_score": round(entry["best_score"], 1),
+                "latest_date": timezone.localtime(entry["latest"]).strftime("%Y-%m-%d") if entry["latest"] else "",
+            })
+        history.sort(key=lambda item: (-item["quiz_count"], -item["avg_score"]))
+
+        return {
+            "topic_performance": {
+                "topics": [topic for topic, _ in topic_avgs],
+                "scores": [float(avg) for _, avg in topic_avgs],
+            },
+            "quiz_history_analytics": history,
+        }
+
+
+_AGGREGATES = dict(
+    quiz_count=Sum("quiz_count"),
+    score_sum=Sum("score_sum"),
+    best_score=Max("best_score"),
+    time_seconds=Sum("time_seconds"),
+    first_day=Min("day"),
+    latest=Max("last_taken"),
+)
+
+
+def get_user_summary(user_id: int) -> UserSummary:
+    """Load a user's summary with a single grouped query over their rollups"""
+    rows = list(
+        DailyTopicRollup.objects.filter(user_id=user_id)
+        .values("topic", "sub_topic", "difficulty_level")
+        .annotate(**_AGGREGATES)
+        .order_by()
+    )
+    return UserSummary(user_id=user_id, rows=rows)
+
+
+def get_user_summaries(user_ids: List[int], chunk_size: int = 1000) -> Dict[int, UserSummary]:
+    """
+    Summaries for many users from one grouped query per ``chunk_size`` ids;
+    users without history get an empty summary.
+    """
+    summaries = {user_id: UserSummary(user_id=user_id) for user_id in user_ids}
+    ids = list(summaries)
+    for start in range(0, len(ids), chunk_size):
+        rows = (
+            DailyTopicRollup.objects.filter(user_id__in=ids[start:start + chunk_size])
+            .values("user_id", "topic", "sub_topic", "difficulty_level")
+            .annotate(**_AGGREGATES)
+            .order_by()
+        )
+        for row in rows:
+            summaries[row.pop("user_id")].rows.append(row)
+    return summaries
@@ -1,3 +1,1352 @@
-from django.test import TestCase
+import csv
+import importlib
+import io
+import json
+import os
+import tempfile
+import threading
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.apps import apps as django_apps
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import LiveServerTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ui.models import MCQ
+from .ai import BUNDLED_MODEL_PATH, MLSuggestionEngine, SuggestionEngine
+from .analytics_cache import check_shared_cache
+from .catalog import rebuild_catalog_stats, upload_page, user_page
+from .export import EXPORT_COLUMNS, iter_export
+from .fields import is_compressed
+from .grading import AnswerKeyCache, answer_key_cache, compare_answers, grade, grade_batch, normalize_answers
+from .history import history_page
+from .history_features import NEXT_TOPIC, iter_history, iter_transitions
+from . import question_search, suggestion_trace, topic_similarity, write_behind
+from .irt import fit_irt, simulate_responses
+from .item_analysis import worst_questions
+from .leaderboard import get_leaderboard, rank_of
+from .load_test import parse_mix, run_load_test
+from .mistakes import review_questions
+from .models import (
+    CatalogStats, CatalogTopicCount, DailyTopicRollup, IndexChange, LeaderboardEntry, Profile, QuestionStats,
+    QuizResult, ReviewState, ScoreSketch, TopicUpload, UserMistake,
+)
+from .replay import ReplaySimulator, RuleBaseline
+from .review_modes import is_review_quiz
+from .sketches import QuantileSketch, get_score_bands, record_sketches
+from .spaced_repetition import due_questions
+from .submissions import MAX_BATCH_SIZE, build_quiz_result, save_results
+from .summary import get_user_summary
+from .training import build_training_set, label_transition
+
+
+class CompressedJSONFieldTests(TestCase):
+    def _raw(self, pk):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT questions_data, user_answers FROM quiz_results WHERE id = %s", [pk])
+            return cursor.fetchone()
+
+    def test_legacy_plaintext_rows_decode_and_recompress(self):
+        user = Profile.objects.create(username="legacy", password="x")
+        questions = [{"id": 1, "question": "Why?", "correct_answer": "A"}]
+        result = QuizResult.objects.create(
+            user=user, topic="Python", difficulty_level="Easy", total_questions=1, correct_answers=1,
+            score_percentage=100.0, questions_data=questions, user_answers=["A"],
+        )
+        self.assertTrue(all(is_compressed(raw) for raw in self._raw(result.id)))
+
+        # Rows written before the column was converted hold plain JSON text
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE quiz_results SET questions_data = %s, user_answers = %s WHERE id = %s",
+                [json.dumps(questions), b'["A"]', result.id],
+            )
+        self.assertFalse(any(is_compressed(raw) for raw in self._raw(result.id)))
+        result.refresh_from_db()
+        self.assertEqual((result.questions_data, result.user_answers), (questions, ["A"]))
+
+        out = io.StringIO()
+        call_command("recompress_quiz_results", "--batch-size", "1", stdout=out)
+        self.assertIn("Rows recompressed:  1", out.getvalue())
+        self.assertTrue(all(is_compressed(raw) for raw in self._raw(result.id)))
+        result.refresh_from_db()
+        self.assertEqual((result.questions_data, result.user_answers), (questions, ["A"]))
+
+        out = io.StringIO()
+        call_command("recompress_quiz_results", stdout=out)
+        self.assertIn("Rows recompressed:  0", out.getvalue())
+
+
+class GradingTests(TestCase):
+    def setUp(self):
+        answer_key_cache.invalidate()
+        self.user = Profile.objects.create(username="grace", password="x")
+        self.mcqs = [
+            MCQ.objects.create(topic=topic, difficulty_level=difficulty, question=f"{topic} {difficulty} {i}?",
+                               option_a="a", option_b="b", option_c="c", option_d="d", correct_answer="ABCD"[i])
+            for topic, difficulty in (("Python", "Easy"), ("Python", "Hard"), ("SQL", "Hard"))
+            for i in range(3)
+        ]
+
+    def submit(self, topic, difficulty, mcqs, answers):
+        session = self.client.session
+        session["user_id"] = self.user.id
+        session.save()
+        return self.client.post(reverse("submit_quiz_result"), {
+            "topic": topic, "difficulty_level": difficulty, "time_taken": 60,
+            "questions": [{"id": m.id, "question": m.question} for m in mcqs], "user_answers": answers,
+        }, content_type="application/json")
+
+    def test_normalize_and_compare_answers(self):
+        self.assertEqual(normalize_answers({"0": "a", 2: " c "}, 3), ["A", "", "C"])
+        self.assertEqual(normalize_answers(["b"], 3), ["B", "", ""])
+        self.assertEqual(normalize_answers(["a", "b", "c"], 2), ["A", "B"])
+        self.assertEqual(normalize_answers(None, 2), ["", ""])
+        # Blank answers never match, not even a blank (unknown) key
+        self.assertEqual(compare_answers(["A", "", "C", ""], ["A", "B", "D", ""]).tolist(), [True, False, False, False])
+
+    def test_answers_other_than_a_single_letter_never_count(self):
+        self.assertEqual(normalize_answers(["abc", "Apple", " d ", "E", 1, "A B"], 6), ["", "", "D", "", "", ""])
+        self.assertEqual(compare_answers(["ABC", "A"], ["A", "A"]).tolist(), [False, True])
+        ids = [m.id for m in self.mcqs[:3]]
+        graded = grade(ids, ["Apple", "BCD", "c"])
+        self.assertEqual((graded.correct_answers, graded.correct_mask), (1, [False, False, True]))
+        self.assertEqual(grade_batch([(ids, ["ABC", "B", "C"])], answer_key_cache.get_many(ids)), [(2, 3, 66.67)])
+
+    def test_entries_fetched_survive_a_concurrent_eviction(self):
+        cache = AnswerKeyCache()
+        lock, releases = threading.Lock(), []
+
+        class EvictAfterFill:
+            # Another thread empties the cache right after the misses are stored
+            def __enter__(self):
+                lock.acquire()
+
+            def __exit__(self, *exc):
+                lock.release()
+                releases.append(1)
+                if len(releases) == 2:
+                    cache.invalidate()
+
+        cache._lock = EvictAfterFill()
+        ids = [m.id for m in self.mcqs[:3]]
+        self.assertEqual(cache.get_entries(ids), {m.id: (m.correct_answer, "Python", "Easy") for m in self.mcqs[:3]})
+
+    def test_answer_key_cache_and_batch_grading(self):
+        ids = [m.id for m in self.mcqs[:3]]
+        with self.assertNumQueries(1):
+            graded = grade(ids, ["A", "x", "C"])
+        with self.assertNumQueries(0):
+            self.assertEqual(grade(ids, ["A", "x", "C"]), graded)
+        self.assertEqual((graded.correct_answers, graded.score_percentage), (2, 66.67))
+        self.assertEqual(graded.answer_key, ["A", "B", "C"])
+        self.assertEqual(grade_batch([(ids, ["A", "x", "C"]), ([], [])], answer_key_cache.get_many(ids)),
+                         [(2, 3, 66.67), (0, 0, 0.0)])
+
+        # Saving an MCQ drops its cached key; a zero TTL always re-reads
+        self.mcqs[0].correct_answer = "D"
+        self.mcqs[0].save()
+        self.assertEqual(grade(ids, ["A", "x", "C"]).correct_answers, 1)
+        fresh = AnswerKeyCache(ttl=0)
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                fresh.get_many(ids)
+
+    def test_submissions_must_match_topic_and_difficulty(self):
+        easy, hard, sql = self.mcqs[0:3], self.mcqs[3:6], self.mcqs[6:9]
+        response = self.submit("Python", "Easy", easy, ["A", "B", "A"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["correct_answers"], 2)
+
+        for topic, difficulty, mcqs in [
+            ("Python", "Hard", [hard[0]] * 3),  # one known question repeated
+            ("Python", "Hard", easy),
+            ("Python", "Hard", hard[:2] + sql[:1]),
+            ("Python", "Mixed", easy),
+        ]:
+            response = self.submit(topic, difficulty, mcqs, ["A", "B", "C"])
+            self.assertEqual(response.status_code, 400, (topic, difficulty))
+        self.assertEqual(self.submit("Python", "Easy", easy[:1] + [MCQ(id=999999)], ["A", "A"]).status_code, 400)
+
+        # Review quizzes legitimately mix topics and levels
+        self.assertEqual(self.submit("Mistake Review", "Mixed", [easy[0], sql[0]], ["A", "A"]).status_code, 200)
+        self.assertEqual(QuizResult.objects.filter(user=self.user).count(), 2)
+
+    def test_regrade_applies_answer_key_corrections(self):
+        result, _ = build_quiz_result(self.user, {
+            "topic": "Python", "difficulty_level": "Easy", "time_taken": 30,
+            "questions": [{"id": m.id} for m in self.mcqs[:3]], "user_answers": ["A", "A", "C"],
+        })
+        save_results([result])
+        self.assertEqual(result.correct_answers, 2)
+
+        MCQ.objects.filter(id=self.mcqs[1].id).update(correct_answer="A")  # fix a miskeyed question
+        call_command("regrade_quiz_results", "--dry-run", stdout=io.StringIO())
+        result.refresh_from_db()
+        self.assertEqual(result.correct_answers, 2)
+
+        call_command("regrade_quiz_results", stdout=io.StringIO())
+        result.refresh_from_db()
+        self.assertEqual((result.correct_answers, result.score_percentage), (3, 100.0))
+        self.assertEqual([q["correct_answer"] for q in result.questions_data], ["A", "A", "C"])
+
+
+class BatchSubmissionTests(TestCase):
+    def setUp(self):
+        answer_key_cache.invalidate()
+        self.user = Profile.objects.create(username="hank", password="x")
+        self.mcqs = [
+            MCQ.objects.create(topic=topic, difficulty_level="Easy", question=f"{topic}?",
+                               option_a="a", option_b="b", option_c="c", option_d="d", correct_answer="A")
+            for topic in ("Python", "SQL")
+        ]
+        session = self.client.session
+        session["user_id"] = self.user.id
+        session.save()
+
+    def payload(self, mcq, answer="A", **extra):
+        return {"topic": mcq.topic, "difficulty_level": "Easy", "time_taken": 30,
+                "questions": [{"id": mcq.id}], "user_answers": [answer], **extra}
+
+    def post(self, data):
+        return self.client.post(reverse("submit_quiz_results_batch"), data, content_type="application/json")
+
+    def test_valid_items_are_saved_and_invalid_ones_reported_by_index(self):
+        python, sql = self.mcqs
+        response = self.post({"results": [
+            self.payload(python),
+            {"topic": "Python", "difficulty_level": "Easy"},  # no time_taken
+            self.payload(sql, answer="B"),
+            self.payload(python, questions=[{"id": python.id}, {"id": python.id}]),
+            "not an object",
+            self.payload(python, questions=[], user_answers=[]),
+        ]})
+        body = response.json()
+        self.assertEqual((body["saved"], body["failed"]), (2, 4))
+        self.assertEqual([item["success"] for item in body["results"]], [True, False, True, False, False, False])
+        self.assertIn("time_taken", body["results"][1]["error"])
+        self.assertIn("once", body["results"][3]["error"])
+        self.assertIn("at least one", body["results"][5]["error"])
+
+        saved = {r.id: r for r in QuizResult.objects.filter(user=self.user)}
+        self.assertEqual(saved[body["results"][0]["result_id"]].score_percentage, 100.0)
+        self.assertEqual(saved[body["results"][2]["result_id"]].topic, "SQL")
+
+        self.assertEqual(self.post({"results": []}).status_code, 400)
+        self.assertEqual(self.post({"results": [self.payload(python)] * (MAX_BATCH_SIZE + 1)}).status_code, 400)
+        self.assertEqual(self.client.post(reverse("submit_quiz_results_batch"), "{", content_type="application/json").status_code, 400)
+
+    def test_batch_endpoint_requires_the_csrf_token(self):
+        self.client = self.client_class(enforce_csrf_checks=True)
+        session = self.client.session
+        session["user_id"] = self.user.id
+        session.save()
+        data = {"results": [self.payload(self.mcqs[0])]}
+        self.assertEqual(self.post(data).status_code, 403)
+
+        self.client.get(reverse("login"))  # sets the csrftoken cookie
+        token = self.client.cookies["csrftoken"].value
+        response = self.client.post(reverse("submit_quiz_results_batch"), data, content_type="application/json",
+                                    HTTP_X_CSRFTOKEN=token)
+        self.assertEqual(response.json()["saved"], 1)
+
+    def test_ids_map_back_without_returning_rows_even_for_identical_timestamps(self):
+        python, sql = self.mcqs
+        same_time = timezone.now()
+        results = [
+            build_quiz_result(self.user, self.payload(mcq, answer=answer))[0]
+            for mcq, answer in ((python, "A"), (sql, "B"), (python, "C"))
+        ]
+        for result in results:
+            result.date_taken = same_time
+        # Emulate MySQL, which can't return ids from a multi-row insert
+        with mock.patch.object(type(connection.features), "can_return_rows_from_bulk_insert", False):
+            save_results(results)
+        self.assertEqual(len({r.pk for r in results}), 3)
+        for result in results:
+            stored = QuizResult.objects.get(pk=result.pk)
+            self.assertEqual((stored.topic, stored.user_answers), (result.topic, result.user_answers))
+
+
+class WriteBehindTests(TestCase):
+    def setUp(self):
+        spool_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(spool_dir.cleanup)
+        self.config = {**write_behind.get_config(), "SPOOL_PATH": f"{spool_dir.name}/spool.sqlite3",
+                       "START_THREAD": False, "BATCH_SIZE": 2, "CLAIM_TIMEOUT": 60.0}
+        self.buffer = write_behind.WriteBehindBuffer(self.config)
+        self.user = Profile.objects.create(username="ivy", password="x")
+
+    def submit(self, count):
+        for i in range(count):
+            self.buffer.submit(QuizResult(
+                user=self.user, topic="Python", sub_topic="", difficulty_level="Easy", total_questions=10,
+                correct_answers=i, score_percentage=i * 10.0, time_taken=timedelta(seconds=60),
+                questions_data=[], user_answers=[],
+            ))
+
+    def test_claims_are_exclusive_until_released_or_stale(self):
+        self.submit(3)
+        spool = self.buffer.spool
+        token, rows = spool.claim(2, claim_timeout=60.0)
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(len(spool.claim(5, claim_timeout=60.0)[1]), 1)
+        self.assertEqual(spool.claim(5, claim_timeout=60.0)[1], [])
+
+        spool.release(token)
+        token, rows = spool.claim(5, claim_timeout=60.0)
+        self.assertEqual(len(rows), 2)
+        # A claim older than the timeout is taken over
+        self.assertEqual(len(spool.claim(5, claim_timeout=-1.0)[1]), 3)
+        spool.delete(token)
+        self.assertEqual(spool.depth(), 3)
+
+    def test_flush_saves_each_submission_once(self):
+        self.submit(3)
+        with mock.patch("base.submissions.save_results", side_effect=RuntimeError("db down")):
+            with self.assertRaises(RuntimeError):
+                self.buffer.flush_once()
+        self.assertEqual(self.buffer.metrics()["flush_errors"], 1)
+        self.assertEqual(len(self.buffer.spool.claim(5, claim_timeout=60.0)[1]), 3)  # released on failure
+
+        # A slow flusher saved its batch but its claim went stale before the delete
+        self.buffer.config["CLAIM_TIMEOUT"] = -1.0
+        token, rows = self.buffer.spool.claim(2, claim_timeout=-1.0)
+        save_results([write_behind._deserialize(payload) for _, payload, _ in rows])
+
+        self.assertEqual(self.buffer.drain(), 3)
+        self.assertEqual(self.buffer.spool.depth(), 0)
+        self.assertEqual(QuizResult.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(sorted(QuizResult.objects.values_list("correct_answers", flat=True)), [0, 1, 2])
+        metrics = self.buffer.metrics()
+        self.assertEqual((metrics["flushed"], metrics["duplicates_skipped"]), (1, 2))
+
+    def test_poison_row_is_retried_alone_then_quarantined(self):
+        self.buffer.config.update(BATCH_SIZE=3, MAX_ATTEMPTS=2)
+        self.submit(1)
+        # Fails every insert (NOT NULL topic), like a row whose user was deleted
+        self.buffer.submit(QuizResult(user=self.user, topic=None, sub_topic="", difficulty_level="Easy",
+                                      total_questions=10, correct_answers=0, score_percentage=0.0,
+                                      questions_data=[], user_answers=[]))
+        self.submit(2)
+
+        # The batch fails; its good rows are saved one by one around the poison row
+        self.assertEqual(self.buffer.flush_once(), 2)
+        self.assertEqual(QuizResult.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(self.buffer.flush_once(), 2)  # poison row (attempt 2) quarantined, last row saved
+        metrics = self.buffer.metrics()
+        self.assertEqual((metrics["flushed"], metrics["quarantined"]), (3, 1))
+        self.assertEqual((metrics["queue_depth"], metrics["dead_letter_depth"]), (0, 1))
+        self.assertEqual(QuizResult.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(self.buffer.drain(), 0)
+
+        self.assertEqual(self.buffer.spool.requeue_dead_letters(), 1)
+        self.assertEqual((self.buffer.spool.depth(), self.buffer.spool.dead_letter_depth()), (1, 0))
+
+
+class ItemAnalysisTests(TestCase):
+    def test_stats_are_labelled_with_the_questions_own_topic(self):
+        user = Profile.objects.create(username="jack", password="x")
+        mcq = MCQ.objects.create(topic="SQL", difficulty_level="Hard", question="?",
+                                 option_a="a", option_b="b", option_c="c", option_d="d", correct_answer="A")
+        # Saved under another quiz's topic, as legacy and review results are
+        save_results([
+            QuizResult(user=user, topic="Python", sub_topic="", difficulty_level="Easy", total_questions=1,
+                       correct_answers=0, score_percentage=score, date_taken=timezone.now() - timedelta(minutes=i),
+                       questions_data=[{"id": mcq.id, "correct_answer": "A"}], user_answers=[answer])
+            for i, (answer, score) in enumerate([("B", 0.0)] * 5 + [("A", 100.0)])
+        ])
+        stats = QuestionStats.objects.get(mcq=mcq)
+        self.assertEqual((stats.topic, stats.difficulty_level, stats.times_served), ("SQL", "Hard", 6))
+        self.assertEqual([q["mcq_id"] for q in worst_questions(topic="SQL")], [mcq.id])
+        self.assertEqual(worst_questions(topic="Python"), [])
+
+        mcq.topic = "Databases"
+        mcq.save()
+        self.assertEqual(QuestionStats.objects.get(mcq=mcq).topic, "Databases")
+        call_command("rebuild_question_stats", stdout=io.StringIO())
+        stats = QuestionStats.objects.get(mcq=mcq)
+        self.assertEqual((stats.topic, stats.times_correct, stats.picks_b), ("Databases", 1, 5))
+
+    def test_questions_without_a_topic_are_labelled_blank(self):
+        user = Profile.objects.create(username="kit", password="x")
+        untitled, moved = [
+            MCQ.objects.create(topic=topic, difficulty_level="Easy", question="?",
+                               option_a="a", option_b="b", option_c="c", option_d="d", correct_answer="A")
+            for topic in (None, "SQL")
+        ]
+        save_results([QuizResult(
+            user=user, topic="Python", sub_topic="", difficulty_level="Easy", total_questions=2, correct_answers=1,
+            score_percentage=50.0, questions_data=[{"id": untitled.id, "correct_answer": "A"},
+                                                   {"id": moved.id, "correct_answer": "A"}],
+            user_answers=["A", "B"],
+        )])
+        self.assertEqual(QuestionStats.objects.get(mcq=untitled).topic, "")
+
+        moved.topic = None
+        moved.save()
+        self.assertEqual(QuestionStats.objects.get(mcq=moved).topic, "")
+        QuestionStats.objects.update(topic="stale")
+        call_command("rebuild_question_stats", stdout=io.StringIO())
+        self.assertEqual(QuestionStats.objects.filter(topic="").count(), 2)
+
+
+class DailyRollupTests(TestCase):
+    def rollups(self):
+        return sorted(
+            (r.user_id, r.day, r.topic, r.sub_topic, r.difficulty_level, r.quiz_count, round(r.score_sum, 6),
+             r.best_score, round(r.time_seconds, 6), r.last_taken)
+            for r in DailyTopicRollup.objects.all()
+        )
+
+    def test_incremental_rollups_match_backfill(self):
+        users = [Profile.objects.create(username=name, password="x") for name in ("kim", "lee")]
+        start = timezone.now().replace(hour=12) - timedelta(days=3)
+        rows = [
+            # (user, days, minutes, topic, sub_topic, difficulty, score, seconds)
+            (0, 0, 0, "Python", "Loops", "Easy", 40.0, 60),
+            (0, 0, 5, "Python", "Loops", "Easy", 80.0, 45),  # same user/day/topic
+            (0, 0, 9, "Python", None, "Easy", 70.0, None),  # NULL and '' sub-topics share a row
+            (0, 0, 12, "Python", "", "Easy", 90.0, 30),
+            (0, 1, 0, "Python", "Loops", "Easy", 60.0, 50),
+            (0, 1, 3, "SQL", "Joins", "Hard", 20.0, 120),
+            (1, 0, 1, "Python", "Loops", "Easy", 100.0, 20),
+            (1, 0, 2, "Python", "Loops", "Medium", 55.5, 80),
+        ]
+        results = [
+            QuizResult(user=users[u], topic=topic, sub_topic=sub_topic, difficulty_level=difficulty,
+                       total_questions=10, correct_answers=int(score // 10), score_percentage=score,
+                       time_taken=timedelta(seconds=seconds) if seconds else None,
+                       date_taken=start + timedelta(days=days, minutes=minutes), questions_data=[], user_answers=[])
+            for u, days, minutes, topic, sub_topic, difficulty, score, seconds in rows
+        ]
+        # A multi-row batch, a single-row save, then a batch touching existing rows
+        save_results(results[:3])
+        save_results(results[3:4])
+        save_results(results[4:])
+        incremental = self.rollups()
+        self.assertEqual(len(incremental), 6)
+        first = next(r for r in incremental if r[0] == users[0].id and r[2] == "Python" and r[3] == "")
+        self.assertEqual(first[5:9], (2, 160.0, 90.0, 30.0))
+
+        call_command("backfill_daily_rollups", stdout=io.StringIO())
+        self.assertEqual(self.rollups(), incremental)
+
+    def test_migration_backfills_results_saved_before_rollups(self):
+        user = Profile.objects.create(username="mia", password="x")
+        now = timezone.now()
+        # Rows written directly, as results from before the rollup table existed
+        for i, score in enumerate((30.0, 90.0)):
+            QuizResult.objects.create(user=user, topic="Python", sub_topic=None, difficulty_level="Easy",
+                                      total_questions=10, correct_answers=int(score // 10), score_percentage=score,
+                                      time_taken=timedelta(seconds=40), date_taken=now - timedelta(days=i))
+        self.assertEqual(get_user_summary(user.id).total_quizzes, 0)
+
+        migration = importlib.import_module("base.migrations.0007_dailytopicrollup")
+        migration.backfill_daily_rollups(django_apps, None)
+        summary = get_user_summary(user.id)
+        self.assertEqual((summary.total_quizzes, summary.avg_score, summary.best_score), (2, 60.0, 90.0))
+        backfilled = self.rollups()
+        call_command("backfill_daily_rollups", stdout=io.StringIO())
+        self.assertEqual(self.rollups(), backfilled)
+
+
+# The budgets count application queries; with the database cache backend
+# every cache hit would be a query too, so these tests use an in-memory cache.
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class DashboardQueryBudgetTests(TestCase):
+    """The dashboard and analytics pages must not issue more queries as history grows"""
+
+    # session, profile, recent results, user summary, question-bank topics
+    DASHBOARD_QUERIES = 5
+    # session, profile, user summary, question-bank topics
+    ANALYTICS_QUERIES = 4
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = Profile.objects.create(username="alice", password="secret")
+        for topic in ("Python", "Java", "SQL"):
+            for difficulty in ("Easy", "Medium", "Hard"):
+                MCQ.objects.create(
+                    topic=topic, difficulty_level=difficulty, question=f"{topic} {difficulty}?",
+                    option_a="a", option_b="b", option_c="c", option_d="d", correct_answer="A",
+                )
+
+    def setUp(self):
+        cache.clear()
+        session = self.client.session
+        session["user_id"] = self.user.id
+        session.save()
+
+    def _add_results(self, count):
+        now = timezone.now()
+        results = [
+            QuizResult(
+                user=self.user,
+                topic=("Python", "Java")[i % 2],
+                sub_topic="Basics",
+                difficulty_level=("Easy", "Medium", "Hard")[i % 3],
+                total_questions=10,
+                correct_answers=i % 11,
+                score_percentage=(i % 11) * 10.0,
+                time_taken=timedelta(seconds=60),
+                date_taken=now - timedelta(days=i),
+                questions_data=[],
+                user_answers=[],
+            )
+            for i in range(count)
+        ]
+        # Run the on-commit analytics cache invalidation like a real request would
+        with self.captureOnCommitCallbacks(execute=True):
+            save_results(results)
+
+    def test_dashboard_query_budget_is_constant(self):
+        for count in (3, 30):
+            self._add_results(count)
+            with self.assertNumQueries(self.DASHBOARD_QUERIES):
+                response = self.client.get(reverse("userdashboard"))
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["total_quizzes"], 33)
+
+    def test_analytics_query_budget_is_constant(self):
+        for count in (3, 30):
+            self._add_results(count)
+            with self.assertNumQueries(self.ANALYTICS_QUERIES):
+                response = self.client.get(reverse("analytics_data"))
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["best_score"], 100.0)
+
+    def test_suggestions_endpoint_is_read_only_and_csrf_protected(self):
+        self.client = self.client_class(enforce_csrf_checks=True)
+        session = self.client.session
+        session["user_id"] = self.user.id
+        session.save()
+        self.assertEqual(self.client.get(reverse("analytics_suggestions")).status_code, 200)
+        self.assertEqual(self.client.post(reverse("analytics_suggestions")).status_code, 403)
+
+    def test_process_local_cache_is_reported(self):
+        self.assertEqual([w.id for w in check_shared_cache(None)], ["base.W001"])
+        with override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.db.DatabaseCache",
+                                                   "LOCATION": "quiz_cache"}}):
+            self.assertEqual(check_shared_cache(None), [])
+
+    def test_unchanged_analytics_returns_304(self):
+        self._add_results(3)
+        response = self.client.get(reverse("analytics_data"))
+        etag = response["ETag"]
+        with self.assertNumQueries(1):  # session only; payload comes from cache
+            response = self.client.get(reverse("analytics_data"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self._add_results(1)
+        response = self.client.get(reverse("analytics_data"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class AdminCatalogTests(TestCase):
+    """Admin pages read precomputed counters and keyset pages, whatever the catalog size"""
+
+    # auth session, admin user, catalog stats, topic counts, score sketches, first user page
+    DASHBOARD_QUERIES = 6
+    # auth session, admin user, one keyset page
+    PAGE_QUERIES = 3
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser("root", "root@example.com", "pw")
+        self.client.force_login(self.admin)
+
+    def _grow(self, count):
+        start = Profile.objects.count()
+        for i in range(start, start + count):
+            Profile.objects.create(username=f"user{i:03d}", password="x")
+            TopicUpload.objects.create(topic_name=f"Topic {i % 4}", difficulty_level=("Easy", "Hard")[i % 2],
+                                       pdf="pdfs/t.pdf" if i % 3 else "")
+            MCQ.objects.create(topic=f"Topic {i % 4}", difficulty_level="Easy", question=f"Q{i}?",
+                               option_a="a", option_b="b", option_c="c", option_d="d", correct_answer="A")
+
+    def _counters(self):
+        stats = CatalogStats.objects.values(
+            "total_users", "total_uploads", "uploads_with_pdfs", "easy_uploads", "medium_uploads", "hard_uploads",
+        ).get(pk=1)
+        topics = sorted(CatalogTopicCount.objects.values_list("topic", "difficulty_level", "question_count"))
+        return stats, topics
+
+    def test_admin_pages_render_in_constant_queries(self):
+        for count in (3, 40):
+            self._grow(count)
+            cache.clear()  # measure the snapshot rebuild, not a cache hit
+            with self.assertNumQueries(self.DASHBOARD_QUERIES):
+                response = self.client.get(reverse("admindashboard"))
+            self.assertEqual(response.status_code, 200)
+            with self.assertNumQueries(self.PAGE_QUERIES):
+                users = self.client.get(reverse("admin_users"), {"limit": 10}).json()
+            with self.assertNumQueries(self.PAGE_QUERIES):
+                uploads = self.client.get(reverse("admin_topic_uploads"), {"limit": 10}).json()
+            self.assertEqual(len(users["results"]), min(10, Profile.objects.count()))
+            self.assertEqual(len(uploads["results"]), min(10, TopicUpload.objects.count()))
+        self.assertEqual((response.context["total_users"], response.context["total_questions"]), (43, 43))
+        self.assertEqual(len(response.context["users"]), 25)
+        self.assertIsNotNone(response.context["users_next_cursor"])
+
+    def test_signal_counters_match_a_rebuild(self):
+        self._grow(6)
+        mcq = MCQ.objects.filter(topic="Topic 1").first()
+        mcq.topic, mcq.difficulty_level = "Topic 9", "Hard"  # moved to a new topic and level
+        mcq.save()
+        MCQ.objects.filter(topic="Topic 0").first().delete()
+        for mcq in MCQ.objects.filter(topic="Topic 2"):
+            mcq.delete()  # the last question of a topic removes its count row
+        upload = TopicUpload.objects.filter(difficulty_level="Easy", pdf="").first()
+        upload.difficulty_level, upload.pdf = "Medium", "pdfs/new.pdf"
+        upload.save()
+        TopicUpload.objects.filter(difficulty_level="Hard").first().delete()
+        Profile.objects.first().delete()
+
+        stats, topics = self._counters()
+        self.assertEqual(stats["total_users"], 5)
+        self.assertEqual(stats["medium_uploads"], 1)
+        self.assertIn(("Topic 9", "Hard", 1), topics)
+        self.assertNotIn("Topic 2", {topic for topic, _, _ in topics})
+        rebuild_catalog_stats()
+        self.assertEqual(self._counters(), (stats, topics))
+
+    def test_keyset_pages_cover_every_row_once(self):
+        self._grow(7)
+        Profile.objects.create(username="zed", password="x")
+        ids, after = [], None
+        while True:
+            page, after = user_page(after=after, limit=3)
+            ids.extend(u.id for u in page)
+            if after is None:
+                break
+        self.assertEqual(ids, sorted(Profile.objects.values_list("id", flat=True), reverse=True))
+        # A full last page has no next cursor; an exact multiple of the limit ends cleanly
+        self.assertEqual(len(page), 2)
+        self.assertEqual(user_page(limit=8)[1], None)
+
+        first = self.client.get(reverse("admin_users"), {"q": "USER", "limit": 4}).json()
+        second = self.client.get(reverse("admin_users"),
+                                 {"q": "user", "limit": 4, "after": first["next_cursor"]}).json()
+        names = [u["username"] for u in first["results"] + second["results"]]
+        self.assertEqual(names, [f"user{i:03d}" for i in range(6, -1, -1)])
+        self.assertIsNone(second["next_cursor"])
+        self.assertEqual(len(upload_page(search="Topic 1", limit=10)[0]), 2)
+
+
+class LeaderboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        answer_key_cache.invalidate()
+        self.mcqs = {
+            (topic, difficulty): [
+                MCQ.objects.create(topic=topic, difficulty_level=difficulty, question=f"{topic} {i}?",
+                                   option_a="a", option_b="b", option_c="c", option_d="d", correct_answer="A")
+                for i in range(2)
+            ]
+            for topic, difficulty in (("Python", "Easy"), ("SQL", "Easy"))
+        }
+
+    def _result(self, user, score, seconds, mcqs=None, topic="Python", difficulty="Easy", date_taken=None):
+        mcqs = self.mcqs[("Python", "Easy")] if mcqs is None else mcqs
+        return QuizResult(
+            user=user, topic=topic, sub_topic="", difficulty_level=difficulty, total_questions=len(mcqs),
+            correct_answers=int(score / 50), score_percentage=score, time_taken=timedelta(seconds=seconds),
+            date_taken=date_taken or timezone.now(), questions_data=[{"id": m.id} for m in mcqs], user_answers=[],
+        )
+
+    def test_best_attempt_ranks_by_score_then_time(self):
+        alice = Profile.objects.create(username="alice", password="x")
+        bob = Profile.objects.create(username="bob", password="x")
+        save_results([self._result(alice, 80.0, 120), self._result(bob, 80.0, 90)])
+        save_results([self._result(alice, 60.0, 30)])  # worse attempt does not replace the best
+
+        board = get_leaderboard("Python", "Easy")
+        self.assertEqual([e["username"] for e in board["entries"]], ["bob", "alice"])
+        self.assertEqual(board["entries"][1]["attempts"], 2)
+        self.assertEqual(rank_of(alice.id, "Python", "Easy")["rank"], 2)
+
+    def test_review_quizzes_are_not_ranked(self):
+        mallory = Profile.objects.create(username="mallory", password="x")
+        save_results([self._result(mallory, 100.0, 1, topic="Mistake Review", difficulty="Mixed")])
+        self.assertFalse(LeaderboardEntry.objects.exists())
+        call_command("rebuild_leaderboards", stdout=io.StringIO())
+        self.assertFalse(LeaderboardEntry.objects.exists())
+
+    def test_rebuild_matches_incremental_boards(self):
+        users = [Profile.objects.create(username=f"r{i}", password="x") for i in range(3)]
+        start = timezone.now() - timedelta(hours=1)
+        # Two batches so the rebuild has to merge bests across them
+        save_results([self._result(users[i % 3], 50.0 + 10 * (i % 4), 60 + i, date_taken=start + timedelta(minutes=i))
+                      for i in range(7)])
+        save_results([self._result(users[0], 90.0, 40, date_taken=start + timedelta(minutes=8)),
+                      self._result(users[1], 80.0, 61, mcqs=self.mcqs[("SQL", "Easy")], topic="SQL",
+                                   date_taken=start + timedelta(minutes=9))])
+
+        def boards():
+            return sorted(LeaderboardEntry.objects.values_list(
+                "user_id", "topic", "difficulty_level", "best_score", "best_time_seconds", "attempts", "achieved_at",
+            ))
+        incremental = boards()
+        self.assertEqual(len(incremental), 4)
+        out = io.StringIO()
+        call_command("rebuild_leaderboards", "--batch-size", "3", stdout=out)
+        self.assertEqual(boards(), incremental)
+        self.assertIn("Replaced 4 leaderboard rows with 4", out.getvalue())
+
+    def test_rank_agrees_with_board_position_on_ties(self):
+        users = [Profile.objects.create(username=f"tie{i}", password="x") for i in range(4)]
+        start = timezone.now() - timedelta(hours=1)
+        # Same score and time; earlier achievers first, then lower user id
+        save_results([
+            self._result(users[0], 100.0, 60, date_taken=start + timedelta(minutes=5)),
+            self._result(users[1], 100.0, 60, date_taken=start),
+            self._result(users[2], 100.0, 60, date_taken=start),
+            self._result(users[3], 100.0, 30, date_taken=start + timedelta(minutes=9)),
+        ])
+        board = [e["username"] for e in get_leaderboard("Python", "Easy")["entries"]]
+        self.assertEqual(board, ["tie3", "tie1", "tie2", "tie0"])
+        for position, username in enumerate(board, start=1):
+            user = next(u for u in users if u.username == username)
+            self.assertEqual(rank_of(user.id, "Python", "Easy")["rank"], position)
+
+
+class ScoreSketchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.rng = np.random.default_rng(7)
+
+    def _within(self, sketch, values):
+        ordered = sorted(values)
+        for q in (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99):
+            exact = ordered[int(q * (len(ordered) - 1))]
+            self.assertLessEqual(abs(sketch.quantile(q) - exact), sketch.relative_accuracy * exact + 1e-9, q)
+
+    def test_quantiles_within_relative_accuracy_of_exact_percentiles(self):
+        for values in (self.rng.uniform(1, 100, 5000), self.rng.lognormal(5, 1, 5000)):
+            sketch = QuantileSketch()
+            for value in values:
+                sketch.add(value)
+            self._within(sketch, values)
+            self.assertAlmostEqual(sketch.mean, float(np.mean(values)))
+
+    def test_merge_matches_a_single_sketch(self):
+        values = list(self.rng.uniform(0, 100, 3000)) + [0.0] * 50
+        whole, parts = QuantileSketch(), [QuantileSketch() for _ in range(3)]
+        for i, value in enumerate(values):
+            whole.add(value)
+            parts[i % 3].add(value)
+        merged = QuantileSketch.from_dict(parts[0].to_dict())
+        for part in parts[1:]:
+            merged.merge(part)
+        self.assertEqual(merged.buckets, whole.buckets)
+        self.assertEqual((merged.count, merged.zero_count, merged.min, merged.max),
+                         (whole.count, whole.zero_count, whole.min, whole.max))
+        self._within(merged, values)
+        with self.assertRaises(ValueError):
+            merged.merge(QuantileSketch(relative_accuracy=0.05))
+
+    def test_shards_merge_into_one_band(self):
+        user = Profile.objects.create(username="sketcher", password="x")
+        scores = self.rng.uniform(10, 100, 400)
+        results = [
+            QuizResult(user=user, topic="Python", sub_topic="", difficulty_level="Easy", total_questions=10,
+                       correct_answers=5, score_percentage=float(score), time_taken=timedelta(seconds=60 + i),
+                       questions_data=[], user_answers=[])
+            for i, score in enumerate(scores)
+        ]
+        QuizResult.objects.bulk_create(results)
+        for shard, start in enumerate(range(0, len(results), 50)):
+            with mock.patch("base.sketches.random.randrange", return_value=shard % 3):
+                record_sketches(results[start:start + 50])
+        self.assertEqual(ScoreSketch.objects.count(), 3)
+
+        band, = get_score_bands()
+        self.assertEqual(band["count"], len(scores))
+        exact = sorted(scores)[int(0.5 * (len(scores) - 1))]
+        self.assertAlmostEqual(band["score_p50"], exact, delta=0.01 * exact + 0.05)
+
+        # A rebuild folds everything back into a single shard with the same answer
+        call_command("rebuild_score_sketches", stdout=io.StringIO())
+        self.assertEqual(ScoreSketch.objects.get().shard, 0)
+        self.assertEqual(get_score_bands(), [band])
+
+
+class QuizHistoryTests(TestCase):
+    def test_pages_walk_full_history_without_gaps(self):
+        user = Profile.objects.create(username="carol", password="x")
+        same_time = timezone.now()
+        results = [
+            QuizResult(
+                user=user, topic=("Python", "SQL")[i % 2], sub_topic="", difficulty_level="Easy",
+                total_questions=10, correct_answers=5, score_percentage=50.0,
+                # Ties on date_taken must still page deterministically by id
+                date_taken=same_time if i < 4 else same_time - timedelta(days=i),
+                questions_data=[], user_answers=[],
+            )
+            for i in range(12)
+        ]
+        save_results(results)
+
+        seen, cursor = [], None
+        while True:
+            rows, cursor = history_page(user.id, cursor=cursor, limit=5)
+            seen.extend(row["id"] for row in rows)
+            self.assertNotIn("questions_data", rows[0])
+            if cursor is None:
+                break
+        self.assertEqual(len(seen), 12)
+        self.assertEqual(len(set(seen)), 12)
+
+        rows, _ = history_page(user.id, topic="SQL", limit=100)
+        self.assertEqual({row["topic"] for row in rows}, {"SQL"})
+
+    def test_endpoint_is_read_only_and_csrf_protected(self):
+        user = Profile.objects.create(username="dave", password="x")
+        self.client = self.client_class(enforce_csrf_checks=True)
+        session = self.client.session
+        session["user_id"] = user.id
+        session.save()
+        response = self.client.get(reverse("quiz_history"), {"limit": 5})
+        self.assertEqual(response.json(), {"results": [], "next_cursor": None})
+        self.assertEqual(self.client.post(reverse("quiz_history")).status_code, 403)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.user = Profile.objects.create(username="@evil", password="x")
+        questions = [{"id": i, "question": q, "correct_answer": "A"}
+                     for i, q in enumerate(["=HYPERLINK(\"http://x\")", "Plain?", "-2+3?"], start=1)]
+        now = timezone.now()
+        for i in range(5):
+            QuizResult.objects.create(
+                user=self.user, topic="Python", sub_topic="", difficulty_level="Easy", total_questions=3,
+                correct_answers=1, score_percentage=33.3, time_taken=timedelta(seconds=30),
+                date_taken=now - timedelta(minutes=i),
+                # The last result has no stored questions and exports one bare row
+                questions_data=questions if i < 4 else [], user_answers=["a", "B", ""] if i < 4 else [],
+            )
+
+    def export(self, fmt, chunk_size):
+        return "".join(iter_export(QuizResult.objects.all(), fmt, chunk_size))
+
+    def test_jsonl_rows_span_batch_boundaries(self):
+        stats = {}
+        # 5 results in batches of 2: three full or partial batches and one empty read
+        with self.assertNumQueries(4):
+            text = "".join(iter_export(QuizResult.objects.all(), "jsonl", chunk_size=2, stats=stats))
+        rows = [json.loads(line) for line in text.splitlines()]
+        self.assertEqual(stats, {"results": 5, "rows": 13})
+        self.assertEqual(len(rows), 13)
+        self.assertTrue(all(list(row) == EXPORT_COLUMNS for row in rows))
+        self.assertEqual(sorted({row["result_id"] for row in rows}),
+                         sorted(QuizResult.objects.values_list("id", flat=True)))
+        first = rows[0]
+        self.assertEqual((first["question"], first["user_answer"], first["is_correct"]),
+                         ('=HYPERLINK("http://x")', "A", True))
+        self.assertEqual(rows[-1]["question_index"], None)
+        self.assertEqual(self.export("jsonl", 1000), text)
+
+    def test_csv_header_rows_and_formula_escaping(self):
+        rows = list(csv.DictReader(io.StringIO(self.export("csv", 2))))
+        self.assertEqual(len(rows), 13)
+        self.assertEqual(list(rows[0]), EXPORT_COLUMNS)
+        self.assertEqual(rows[0]["username"], "'@evil")
+        self.assertEqual([row["question"] for row in rows[:3]], ["'=HYPERLINK(\"http://x\")", "Plain?", "'-2+3?"])
+        self.assertEqual((rows[0]["score_percentage"], rows[1]["is_correct"]), ("33.3", "False"))
+
+    def test_endpoint_is_admin_only_and_streams(self):
+        url = reverse("admin_export_results")
+        self.assertEqual(self.client.get(url).status_code, 403)
+        session = self.client.session
+        session["user_id"] = self.user.id
+        session.save()
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.force_login(User.objects.create_superuser("root", "root@example.com", "pw"))
+        self.assertEqual(self.client.get(url, {"format": "xml"}).status_code, 400)
+        response = self.client.get(url, {"topic": "Python"})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn('filename="quiz_results.csv"', response["Content-Disposition"])
+        text = b"".join(response.streaming_content).decode()
+        self.assertEqual(text, self.export("csv", 2000))
+        response = self.client.get(url, {"format": "jsonl", "topic": "SQL"})
+        self.assertEqual(b"".join(response.streaming_content), b"")
+
+
+class MistakeReviewTests(TestCase):
+    def test_missed_questions_feed_review_until_answered_correctly(self):
+        user = Profile.objects.create(username="dave", password="x")
+        mcqs = [
+            MCQ.objects.create(
+                topic=topic, difficulty_level="Easy", question=f"{topic}?",
+                option_a="a", option_b="b", option_c="c", option_d="d", correct_answer="A",
+            )
+            for topic in ("Python", "SQL", "Java")
+        ]
+
+        def result(answers, minutes_ago):
+            return QuizResult(
+                user=user, topic="Python", sub_topic="", difficulty_level="Easy", total_questions=3,
+                correct_answers=0, score_percentage=0.0, date_taken=timezone.now() - timedelta(minutes=minutes_ago),
+                questions_data=[{"id": m.id, "correct_answer": "A"} for m in mcqs], user_answers=answers,
+            )
+
+        save_results([result(["B", "", "A"], 10), result(["C", "B", "A"], 5)])
+        self.assertEqual(review_questions(user.id), [mcqs[0], mcqs[1]])
+
+        save_results([result(["A", "B", "A"], 0)])
+        with self.assertNumQueries(1):
+            self.assertEqual(review_questions(user.id), [mcqs[1]])
+        def mistakes():
+            return list(UserMistake.objects.order_by("mcq_id").values_list(
+                "mcq_id", "times_missed", "last_missed", "outstanding"))
+        incremental = mistakes()
+        call_command("rebuild_mistakes", "--batch-size", "1", stdout=io.StringIO())
+        self.assertEqual(mistakes(), incremental)
+
+        session = self.client.session
+        session["user_id"] = user.id
+        session.save()
+        response = self.client.get(reverse("quiz"), {"mode": "review"})
+        self.assertEqual(response.context["topic"], "Mistake Review")
+        self.assertEqual(response.context["total_questions"], 1)
+
+    def test_review_quizzes_stay_out_of_per_topic_stats(self):
+        user = Profile.objects.create(username="dave", password="x")
+        mcq = MCQ.objects.create(
+            topic="Python", difficulty_level="Easy", question="?",
+            option_a="a", option_b="b", option_c="c", option_d="d", correct_answer="A",
+        )
+        save_results([QuizResult(
+            user=user, topic="Mistake Review", sub_topic="", difficulty_level="Mixed", total_questions=1,
+            correct_answers=0, score_percentage=0.0, time_taken=timedelta(seconds=30),
+            questions_data=[{"id": mcq.id, "correct_answer": "A"}], user_answers=["B"],
+        )])
+
+        self.assertEqual(review_questions(user.id), [mcq])
+        for command in (None, "backfill_daily_rollups", "rebuild_leaderboards", "rebuild_score_sketches",
+                        "rebuild_question_stats"):
+            if command:
+                call_command(command, stdout=io.StringIO())
+            for model in (LeaderboardEntry, ScoreSketch, QuestionStats):
+                self.assertFalse(model.objects.exists(), model.__name__)
+            # Counted in the dashboard totals, like the recent-results list, but not per topic
+            summary = get_user_summary(user.id)
+            self.assertEqual((summary.total_quizzes, summary.total_time_str), (1, "0m"))
+            self.assertEqual((summary.topic_stats(), summary.has_history), ({}, False))
+            self.assertEqual(summary.chart_data()["topic_performance"]["topics"], [])
+
+        suggestions = SuggestionEngine().get_multiple_suggestions(user)
+        self.assertNotIn("Mistake Review", {s.topic for s in suggestions})
+
+
+class SpacedRepetitionTests(TestCase):
+    def test_reviews_follow_sm2_schedule(self):
+        user = Profile.objects.create(username="erin", password="x")
+        mcq = MCQ.objects.create(
+            topic="Python", difficulty_level="Easy", question="?",
+            option_a="a", option_b="b", option_c="c", option_d="d", correct_answer="A",
+        )
+        start = timezone.now() - timedelta(days=30)
+
+        def review(answer, day):
+            save_results([QuizResult(
+                user=user, topic="Python", sub_topic="", difficulty_level="Easy", total_questions=1,
+                correct_answers=0, score_percentage=0.0, date_taken=start + timedelta(days=day),
+                questions_data=[{"id": mcq.id, "correct_answer": "A"}], user_answers=[answer],
+            )])
+            return ReviewState.objects.get(user=user, mcq=mcq)
+
+        self.assertEqual(review("A", 0).interval_days, 1.0)
+        self.assertEqual(review("A", 1).interval_days, 6.0)
+        state = review("B", 7)  # a miss resets the streak
+        self.assertEqual((state.repetitions, state.interval_days), (0, 1.0))
+        self.assertLess(state.ease_factor, 2.5)
+        self.assertEqual(state.due_at, start + timedelta(days=8))
+
+        self.assertEqual(due_questions(user.id), [mcq])
+        self.assertEqual(due_questions(user.id, now=start + timedelta(days=7, hours=12)), [])
+
+        # Due-mode quizzes schedule reviews but stay out of per-topic stats
+        topics = set(get_user_summary(user.id).topic_stats())
+        save_results([QuizResult(
+            user=user, topic="Spaced Review", sub_topic="", difficulty_level="Mixed", total_questions=1,
+            correct_answers=1, score_percentage=100.0, date_taken=start + timedelta(days=9),
+            questions_data=[{"id": mcq.id, "correct_answer": "A"}], user_answers=["A"],
+        )])
+        self.assertEqual(ReviewState.objects.get(user=user, mcq=mcq).repetitions, 1)
+        def states():
+            return list(ReviewState.objects.values_list(
+                "ease_factor", "interval_days", "repetitions", "last_reviewed", "due_at"))
+        incremental = states()
+        call_command("rebuild_review_states", "--batch-size", "2", stdout=io.StringIO())
+        self.assertEqual(states(), incremental)
+        self.assertEqual(set(get_user_summary(user.id).topic_stats()), topics)
+        self.assertFalse(LeaderboardEntry.objects.filter(topic="Spaced Review").exists())
+        self.assertTrue(is_review_quiz("Spaced Review", "Easy"))
+
+
+class IRTCalibrationTests(TestCase):
+    def test_fit_recovers_simulated_item_difficulty(self):
+        matrix, _, difficulty, _ = simulate_responses(n_users=400, n_items=40, n_responses=20000, seed=3)
+        fit = fit_irt(matrix, "2PL")
+        self.assertTrue(fit.converged)
+        self.assertGreater(np.corrcoef(fit.difficulty, difficulty[matrix.mcq_ids])[0, 1], 0.9)
+
+
+class ReplayTests(TestCase):
+    def test_transitions_use_only_prior_history(self):
+        user = Profile.objects.create(username="frank", password="x")
+        start = timezone.now() - timedelta(days=10)
+        attempts = [("Python", "Easy", 90.0), ("Python", "Easy", 50.0), ("Python", "Medium", 70.0), ("SQL", "Easy", 80.0)]
+        save_results([
+            QuizResult(user=user, topic=topic, sub_topic="", difficulty_level=difficulty, total_questions=10,
+                       correct_answers=int(score / 10), score_percentage=score,
+                       date_taken=start + timedelta(days=i), questions_data=[], user_answers=[])
+            for i, (topic, difficulty, score) in enumerate(attempts)
+        ])
+
+        transitions = list(iter_transitions(iter_history(chunk_size=2)))
+        self.assertEqual([t[3] for t in transitions], [0, 1, NEXT_TOPIC])
+        self.assertEqual([t[4] for t in transitions], [50.0, 70.0, 80.0])
+        # After the second attempt: two Easy quizzes averaging 70, first taken a day earlier
+        features = transitions[1][0]
+        self.assertEqual(features[:2].tolist(), [2.0, 70.0])
+        self.assertEqual(features[8], 1.0)
+
+        report = ReplaySimulator({"rules": RuleBaseline()}, batch_size=2).run(transitions)
+        self.assertEqual(report["models"][0]["decisions"], 3)
+
+
+class HistoryTrainingTests(TestCase):
+    def test_labels_correct_failed_next_steps(self):
+        self.assertEqual(label_transition("Easy", 1, 85.0), 1)  # stepped up and did well
+        self.assertEqual(label_transition("Easy", 1, 40.0), 0)  # stepped up too early
+        self.assertEqual(label_transition("Medium", NEXT_TOPIC, 30.0), 1)  # left the topic too early
+
+    def test_reservoir_keeps_a_fixed_size_sample(self):
+        features = np.zeros(10)
+        transitions = [(features, "Python", "Easy", 0, 90.0, user_id) for user_id in range(1000)]
+        dataset = build_training_set(transitions, capacity=100, validation_fraction=0.2)
+        self.assertEqual(dataset.train.seen + dataset.validation.seen, 1000)
+        self.assertEqual((dataset.train.size, dataset.validation.size), (80, 20))
+
+    def test_saving_writes_the_configured_path_atomically(self):
+        with open(BUNDLED_MODEL_PATH, "rb") as f:
+            bundled = f.read()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = f"{tmp}/models/suggestion_model.pkl"
+            with override_settings(QUIZ_SUGGESTION_MODEL_PATH=path):
+                engine = MLSuggestionEngine()  # falls back to the bundled model
+                engine.replace_model(engine.model)
+                self.assertEqual(os.listdir(f"{tmp}/models"), ["suggestion_model.pkl"])
+                self.assertEqual(MLSuggestionEngine().model.get_depth(), engine.model.get_depth())
+
+            with open(f"{tmp}/blocker", "w"):
+                pass
+            with override_settings(QUIZ_SUGGESTION_MODEL_PATH=f"{tmp}/blocker/suggestion_model.pkl"):
+                self._history()
+                with self.assertRaisesRegex(CommandError, "Could not save the model"):
+                    call_command("train_suggestion_model", "--save", "--force", stdout=io.StringIO())
+        with open(BUNDLED_MODEL_PATH, "rb") as f:
+            self.assertEqual(f.read(), bundled)
+
+    def _history(self):
+        start = timezone.now() - timedelta(days=30)
+        results = []
+        for u in range(10):
+            user = Profile.objects.create(username=f"learner{u}", password="x")
+            for i in range(8):
+                results.append(QuizResult(
+                    user=user, topic="Python", sub_topic="", difficulty_level=("Easy", "Medium", "Hard")[i % 3],
+                    total_questions=10, correct_answers=5 + i % 5, score_percentage=50.0 + 10 * (i % 5),
+                    time_taken=timedelta(seconds=90), date_taken=start + timedelta(days=i, minutes=u),
+                    questions_data=[], user_answers=[],
+                ))
+        save_results(results)
+
+
+class SubTopicSuggestionTests(TestCase):
+    def test_suggestion_points_at_weak_sub_topic(self):
+        user = Profile.objects.create(username="gina", password="x")
+        MCQ.objects.create(
+            topic="Python", sub_topic="Loops", difficulty_level="Easy", question="?",
+            option_a="a", option_b="b", option_c="c", option_d="d", correct_answer="A",
+        )
+        now = timezone.now()
+        save_results([
+            QuizResult(user=user, topic="Python", sub_topic=sub_topic, difficulty_level="Easy", total_questions=10,
+                       correct_answers=int(score / 10), score_percentage=score,
+                       date_taken=now - timedelta(hours=i), questions_data=[], user_answers=[])
+            for i, (sub_topic, score) in enumerate([("Loops", 30.0), ("Loops", 40.0), ("Lists", 90.0), ("Lists", 95.0)])
+        ])
+
+        summary = get_user_summary(user.id)
+        with self.assertNumQueries(1):  # the question-bank topic list only
+            suggestions = SuggestionEngine().get_multiple_suggestions(user, summary=summary)
+        self.assertEqual(suggestions[0].topic, "Python")
+        self.assertEqual(suggestions[0].sub_topic, "Loops")
+        self.assertIn("Loops", suggestions[0].text)
+
+
+class TopicSimilarityTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        index_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(index_dir.cleanup)
+        settings_override = override_settings(QUIZ_INDEX_DIR=index_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def add_mcq(self, topic, question):
+        MCQ.objects.create(topic=topic, difficulty_level="Easy", question=question,
+                           option_a="a", option_b="b", option_c="c", option_d="d", correct_answer="A")
+
+    def test_next_topic_is_nearest_unmastered(self):
+        self.add_mcq("Python Loops", "How does a python for loop iterate over a list?")
+        self.add_mcq("Python Functions", "How does a python function return a list?")
+        self.add_mcq("Baking", "How long should bread dough rise in the oven?")
+        built = topic_similarity.rebuild()
+        self.assertEqual(built.change_id, IndexChange.objects.latest("id").id)
+        engine = SuggestionEngine()
+        self.assertEqual(engine._find_next_topic("Python Loops"), "Python Functions")
+        self.assertEqual(engine._find_next_topic("Python Loops", mastered={"Python Functions"}), "Baking")
+
+        # New questions are logged as changes and indexed on the next lookup, in any process
+        self.add_mcq("Python Classes", "How does a python for loop iterate over a list of objects?")
+        self.assertEqual(list(IndexChange.objects.filter(index=topic_similarity.CHANGE_LOG, id__gt=built.change_id)
+                              .values_list("key", flat=True)), ["Python Classes"])
+        topic_similarity._index = None  # as if another process had saved the file
+        # The lookup serves the saved index and leaves the re-count to a background refresh
+        with mock.patch.object(topic_similarity, "start_background_refresh") as start:
+            self.assertEqual(topic_similarity.get_index().nearest("Python Loops"), "Python Functions")
+        start.assert_called_once()
+        topic_similarity.refresh()
+        self.assertEqual(topic_similarity.get_index().nearest("Python Loops"), "Python Classes")
+        reloaded = topic_similarity.TopicSimilarityIndex.load(topic_similarity.index_path())
+        self.assertEqual(reloaded.change_id, IndexChange.objects.latest("id").id)
+        self.assertEqual(reloaded.nearest("Python Loops"), "Python Classes")
+
+    def test_cold_start_builds_in_the_background(self):
+        self.add_mcq("Python Loops", "How does a python for loop iterate over a list?")
+        topic_similarity._index = None
+        with mock.patch.object(topic_similarity, "start_background_build") as start:
+            self.assertEqual(len(topic_similarity.get_index()), 0)
+            self.assertEqual(len(topic_similarity.refresh(["Python Loops"])), 0)
+        self.assertEqual(start.call_count, 2)
+        self.assertFalse(os.path.exists(topic_similarity.index_path()))
+
+
+class QuestionSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for topic, difficulty, question in [
+            ("Python", "Easy", "What does a python list comprehension return?"),
+            ("Python", "Hard", "Which python keyword defines a generator? A list comprehension uses brackets."),
+            ("Java", "Easy", "What does a java list interface declare?"),
+        ]:
+            MCQ.objects.create(topic=topic, difficulty_level=difficulty, question=question,
+                               option_a="a", option_b="b", option_c="c", option_d="d", correct_answer="A")
+
+    def test_backends_agree_on_filtered_ranked_results(self):
+        fts = question_search.search_questions("List comprehension")
+        self.assertEqual(fts["backend"], "sqlite_fts5")
+        self.assertEqual([r["topic"] for r in fts["results"]], ["Python", "Python"])
+        self.assertNotIn("correct_answer", fts["results"][0])
+
+        index = question_search.build_token_index()
+        hits = index.search(question_search.tokenize("List comprehension"))
+        self.assertEqual([mcq_id for mcq_id, _ in hits], [r["id"] for r in fts["results"]])
+        self.assertEqual(len(index.search(["list"], topic="Python", difficulty="Hard")), 1)
+
+        # Inserts are searchable straight away; edits replace the old text
+        mcq = MCQ.objects.create(topic="Java", difficulty_level="Easy", question="A java list comprehension?",
+                                 option_a="a", option_b="b", option_c="c", option_d="d", correct_answer="A")
+        self.assertEqual(len(question_search.search_questions("comprehension", topic="Java")["results"]), 1)
+        index_rows = question_search.index_rows
+        index_rows(index, MCQ.objects.filter(id__gt=index.last_id))
+        self.assertEqual(len(index.search(["comprehension"], topic="Java")), 1)
+        mcq.question = "A java stream?"
+        mcq.save()
+        self.assertEqual(question_search.search_questions("comprehension", topic="Java")["results"], [])
+        index.remove(mcq.id)
+        index_rows(index, MCQ.objects.filter(id=mcq.id))
+        self.assertEqual(index.search(["comprehension"], topic="Java"), [])
+        self.assertEqual(index.compact().search(["stream"]), [(mcq.id, index.search(["stream"])[0][1])])
+
+    def test_token_index_applies_changes_logged_by_any_process(self):
+        index_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(index_dir.cleanup)
+        settings_override = override_settings(QUIZ_INDEX_DIR=index_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        fts_patch = mock.patch.object(question_search, "uses_sqlite_fts", return_value=False)
+        fts_patch.start()
+        self.addCleanup(fts_patch.stop)
+        question_search._index = None
+
+        # Nothing saved yet: the search comes back empty while a build runs in the background
+        with mock.patch.object(question_search, "start_background_build") as start:
+            self.assertEqual(question_search.search_questions("list")["results"], [])
+        start.assert_called_once()
+        self.assertFalse(os.path.exists(question_search.index_path()))
+        question_search.rebuild()
+
+        index = question_search.get_token_index()
+        with self.assertNumQueries(2):  # up to date: no rebuild, no copy
+            self.assertIs(question_search.get_token_index(), index)
+
+        mcq = MCQ.objects.get(topic="Java")
+        mcq.question = "What does a java stream return?"
+        mcq.save()
+        self.assertTrue(IndexChange.objects.filter(index=question_search.CHANGE_LOG, key=str(mcq.id)).exists())
+        question_search._index = None  # another process: only the file and the change log are shared
+        self.assertEqual([r["id"] for r in question_search.search_questions("stream")["results"]], [mcq.id])
+        self.assertEqual(len(index.search(["interface"])), 1)  # the saved copy is never changed in place
+
+        reloaded = question_search.TokenIndex.load(question_search.index_path())
+        self.assertEqual(reloaded.change_id, IndexChange.objects.latest("id").id)
+        self.assertEqual(reloaded.search(["interface"]), [])
+        self.assertEqual(os.listdir(index_dir.name), ["question_search.pkl"])
+
+
+class SuggestionTraceTests(TestCase):
+    def test_calls_are_traced_into_a_bounded_buffer(self):
+        suggestion_trace.reset(capacity=2)
+        user = Profile.objects.create(username="hal", password="x")
+        MCQ.objects.create(topic="Python", difficulty_level="Easy", question="?",
+                           option_a="a", option_b="b", option_c="c", option_d="d", correct_answer="A")
+        save_results([QuizResult(user=user, topic="Python", difficulty_level="Easy", total_questions=10,
+                                 correct_answers=5, score_percentage=50.0, questions_data=[], user_answers=[])])
+        engine = SuggestionEngine()
+        engine.get_multiple_suggestions(user, summary=get_user_summary(user.id))
+        engine.recommend(user)
+        engine.recommend(user)
+
+        dump = suggestion_trace.dump()
+        self.assertEqual(dump["buffered"], 2)  # the oldest call was overwritten
+        latest = dump["traces"][0]
+        self.assertEqual(latest["method"], "recommend")
+        self.assertEqual({"history", "focus_topic", "features", "predict"} - set(latest["phases_ms"]), set())
+        self.assertEqual(latest["predictions"][0]["topic"], "Python")
+        self.assertEqual(len(latest["predictions"][0]["features"]), 10)
+        self.assertEqual(dump["histograms"]["recommend"]["total"]["count"], 2)
+
+        admin = User.objects.create_superuser("root", password="x")
+        self.client.force_login(admin)
+        response = self.client.get(reverse("admin_suggestion_traces"), {"method": "recommend", "limit": 1})
+        self.assertEqual(len(response.json()["traces"]), 1)
+
+        # The command traces every entry point, batches included, and prints recent traces by default
+        out = io.StringIO()
+        call_command("trace_suggestions", "--json", stdout=out)
+        dump = json.loads(out.getvalue())
+        self.assertEqual({t["method"] for t in dump["traces"]},
+                         {"get_multiple_suggestions", "recommend", "batch_suggestions"})
+        batch = next(t for t in dump["traces"] if t["method"] == "batch_suggestions")
+        self.assertEqual((batch["users"], batch["user_id"]), (1, None))
+        self.assertIn("predict", batch["phases_ms"])
+        out = io.StringIO()
+        call_command("trace_suggestions", "--json", "--traces", "0", stdout=out)
+        self.assertNotIn("traces", json.loads(out.getvalue()))
+
+
+class BatchSuggestionTests(TestCase):
+    def test_batch_matches_per_user_suggestions_with_constant_queries(self):
+        for topic in ("Python", "Java", "Rust"):
+            MCQ.objects.create(topic=topic, sub_topic="Basics", difficulty_level="Easy", question="?",
+                               option_a="a", option_b="b", option_c="c", option_d="d", correct_answer="A")
+        users = [Profile.objects.create(username=f"class{i}", password="x") for i in range(6)]
+        now = timezone.now()
+        save_results([
+            QuizResult(user=user, topic=topic, sub_topic=sub_topic, difficulty_level=difficulty, total_questions=10,
+                       correct_answers=int(score / 10), score_percentage=score,
+                       date_taken=now - timedelta(hours=j), questions_data=[], user_answers=[])
+            for i, user in enumerate(users[1:], start=1)
+            for j, (topic, sub_topic, difficulty, score) in enumerate([
+                ("Python", "Loops", "Easy", 30.0 + 10 * i), ("Python", "Lists", "Easy", 95.0),
+                ("Java", "Basics", ["Easy", "Medium", "Hard"][i % 3], 50.0 + 8 * i),
+            ] * i)
+        ])
+
+        engine = SuggestionEngine()
+        ids = [user.id for user in users] + [999999]
+        with self.assertNumQueries(3):  # profiles, grouped rollups, topic list
+            batch = engine.batch_suggestions(ids)
+        self.assertEqual(list(batch), ids[:-1])
+        for user in users:
+            expected = engine.get_multiple_suggestions(user, summary=get_user_summary(user.id))
+            self.assertEqual([s.to_dict() for s in batch[user.id]], [s.to_dict() for s in expected])
+
+        admin = User.objects.create_superuser("teacher", password="x")
+        self.client.force_login(admin)
+        response = self.client.post(reverse("batch_suggestions"), {"user_ids": ids}, content_type="application/json")
+        self.assertEqual(response.json()["missing"], [999999])
+        self.assertEqual(len(response.json()["suggestions"][str(users[0].id)]), 3)
+
+    def test_endpoint_requires_the_csrf_token(self):
+        self.client = self.client_class(enforce_csrf_checks=True)
+        self.client.force_login(User.objects.create_superuser("teacher", password="x"))
+        url = reverse("batch_suggestions")
+        user = Profile.objects.create(username="solo", password="x")
+        payload = {"user_ids": [user.id]}
+        self.assertEqual(self.client.post(url, payload, content_type="application/json").status_code, 403)
+
+        self.client.get(reverse("admindashboard"))  # sets the csrftoken cookie
+        token = self.client.cookies["csrftoken"].value
+        response = self.client.post(url, payload, content_type="application/json", HTTP_X_CSRFTOKEN=token)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(str(user.id), response.json()["suggestions"])
+
+
+class SeedLoadTestDataTests(TestCase):
+    def seed(self, *extra):
+        call_command("seed_load_test_data", "--users", "4", "--results", "40", "--topics", "2", "--sub-topics", "2",
+                     "--questions", "3", "--skip-derived", *extra, stdout=io.StringIO())
+        return list(QuizResult.objects.order_by("user__username", "date_taken").values_list(
+            "user__username", "topic", "sub_topic", "difficulty_level", "score_percentage",
+        ))
+
+    def test_seeding_is_deterministic_and_payloads_grade_consistently(self):
+        first = self.seed()
+        self.assertEqual(len(first), 40)
+        self.assertEqual(self.seed("--flush"), first)
+        self.assertEqual(Profile.objects.count(), 4)
+
+        result = QuizResult.objects.order_by("id").first()
+        keys = [q["correct_answer"] for q in result.questions_data]
+        self.assertEqual(sum(a == k for a, k in zip(result.user_answers, keys)), result.correct_answers)
+
+
+class LoadTestHarnessTests(LiveServerTestCase):
+    def test_one_client_runs_every_journey_step_against_the_live_server(self):
+        Profile.objects.create(username="seed_user0", password="loadtest")
+        MCQ.objects.bulk_create([
+            MCQ(topic="Python", sub_topic="Loops", difficulty_level=level, question=f"Q{i}?",
+                option_a="a", option_b="b", option_c="c", option_d="d", correct_answer="A")
+            for level in ("Easy", "Medium", "Hard") for i in range(3)
+        ])
+        with self.assertRaises(ValueError):
+            parse_mix("dashboard=1,nope=2")
+
+        mix = parse_mix("dashboard,analytics,quiz,api_quiz,submit=3")
+        report = run_load_test(self.live_server_url, ["seed_user0"], "loadtest", clients=1,
+                               duration=None, steps_per_client=30, mix=mix, seed=1)
+        self.assertEqual(report["failed_logins"], [])
+        self.assertEqual(report["errors"], 0)
+        self.assertEqual(report["endpoints"]["login"]["statuses"], {"302": 1})
+        self.assertTrue({"dashboard", "analytics-data", "quiz", "ui/api/quiz", "submit-quiz-result"}
+                        <= set(report["endpoints"]))
+        submitted = report["endpoints"]["submit-quiz-result"]["count"]
+        self.assertEqual(QuizResult.objects.filter(user__username="seed_user0").count(), submitted)
+        self.assertLessEqual(report["endpoints"]["dashboard"]["p50_ms"], report["endpoints"]["dashboard"]["p99_ms"])
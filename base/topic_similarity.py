@@ -0,0 +1,240 @@
+from __future__ import annotations
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import os
+import pickle
+import threading
+import numpy as np
+from scipy import sparse
+from django.conf import settings
+from django.db import connection
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+from . import index_changes
+
+CHANGE_LOG = "topic_similarity"  # IndexChange.index for changed topics
+NEIGHBOURS = 20  # nearest topics kept per topic
+N_FEATURES = 2 ** 18
+
+
+def index_path() -> str:
+    index_dir = getattr(settings, 'QUIZ_INDEX_DIR', os.path.join(settings.BASE_DIR, 'indexes'))
+    return os.path.join(str(index_dir), 'topic_similarity.pkl')
+
+
+# Hashed term counts keep each topic's vector stable as the vocabulary grows,
+# so only changed topics need to be re-read from the question bank.
+_vectorizer = HashingVectorizer(
+    n_features=N_FEATURES, alternate_sign=False, norm=None, stop_words='english',
+)
+
+
+class TopicSimilarityIndex:
+    """
+    TF-IDF cosine similarity between topics, computed from their MCQ text.
+
+    Raw term counts are stored per topic; refreshing a topic re-counts only
+    that topic and then recomputes IDF weights and each topic's nearest
+    neighbours across the (small) topics x topics matrix.
+    """
+
+    def __init__(self):
+        self.counts: Dict[str, sparse.csr_matrix] = {}
+        self.neighbours: Dict[str, List[Tuple[str, float]]] = {}
+        self.change_id = 0  # newest IndexChange folded in
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def update(self, topic_texts: Dict[str, Optional[Iterable[str]]]):
+        """Replace term counts for these topics (``None`` or no text removes the topic)"""
+        for topic, texts in topic_texts.items():
+            texts = list(texts or [])
+            if not texts:
+                self.counts.pop(topic, None)
+                continue
+            counts = _vectorizer.transform(texts).sum(axis=0)
+            self.counts[topic] = sparse.csr_matrix(counts)
+        self._recompute()
+
+    def _recompute(self):
+        # Built aside and swapped in, so concurrent lookups see old or new, never half
+        topics = sorted(self.counts)
+        if len(topics) < 2:
+            self.neighbours = {topic: [] for topic in topics}
+            return
+        weights = TfidfTransformer(sublinear_tf=True).fit_transform(
+            sparse.vstack([self.counts[t] for t in topics])
+        )
+        # Rows are L2-normalised, so the dot product is the cosine similarity
+        similarity = (weights @ weights.T).toarray()
+        np.fill_diagonal(similarity, -1.0)
+        keep = min(NEIGHBOURS, len(topics) - 1)
+        neighbours = {}
+        for i, topic in enumerate(topics):
+            nearest = np.argpartition(-similarity[i], keep - 1)[:keep]
+            nearest = nearest[np.argsort(-similarity[i][nearest])]
+            neighbours[topic] = [(topics[j], round(float(similarity[i][j]), 4)) for j in nearest]
+        self.neighbours = neighbours
+
+    def nearest(self, topic: str, exclude: Optional[Set[str]] = None) -> Optional[str]:
+        """Most similar topic not in ``exclude``: a dict lookup plus a short scan"""
+        for other, _ in self.neighbours.get(topic, ()):
+            if not exclude or other not in exclude:
+                return other
+        return None
+
+    def save(self, path: str):
+        index_changes.write_pickle(
+            {'counts': self.counts, 'neighbours': self.neighbours, 'change_id': self.change_id}, path,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "TopicSimilarityIndex":
+        index = cls()
+        with open(path, 'rb') as f:
+            data = pickle.load(f)
+        index.counts = data['counts']
+        index.neighbours = data['neighbours']
+        index.change_id = data.get('change_id', 0)
+        return index
+
+
+def topic_texts(topics: Optional[Iterable[str]] = None) -> Dict[str, List[str]]:
+    """Question and option text per topic, streamed from the question bank"""
+    from ui.models import MCQ
+
+    queryset = MCQ.objects.exclude(topic__isnull=True).exclude(topic='')
+    if topics is not None:
+        topics = list(topics)
+        queryset = queryset.filter(topic__in=topics)
+    texts: Dict[str, List[str]] = {topic: [] for topic in topics or []}
+    rows = queryset.values_list('topic', 'question', 'option_a', 'option_b', 'option_c', 'option_d')
+    for topic, *parts in rows.iterator(chunk_size=2000):
+        texts.setdefault(topic, []).append(' '.join(p for p in parts if p))
+    return texts
+
+
+# Process-wide copy, reloaded when another process rewrites the file
+_index: Optional[TopicSimilarityIndex] = None
+_index_mtime: Optional[float] = None
+_lock = threading.Lock()
+_building = False  # a background build is running in this process
+
+
+def mark_dirty(*topics: Optional[str]):
+    index_changes.record(CHANGE_LOG, topics)
+
+
+def rebuild() -> TopicSimilarityIndex:
+    """Build the index from the whole question bank and persist it"""
+    global _index, _index_mtime
+    # Taken before reading, so edits made during the build are applied after it
+    change_id = index_changes.latest(CHANGE_LOG)
+    index = TopicSimilarityIndex()
+    index.update(topic_texts())
+    index.change_id = change_id
+    path = index_path()
+    with _lock:
+        index.save(path)
+        _index, _index_mtime = index, os.path.getmtime(path)
+    index_changes.prune(CHANGE_LOG, change_id)
+    return index
+
+
+def _load() -> Optional[TopicSimilarityIndex]:
+    # Caller holds _lock
+    global _index, _index_mtime
+    try:
+        mtime = os.path.getmtime(index_path())
+    except OSError:
+        mtime = None
+    if mtime is None:
+        _index = None
+    elif _index is None or mtime != _index_mtime:
+        _index, _index_mtime = TopicSimilarityIndex.load(index_path()), mtime
+    return _index
+
+
+def _run_in_background(work):
+    global _building
+    try:
+        work()
+    except Exception as e:
+        print(f"Topic similarity update failed: {e}")
+    finally:
+        connection.close()
+        with _lock:
+            _building = False
+
+
+def _start_in_background(work, name: str):
+    # One build or refresh at a time per process
+    global _building
+    with _lock:
+        if _building:
+            return
+        _building = True
+    threading.Thread(target=_run_in_background, args=(work,), name=name, daemon=True).start()
+
+
+def start_background_build():
+    """Build the index on a daemon thread unless one is already running here"""
+    _start_in_background(rebuild, "topic-similarity-build")
+
+
+def start_background_refresh():
+    """Apply pending topic changes on a daemon thread unless one is already running here"""
+    _start_in_background(refresh, "topic-similarity-refresh")
+
+
+def get_index() -> TopicSimilarityIndex:
+    """
+    The current index, loaded from disk once per process. Topics whose
+    questions changed since the last save are re-counted in the background
+    while this index keeps being served. Until the first build
+    (``rebuild_topic_similarity``) this is empty and a build is started in
+    the background rather than run inside the request.
+    """
+    with _lock:
+        index = _load()
+    if index is None:
+        start_background_build()
+        return TopicSimilarityIndex()
+    if index_changes.has_pending(CHANGE_LOG, index.change_id):
+        start_background_refresh()
+    return index
+
+
+def refresh(topics: Iterable[str] = ()) -> TopicSimilarityIndex:
+    """Re-count topics changed since the last save, plus ``topics``, and persist the index"""
+    global _index, _index_mtime
+    with _lock:
+        index = _load()
+    if index is None:
+        # Nothing to refresh yet; a partial index must not be saved as the whole one
+        start_background_build()
+        return TopicSimilarityIndex()
+    change_id, changed = index_changes.pending(CHANGE_LOG, index.change_id)
+    changed |= set(topics)
+    if not changed:
+        return index
+    # Updated aside and swapped in, so lookups keep using the served index meanwhile
+    updated = TopicSimilarityIndex()
+    updated.counts = dict(index.counts)
+    updated.update(topic_texts(changed))
+    updated.change_id = change_id
+    path = index_path()
+    with _lock:
+        updated.save(path)
+        _index, _index_mtime = updated, os.path.getmtime(path)
+    return updated
+
+
+# Signal handlers (connected in BaseConfig.ready); runs after catalog.mcq_pre_save
+
+def mcq_post_save(sender, instance, created, **kwargs):
+    old = getattr(instance, "_catalog_old", None)
+    mark_dirty(instance.topic, old[0] if old else None)
+
+
+def mcq_post_delete(sender, instance, **kwargs):
+    mark_dirty(instance.topic)
@@ -0,0 +1,102 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable
+import numpy as np
+from sklearn.base import clone
+from .history_features import ACTIONS, DIFFICULTY_INDEX, N_FEATURES, NEXT_TOPIC, Transition
+from .replay import PASS_SCORE
+
+
+def label_transition(prev_difficulty: str, action: int, next_score: float) -> int:
+    """
+    Training label for one decision: what the user did next if it went well,
+    otherwise the step they should have taken instead.
+    """
+    if next_score >= PASS_SCORE:
+        return action
+    if action == NEXT_TOPIC:
+        # Moved on too early: stay on the topic at the level just played
+        return DIFFICULTY_INDEX.get(prev_difficulty, 0)
+    return max(0, action - 1)  # Stepped up too far: one level easier
+
+
+class Reservoir:
+    """Fixed-size uniform sample of labelled rows in preallocated arrays"""
+
+    def __init__(self, capacity: int, rng: np.random.Generator):
+        self.X = np.zeros((capacity, N_FEATURES))
+        self.y = np.zeros(capacity, dtype=np.int64)
+        self.capacity = capacity
+        self.seen = 0
+        self._rng = rng
+
+    def add(self, features: np.ndarray, label: int):
+        if self.seen < self.capacity:
+            slot = self.seen
+        else:
+            slot = int(self._rng.integers(0, self.seen + 1))
+        self.seen += 1
+        if slot < self.capacity:
+            self.X[slot] = features
+            self.y[slot] = label
+
+    @property
+    def size(self) -> int:
+        return min(self.seen, self.capacity)
+
+    def arrays(self):
+        return self.X[:self.size], self.y[:self.size]
+
+
+@dataclass
+class TrainingSet:
+    train: Reservoir
+    validation: Reservoir
+
+    def label_counts(self) -> Dict[str, int]:
+        _, y = self.train.arrays()
+        return {action: int(n) for action, n in zip(ACTIONS, np.bincount(y, minlength=len(ACTIONS)))}
+
+
+def build_training_set(transitions: Iterable[Transition], capacity: int = 500_000,
+                       validation_fraction: float = 0.2, seed: int = 42) -> TrainingSet:
+    """
+    Label streamed transitions into train/validation reservoirs.
+
+    Users are split between the two sets by id so no user's history leaks
+    across; memory is fixed by ``capacity`` whatever the history size.
+    """
+    rng = np.random.default_rng(seed)
+    validation_capacity = max(1, int(capacity * validation_fraction))
+    dataset = TrainingSet(
+        train=Reservoir(capacity - validation_capacity, rng),
+        validation=Reservoir(validation_capacity, rng),
+    )
+    buckets = 1000
+    cutoff = int(buckets * validation_fraction)
+    for features, _, prev_difficulty, action, next_score, user_id in transitions:
+        # Multiplicative hash so consecutive ids spread across both sets
+        target = dataset.validation if (user_id * 2654435761) % 2 ** 32 % buckets < cutoff else dataset.train
+        target.add(features, label_transition(prev_difficulty, action, next_score))
+    return dataset
+
+
+def train_model(base_model, dataset: TrainingSet) -> Dict[str, Any]:
+    """Fit a fresh copy of ``base_model`` on the training reservoir and score it on validation"""
+    X, y = dataset.train.arrays()
+    if not len(y):
+        raise ValueError("No labelled transitions to train on")
+    model = clone(base_model)
+    model.fit(X, y)
+    return {
+        "model": model,
+        "train_accuracy": float((model.predict(X) == y).mean()),
+        "validation_accuracy": accuracy(model, dataset.validation),
+    }
+
+
+def accuracy(model, reservoir: Reservoir):
+    X, y = reservoir.arrays()
+    if not len(y):
+        return None
+    return float((np.asarray(model.predict(X)) == y).mean())
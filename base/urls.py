@@ -11,10 +11,22 @@ urlpatterns = [
     path('admin-logout/', views.admin_logout_view, name='admin_logout'),
     path('userdashboard/', views.dashboard_view, name='userdashboard'),
     path('admindashboard/', views.admin_dashboard_view, name='admindashboard'),
+    path('admin-users/', views.admin_users_view, name='admin_users'),
+    path('admin-topic-uploads/', views.admin_topic_uploads_view, name='admin_topic_uploads'),
     path('upload-topic/', views.upload_topic_view, name='upload_topic'),
     path('user-topic/', views.user_topic_view, name='user_topic'),
     path('quiz/', views.quiz_view, name='quiz'),
     path('submit-quiz-result/', views.submit_quiz_result, name='submit_quiz_result'),
+    path('submit-quiz-results/batch/', views.submit_quiz_results_batch, name='submit_quiz_results_batch'),
+    path('write-behind-metrics/', views.write_behind_metrics_view, name='write_behind_metrics'),
+    path('admin-export-results/', views.admin_export_results_view, name='admin_export_results'),
+    path('admin-suggestion-traces/', views.suggestion_traces_view, name='admin_suggestion_traces'),
+    path('question-stats/', views.question_stats_view, name='question_stats'),
     path('quiz-details/<int:quiz_id>/', views.quiz_details_view, name='quiz_details'),
+    path('quiz-history/', views.quiz_history_view, name='quiz_history'),
+    path('search-questions/', views.search_questions_view, name='search_questions'),
+    path('leaderboard/', views.leaderboard_view, name='leaderboard'),
     path('analytics-data/', views.analytics_data_view, name='analytics_data'),
+    path('analytics-suggestions/', views.analytics_suggestions_view, name='analytics_suggestions'),
+    path('batch-suggestions/', views.batch_suggestions_view, name='batch_suggestions'),
 ]
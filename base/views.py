@@ -2,7 +2,7 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import authenticate, login, logout
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 import json
@@ -15,7 +15,20 @@ import random
 from datetime import timedelta, datetime
 from django.db import models
 from django.utils import timezone
-from .ai import SuggestionEngine
+from .ai import MAX_BATCH_USERS, SuggestionEngine
+from . import suggestion_trace, topic_similarity, write_behind
+from .item_analysis import worst_questions
+from .leaderboard import get_leaderboard, get_my_rank
+from .mistakes import REVIEW_DIFFICULTY, REVIEW_TOPIC, review_questions
+from .question_search import search_questions
+from .catalog import ADMIN_PAGE_SIZE, get_catalog_snapshot, upload_page, user_page
+from .history import history_page
+from .export import EXPORT_FORMATS, export_queryset, iter_export, parse_bound
+from .sketches import get_score_bands
+from .spaced_repetition import DUE_DIFFICULTY, DUE_TOPIC, due_questions
+from .summary import get_user_summary
+from .analytics_cache import cached_json_response
+from .submissions import MAX_BATCH_SIZE, SubmissionError, build_quiz_result, save_results, submit_batch
 
 def home_view(request):
     return render(request, "home.html")
@@ -90,88 +103,92 @@ def dashboard_view(request):
         return redirect("login")
     user = Profile.objects.get(id=user_id)
     
-    # Get recent quiz results for this user
-    recent_results = QuizResult.objects.filter(user=user).order_by('-date_taken')[:5]
+    # Get recent quiz results for this user (without the heavy JSON columns)
+    recent_results = list(
+        QuizResult.objects.filter(user=user).defer('questions_data', 'user_answers').order_by('-date_taken')[:5]
+    )
     
-    # Calculate stats
-    total_quizzes = QuizResult.objects.filter(user=user).count()
-    if total_quizzes > 0:
-        avg_score = QuizResult.objects.filter(user=user).aggregate(
-            avg_score=models.Avg('score_percentage')
-        )['avg_score'] or 0
-        best_score = QuizResult.objects.filter(user=user).aggregate(
-            best_score=models.Max('score_percentage')
-        )['best_score'] or 0
-    else:
-        avg_score = 0
-        best_score = 0
-    
-    # Calculate total time spent
-    total_time = QuizResult.objects.filter(user=user).aggregate(
-        total=models.Sum('time_taken')
-    )['total']
-    
-    if total_time:
-        total_minutes = int(total_time.total_seconds() / 60)
-        total_time_str = f"{total_minutes}m"
-    else:
-        total_time_str = "0m"
+    # All header stats and suggestion features come from one summary read
+    summary = get_user_summary(user.id)
     
     # AI-based suggestions for next step (multiple suggestions)
     engine = SuggestionEngine()
-    suggestions = engine.get_multiple_suggestions(user, max_suggestions=3)
+    suggestions = engine.get_multiple_suggestions(user, max_suggestions=3, summary=summary)
 
     context = {
         "user": user,
         "recent_results": recent_results,
-        "total_quizzes": total_quizzes,
-        "avg_score": round(avg_score, 1),
-        "best_score": round(best_score, 1),
-        "total_time_spent": total_time_str,
+        "total_quizzes": summary.total_quizzes,
+        "avg_score": round(summary.avg_score, 1),
+        "best_score": round(summary.best_score, 1),
+        "total_time_spent": summary.total_time_str,
         "ai_suggestions": [s.to_dict() for s in suggestions],
     }
     return render(request, "user_dashboard.html", context)
 
+def _admin_dashboard_context(request):
+    """Catalog counters from the snapshot, score bands and the first page of users"""
+    users, users_next = user_page()
+    return {
+        **get_catalog_snapshot(),
+        "score_bands": get_score_bands(),
+        "users": users,
+        "users_next_cursor": users_next,
+        "admin_username": request.user.username,
+    }
+
 def admin_dashboard_view(request):
     # Check if user is authenticated as superuser
     if not request.user.is_authenticated or not request.user.is_superuser:
         messages.error(request, "Access denied. Admin authentication required.")
         return redirect("admin")
     
-    # Get MCQ topics with question counts for display
-    from django.db.models import Count
-    mcq_topics = MCQ.objects.values('topic', 'difficulty_level').annotate(
-        question_count=Count('id')
-    ).order_by('topic', 'difficulty_level')
-    
-    # Get all data for admin dashboard
-    topics = TopicUpload.objects.all().order_by('-id')
-    users = Profile.objects.all().order_by('-id')
-    
-    # Calculate statistics from MCQ table (actual uploaded questions)
-    total_topics = MCQ.objects.values('topic').distinct().count()
-    total_users = users.count()
-    topics_with_pdfs = topics.filter(pdf__isnull=False).count()
-    
-    # Get difficulty distribution from MCQ table
-    easy_topics = MCQ.objects.filter(difficulty_level='Easy').values('topic').distinct().count()
-    medium_topics = MCQ.objects.filter(difficulty_level='Medium').values('topic').distinct().count()
-    hard_topics = MCQ.objects.filter(difficulty_level='Hard').values('topic').distinct().count()
-    
-    context = {
-        "topics": topics,
-        "mcq_topics": mcq_topics,
-        "users": users,
-        "total_topics": total_topics,
-        "total_users": total_users,
-        "topics_with_pdfs": topics_with_pdfs,
-        "easy_topics": easy_topics,
-        "medium_topics": medium_topics,
-        "hard_topics": hard_topics,
-        "admin_username": request.user.username,
-    }
-    
-    return render(request, "admin_dashboard.html", context)
+    return render(request, "admin_dashboard.html", _admin_dashboard_context(request))
+
+def _cursor_args(request):
+    after = request.GET.get('after')
+    limit = request.GET.get('limit', ADMIN_PAGE_SIZE)
+    return (int(after) if after else None), max(1, min(int(limit), 100))
+
+def admin_users_view(request):
+    """Admin-only keyset-paginated user list with username prefix search"""
+    if not request.user.is_authenticated or not request.user.is_superuser:
+        return JsonResponse({'error': 'Admin authentication required'}, status=403)
+    try:
+        after, limit = _cursor_args(request)
+    except ValueError:
+        return JsonResponse({'error': 'after and limit must be integers'}, status=400)
+    users, next_cursor = user_page(request.GET.get('q', '').strip(), after, limit)
+    return JsonResponse({
+        'results': [
+            {'id': u.id, 'username': u.username, 'contact': u.contact, 'gender': u.gender}
+            for u in users
+        ],
+        'next_cursor': next_cursor,
+    })
+
+def admin_topic_uploads_view(request):
+    """Admin-only keyset-paginated TopicUpload list with topic-name prefix search"""
+    if not request.user.is_authenticated or not request.user.is_superuser:
+        return JsonResponse({'error': 'Admin authentication required'}, status=403)
+    try:
+        after, limit = _cursor_args(request)
+    except ValueError:
+        return JsonResponse({'error': 'after and limit must be integers'}, status=400)
+    uploads, next_cursor = upload_page(request.GET.get('q', '').strip(), after, limit)
+    return JsonResponse({
+        'results': [
+            {
+                'id': t.id,
+                'topic_name': t.topic_name,
+                'sub_topic_name': t.sub_topic_name or '',
+                'difficulty_level': t.difficulty_level,
+                'pdf': t.pdf.url if t.pdf else None,
+            }
+            for t in uploads
+        ],
+        'next_cursor': next_cursor,
+    })
 
 
 @csrf_exempt
@@ -216,11 +233,9 @@ def quiz_details_view(request, quiz_id):
         # Get the questions that were in this quiz
         questions_data = []
         if quiz_result.questions_data:
-            # Parse the stored questions data
-            import json
-            print(f"DEBUG: Questions data exists: {quiz_result.questions_data[:100]}...")
-            stored_questions = json.loads(quiz_result.questions_data)
-            user_answers = json.loads(quiz_result.user_answers) if quiz_result.user_answers else {}
+            # Stored questions/answers are decoded by the compressed JSON field
+            stored_questions = quiz_result.questions_data
+            user_answers = quiz_result.user_answers or {}
             print(f"DEBUG: Parsed {len(stored_questions)} questions and {len(user_answers)} answers")
             
             for i, q_data in enumerate(stored_questions):
@@ -306,6 +321,8 @@ def upload_topic_view(request):
                             option_d=mcq["option_d"].strip(),
                             correct_answer=mcq["correct_answer"],
                         )
+                # Re-index the topic now rather than on the next suggestion request
+                topic_similarity.refresh([form.cleaned_data['topic_name'].strip()])
                 
                 messages.success(request, f"Topic '{topic.topic_name}' uploaded successfully with {len(mcqs)} MCQs extracted!")
             else:
@@ -316,35 +333,9 @@ def upload_topic_view(request):
     else:
         form = AdminTopicForm()
 
-    # Get all topics
-    topics = TopicUpload.objects.all().order_by('-id')
-
-    # Split counts by difficulty
-    easy_topics = TopicUpload.objects.filter(difficulty_level="Easy").count()
-    medium_topics = TopicUpload.objects.filter(difficulty_level="Medium").count()
-    hard_topics = TopicUpload.objects.filter(difficulty_level="Hard").count()
-
-    # Total topics
-    total_topics = topics.count()
-
-    # Get all users
-    users = Profile.objects.all()
-    total_users = users.count()
-
-    # Topics with PDFs
-    topics_with_pdfs = TopicUpload.objects.exclude(pdf="").count()
-
     return render(request, "admin_dashboard.html", {
+        **_admin_dashboard_context(request),
         "form": form,
-        "topics": topics,
-        "easy_topics": easy_topics,
-        "medium_topics": medium_topics,
-        "hard_topics": hard_topics,
-        "total_topics": total_topics,
-        "users": users,
-        "total_users": total_users,
-        "topics_with_pdfs": topics_with_pdfs,
-        "admin_username": request.user.username,  # if using auth
     })
 
 
@@ -381,43 +372,63 @@ def quiz_view(request):
         return redirect("login")
     
     topic = request.GET.get('topic')
+    sub_topic = request.GET.get('sub_topic', '')
     difficulty = request.GET.get('difficulty')
     num_questions = int(request.GET.get('num_questions', 10))
     
-    if not topic or not difficulty:
+    if request.GET.get('mode') == 'review':
+        # Mixed-topic quiz of the user's outstanding mistakes
+        selected_questions = review_questions(user_id, limit=num_questions)
+        if not selected_questions:
+            messages.info(request, "No mistakes to review yet. Keep practicing!")
+            return redirect("userdashboard")
+        topic, sub_topic, difficulty = REVIEW_TOPIC, '', REVIEW_DIFFICULTY
+    elif request.GET.get('mode') == 'due':
+        # Spaced-repetition reviews that are due now
+        selected_questions = due_questions(user_id, limit=num_questions)
+        if not selected_questions:
+            messages.info(request, "Nothing is due for review right now. Check back later!")
+            return redirect("userdashboard")
+        topic, sub_topic, difficulty = DUE_TOPIC, '', DUE_DIFFICULTY
+    elif not topic or not difficulty:
         messages.error(request, "Please select both topic and difficulty.")
         return redirect("userdashboard")
-    
-    # Get questions from database
-    questions = MCQ.objects.filter(topic=topic, difficulty_level=difficulty)
-    
-    if questions.count() < num_questions:
-        num_questions = questions.count()
-    
-    if num_questions > 0:
-        # Randomly select questions
-        question_ids = list(questions.values_list('id', flat=True))
-        selected_ids = random.sample(question_ids, num_questions)
-        selected_questions = MCQ.objects.filter(id__in=selected_ids)
-        
-        # Convert to list for JSON serialization
-        questions_list = []
-        for q in selected_questions:
-            questions_list.append({
-                'id': q.id,
-                'question': q.question,
-                'option_a': q.option_a,
-                'option_b': q.option_b,
-                'option_c': q.option_c,
-                'option_d': q.option_d,
-                'correct_answer': q.correct_answer
-            })
     else:
-        questions_list = []
+        # Get questions from database
+        questions = MCQ.objects.filter(topic=topic, difficulty_level=difficulty)
+        if sub_topic:
+            # Focus on the sub-topic when it has questions at this level
+            focused = questions.filter(sub_topic=sub_topic)
+            if focused.exists():
+                questions = focused
+            else:
+                sub_topic = ''
+        
+        if questions.count() < num_questions:
+            num_questions = questions.count()
+        
+        selected_questions = []
+        if num_questions > 0:
+            # Randomly select questions
+            question_ids = list(questions.values_list('id', flat=True))
+            selected_ids = random.sample(question_ids, num_questions)
+            selected_questions = MCQ.objects.filter(id__in=selected_ids)
+    
+    # Convert to list for JSON serialization (answer key stays on the server)
+    questions_list = []
+    for q in selected_questions:
+        questions_list.append({
+            'id': q.id,
+            'question': q.question,
+            'option_a': q.option_a,
+            'option_b': q.option_b,
+            'option_c': q.option_c,
+            'option_d': q.option_d,
+        })
     
     context = {
         'topic': topic,
-        'sub_topic': '',
+        'sub_topic': sub_topic,
         'difficulty': difficulty,
         'total_questions': len(questions_list),
         'questions': json.dumps(questions_list)
@@ -437,102 +448,256 @@ def submit_quiz_result(request):
         data = json.loads(request.body)
         user = Profile.objects.get(id=user_id)
         
-        # Create quiz result with questions and answers data
-        quiz_result = QuizResult.objects.create(
-            user=user,
-            topic=data['topic'],
-            sub_topic=data.get('sub_topic', ''),
-            difficulty_level=data['difficulty_level'],
-            total_questions=data['total_questions'],
-            correct_answers=data['correct_answers'],
-            score_percentage=data['score_percentage'],
-            time_taken=timedelta(seconds=data['time_taken']),
-            questions_data=json.dumps(data.get('questions', [])),
-            user_answers=json.dumps(data.get('user_answers', {}))
-        )
+        # Validate and grade on the server, then save
+        try:
+            quiz_result, graded = build_quiz_result(user, data)
+        except SubmissionError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        
+        if write_behind.is_enabled():
+            # Acknowledge immediately; the background flusher inserts in batches
+            provisional_id = write_behind.get_buffer().submit(quiz_result)
+            return JsonResponse({'success': True, 'queued': True, 'provisional_id': provisional_id, **graded.to_dict()})
+        
+        save_results([quiz_result])
         
-        print(f"DEBUG: Saved quiz result with {len(data.get('questions', []))} questions and {len(data.get('user_answers', {}))} answers")
+        print(f"DEBUG: Saved quiz result with {graded.total_questions} questions, {graded.correct_answers} correct")
         
-        return JsonResponse({'success': True, 'result_id': quiz_result.id})
+        return JsonResponse({'success': True, 'result_id': quiz_result.id, **graded.to_dict()})
     
     except Exception as e:
         print(f"DEBUG: Error saving quiz result: {e}")
         return JsonResponse({'error': str(e)}, status=400)
 
-@csrf_exempt
-def analytics_data_view(request):
-    """API endpoint to get analytics data for charts"""
+@require_http_methods(["POST"])
+def submit_quiz_results_batch(request):
+    """Submit several queued quiz results in one request"""
     user_id = request.session.get('user_id')
     if not user_id:
         return JsonResponse({'error': 'Not authenticated'}, status=401)
     
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    
+    payloads = data.get('results') if isinstance(data, dict) else data
+    if not isinstance(payloads, list) or not payloads:
+        return JsonResponse({'error': "Expected a non-empty 'results' list"}, status=400)
+    if len(payloads) > MAX_BATCH_SIZE:
+        return JsonResponse({'error': f'At most {MAX_BATCH_SIZE} results per batch'}, status=400)
+    
     try:
         user = Profile.objects.get(id=user_id)
-        
-        # Get user's quiz results
-        quiz_results = QuizResult.objects.filter(user=user).order_by('date_taken')
-        
-        # Topic performance data
-        topic_performance = quiz_results.values('topic').annotate(
-            avg_score=Avg('score_percentage'),
-            quiz_count=Count('id')
-        ).order_by('-avg_score')[:6]  # Top 6 topics
-        
-        topic_data = {
-            'topics': [item['topic'] for item in topic_performance],
-            'scores': [float(item['avg_score']) for item in topic_performance]
-        }
-        
-        
-        # Quiz history analytics - topic/subtopic summary
-        quiz_history_analytics = quiz_results.values('topic', 'sub_topic').annotate(
-            quiz_count=Count('id'),
-            avg_score=Avg('score_percentage'),
-            best_score=Max('score_percentage'),
-            latest_date=Max('date_taken')
-        ).order_by('-quiz_count', '-avg_score')
-        
-        # Format quiz history data
-        history_data = []
-        for item in quiz_history_analytics:
-            history_data.append({
-                'topic': item['topic'],
-                'sub_topic': item['sub_topic'] or '',
-                'quiz_count': item['quiz_count'],
-                'avg_score': round(float(item['avg_score']), 1),
-                'best_score': round(float(item['best_score']), 1),
-                'latest_date': item['latest_date'].strftime('%Y-%m-%d')
-            })
-        
-        # Additional stats for the dashboard
-        best_score = quiz_results.aggregate(Max('score_percentage'))['score_percentage__max'] or 0
-        total_time = quiz_results.aggregate(
-            total=models.Sum('time_taken')
-        )['total']
-        
-        # Format total time
-        if total_time:
-            total_minutes = int(total_time.total_seconds() / 60)
-            total_time_str = f"{total_minutes}m"
-        else:
-            total_time_str = "0m"
-        
-        # Include AI suggestions as part of analytics payload for dynamic UI usage
+        items = submit_batch(user, payloads)
+    except Profile.DoesNotExist:
+        return JsonResponse({'error': 'User not found'}, status=404)
+    except Exception as e:
+        print(f"DEBUG: Error saving quiz result batch: {e}")
+        return JsonResponse({'error': str(e)}, status=500)
+    
+    saved = sum(1 for item in items if item['success'])
+    return JsonResponse({
+        'success': saved == len(items),
+        'saved': saved,
+        'failed': len(items) - saved,
+        'results': items,
+    })
+
+@require_http_methods(["POST"])
+def batch_suggestions_view(request):
+    """Admin-only next-step suggestions for a list of users, e.g. a whole class"""
+    if not request.user.is_authenticated or not request.user.is_superuser:
+        return JsonResponse({'error': 'Admin authentication required'}, status=403)
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+
+    user_ids = data.get('user_ids') if isinstance(data, dict) else None
+    if not isinstance(user_ids, list) or not user_ids:
+        return JsonResponse({'error': "Expected a non-empty 'user_ids' list"}, status=400)
+    if len(user_ids) > MAX_BATCH_USERS:
+        return JsonResponse({'error': f'At most {MAX_BATCH_USERS} users per batch'}, status=400)
+    try:
+        user_ids = [int(user_id) for user_id in user_ids]
+        max_suggestions = min(int(data.get('max_suggestions', 3)), 10)
+    except (TypeError, ValueError):
+        return JsonResponse({'error': 'user_ids and max_suggestions must be integers'}, status=400)
+
+    results = SuggestionEngine().batch_suggestions(user_ids, max_suggestions=max_suggestions)
+    return JsonResponse({
+        'suggestions': {
+            str(user_id): [s.to_dict() for s in suggestions] for user_id, suggestions in results.items()
+        },
+        'missing': [user_id for user_id in dict.fromkeys(user_ids) if user_id not in results],
+    })
+
+def write_behind_metrics_view(request):
+    """Admin-only JSON view of the submission write-behind queue"""
+    if not request.user.is_authenticated or not request.user.is_superuser:
+        return JsonResponse({'error': 'Admin authentication required'}, status=403)
+    if not write_behind.is_enabled():
+        return JsonResponse({'enabled': False})
+    return JsonResponse({'enabled': True, **write_behind.get_buffer().metrics()})
+
+def suggestion_traces_view(request):
+    """Admin-only dump of this process's recent suggestion traces and latency histograms"""
+    if not request.user.is_authenticated or not request.user.is_superuser:
+        return JsonResponse({'error': 'Admin authentication required'}, status=403)
+    try:
+        limit = min(int(request.GET.get('limit', 50)), 1000)
+    except ValueError:
+        return JsonResponse({'error': 'limit must be an integer'}, status=400)
+    return JsonResponse(suggestion_trace.dump(method=request.GET.get('method') or None, limit=limit))
+
+def question_stats_view(request):
+    """Admin-only JSON list of the worst-performing questions, optionally per topic"""
+    if not request.user.is_authenticated or not request.user.is_superuser:
+        return JsonResponse({'error': 'Admin authentication required'}, status=403)
+    try:
+        min_served = int(request.GET.get('min_served', 5))
+        limit = min(int(request.GET.get('limit', 20)), 200)
+    except ValueError:
+        return JsonResponse({'error': 'min_served and limit must be integers'}, status=400)
+    topic = request.GET.get('topic') or None
+    return JsonResponse({
+        'topic': topic,
+        'questions': worst_questions(topic=topic, min_served=min_served, limit=limit),
+    })
+
+def admin_export_results_view(request):
+    """Admin-only streaming CSV/JSONL export of quiz results, one row per answered question"""
+    if not request.user.is_authenticated or not request.user.is_superuser:
+        return JsonResponse({'error': 'Admin authentication required'}, status=403)
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return JsonResponse({'error': f"format must be one of {', '.join(EXPORT_FORMATS)}"}, status=400)
+    try:
+        queryset = export_queryset(
+            since=parse_bound(request.GET.get('since')),
+            until=parse_bound(request.GET.get('until')),
+            topic=request.GET.get('topic') or None,
+            user_id=int(request.GET['user']) if request.GET.get('user') else None,
+        )
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    content_type = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    response = StreamingHttpResponse(iter_export(queryset, fmt), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="quiz_results.{fmt}"'
+    return response
+
+def search_questions_view(request):
+    """Ranked full-text search over the question bank; answers are only included for admins"""
+    is_admin = request.user.is_authenticated and request.user.is_superuser
+    if not is_admin and not request.session.get('user_id'):
+        return JsonResponse({'error': 'Not authenticated'}, status=401)
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return JsonResponse({'error': 'q is required'}, status=400)
+    try:
+        limit = int(request.GET.get('limit', 20))
+        offset = int(request.GET.get('offset', 0))
+    except ValueError:
+        return JsonResponse({'error': 'limit and offset must be integers'}, status=400)
+    return JsonResponse(search_questions(
+        query,
+        topic=request.GET.get('topic') or None,
+        difficulty=request.GET.get('difficulty') or None,
+        limit=limit,
+        offset=offset,
+        include_answer=is_admin,
+    ))
+
+def leaderboard_view(request):
+    """Top-K leaderboard for a topic/difficulty, plus the caller's own rank when logged in"""
+    topic = request.GET.get('topic')
+    difficulty = request.GET.get('difficulty')
+    if not topic or not difficulty:
+        return JsonResponse({'error': 'topic and difficulty are required'}, status=400)
+    try:
+        limit = int(request.GET.get('limit', 10))
+    except ValueError:
+        return JsonResponse({'error': 'limit must be an integer'}, status=400)
+    
+    board = get_leaderboard(topic, difficulty, limit)
+    user_id = request.session.get('user_id')
+    if user_id:
+        board = {**board, 'me': get_my_rank(user_id, topic, difficulty)}
+    return JsonResponse(board)
+
+def _analytics_payload(user_id, include_charts=True, include_suggestions=True):
+    """Build the analytics JSON payload; chart data and suggestions share one summary read"""
+    user = Profile.objects.get(id=user_id)
+    summary = get_user_summary(user.id)
+    payload = {}
+    if include_charts:
+        analytics = summary.chart_data()
+        payload.update({
+            'topic_performance': analytics['topic_performance'],
+            'quiz_history_analytics': analytics['quiz_history_analytics'],
+            'best_score': float(summary.best_score),
+            'total_time_spent': summary.total_time_str,
+        })
+    if include_suggestions:
         engine = SuggestionEngine()
-        suggestions = engine.get_multiple_suggestions(user, max_suggestions=3)
+        suggestions = engine.get_multiple_suggestions(user, max_suggestions=3, summary=summary)
+        payload['ai_suggestions'] = [s.to_dict() for s in suggestions]
+    return payload
 
-        response_data = {
-            'topic_performance': topic_data,
-            'quiz_history_analytics': history_data,
-            'best_score': float(best_score),
-            'total_time_spent': total_time_str,
-            'ai_suggestions': [s.to_dict() for s in suggestions],
-        }
+@require_http_methods(["GET"])
+def quiz_history_view(request):
+    """Keyset-paginated quiz history for the logged-in user, newest first"""
+    user_id = request.session.get('user_id')
+    if not user_id:
+        return JsonResponse({'error': 'Not authenticated'}, status=401)
+    try:
+        limit = int(request.GET.get('limit', 20))
+        rows, next_cursor = history_page(
+            user_id,
+            topic=request.GET.get('topic') or None,
+            difficulty=request.GET.get('difficulty') or None,
+            cursor=request.GET.get('cursor') or None,
+            limit=limit,
+        )
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse({'results': rows, 'next_cursor': next_cursor})
 
-        return JsonResponse(response_data)
-        
+def analytics_data_view(request):
+    """API endpoint to get analytics data for charts (pass ?suggestions=0 to skip the model)"""
+    user_id = request.session.get('user_id')
+    if not user_id:
+        return JsonResponse({'error': 'Not authenticated'}, status=401)
+    
+    include_suggestions = request.GET.get('suggestions', '1') not in ('0', 'false')
+    variant = 'full' if include_suggestions else 'charts'
+    try:
+        return cached_json_response(
+            request, user_id, variant,
+            lambda: _analytics_payload(user_id, include_suggestions=include_suggestions),
+        )
     except Profile.DoesNotExist:
         return JsonResponse({'error': 'User not found'}, status=404)
     except Exception as e:
         print(f"DEBUG: Error in analytics_data_view: {e}")
         return JsonResponse({'error': str(e)}, status=500)
+
+@require_http_methods(["GET"])
+def analytics_suggestions_view(request):
+    """API endpoint returning only the AI suggestions, so charts never wait on the model"""
+    user_id = request.session.get('user_id')
+    if not user_id:
+        return JsonResponse({'error': 'Not authenticated'}, status=401)
+    
+    try:
+        return cached_json_response(
+            request, user_id, 'suggestions',
+            lambda: _analytics_payload(user_id, include_charts=False),
+        )
+    except Profile.DoesNotExist:
+        return JsonResponse({'error': 'User not found'}, status=404)
+    except Exception as e:
+        print(f"DEBUG: Error in analytics_suggestions_view: {e}")
+        return JsonResponse({'error': str(e)}, status=500)
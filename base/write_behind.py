@@ -0,0 +1,382 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import timedelta
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from django.conf import settings
+from django.db import InterfaceError, OperationalError, close_old_connections
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import QuizResult
+
+DEFAULTS = {
+    'ENABLED': False,
+    'SPOOL_PATH': os.path.join(settings.BASE_DIR, 'spool', 'quiz_submissions.sqlite3'),
+    'BATCH_SIZE': 200,
+    'FLUSH_INTERVAL': 1.0,
+    # Set to False when a separate `flush_submission_spool --loop` worker drains the spool
+    'START_THREAD': True,
+    # Claims older than this are assumed to belong to a crashed flusher
+    'CLAIM_TIMEOUT': 60.0,
+    # A row that fails this many single-row saves is moved to the dead-letter table
+    'MAX_ATTEMPTS': 5,
+}
+
+# Database unavailable rather than a bad row: keep the batch and retry it whole
+TRANSIENT_ERRORS = (OperationalError, InterfaceError)
+
+
+def get_config() -> Dict[str, Any]:
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, 'QUIZ_WRITE_BEHIND', {}))
+    return config
+
+
+def is_enabled() -> bool:
+    return bool(get_config()['ENABLED'])
+
+
+def _serialize(result: QuizResult) -> str:
+    return json.dumps({
+        'user_id': result.user_id,
+        'topic': result.topic,
+        'sub_topic': result.sub_topic,
+        'difficulty_level': result.difficulty_level,
+        'total_questions': result.total_questions,
+        'correct_answers': result.correct_answers,
+        'score_percentage': result.score_percentage,
+        'time_taken': result.time_taken.total_seconds() if result.time_taken else None,
+        'date_taken': (result.date_taken or timezone.now()).isoformat(),
+        'questions_data': result.questions_data,
+        'user_answers': result.user_answers,
+        'submission_id': str(result.submission_id) if result.submission_id else None,
+    })
+
+
+def _deserialize(payload: str) -> QuizResult:
+    data = json.loads(payload)
+    time_taken = data.pop('time_taken')
+    date_taken = data.pop('date_taken')
+    submission_id = data.pop('submission_id', None)  # absent from rows spooled before it existed
+    return QuizResult(
+        time_taken=timedelta(seconds=time_taken) if time_taken is not None else None,
+        date_taken=parse_datetime(date_taken),
+        submission_id=uuid.UUID(submission_id) if submission_id else None,
+        **data,
+    )
+
+
+class SubmissionSpool:
+    """
+    Durable append-only queue of graded submissions in a local SQLite file.
+
+    Several processes may enqueue and flush concurrently: flushers claim a
+    batch of rows with a short UPDATE before writing them to the main
+    database and delete them afterwards. A claim older than ``CLAIM_TIMEOUT``
+    (crashed or slow flusher) is taken over by another flusher; rows already
+    saved are recognised by their submission id and not written twice.
+    Rows that keep failing are moved to a ``dead_letter`` table in the same
+    file so they stop blocking the rows queued behind them.
+    """
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS spool ('
+                ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+                ' payload TEXT NOT NULL,'
+                ' enqueued_at REAL NOT NULL,'
+                ' claimed_by TEXT,'
+                ' claimed_at REAL,'
+                ' attempts INTEGER NOT NULL DEFAULT 0)'
+            )
+            if 'attempts' not in {column[1] for column in conn.execute('PRAGMA table_info(spool)')}:
+                # Spool files created before failed rows were counted
+                conn.execute('ALTER TABLE spool ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0')
+            conn.execute('CREATE INDEX IF NOT EXISTS spool_claim ON spool (claimed_by, id)')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS dead_letter ('
+                ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+                ' spool_id INTEGER NOT NULL,'
+                ' payload TEXT NOT NULL,'
+                ' enqueued_at REAL NOT NULL,'
+                ' attempts INTEGER NOT NULL,'
+                ' last_error TEXT,'
+                ' failed_at REAL NOT NULL)'
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, result: QuizResult) -> int:
+        conn = self._connect()
+        cursor = conn.execute(
+            'INSERT INTO spool (payload, enqueued_at) VALUES (?, ?)',
+            (_serialize(result), time.time()),
+        )
+        return cursor.lastrowid
+
+    def claim(self, limit: int, claim_timeout: float) -> Tuple[str, List[Tuple[int, str, float]]]:
+        """Claim up to ``limit`` unclaimed (or stale) rows for this flusher"""
+        token = uuid.uuid4().hex
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            'UPDATE spool SET claimed_by = ?, claimed_at = ? WHERE id IN ('
+            ' SELECT id FROM spool WHERE claimed_by IS NULL OR claimed_at < ?'
+            ' ORDER BY id LIMIT ?)',
+            (token, now, now - claim_timeout, limit),
+        )
+        rows = conn.execute(
+            'SELECT id, payload, enqueued_at FROM spool WHERE claimed_by = ? ORDER BY id',
+            (token,),
+        ).fetchall()
+        return token, rows
+
+    def release(self, token: str):
+        self._connect().execute(
+            'UPDATE spool SET claimed_by = NULL, claimed_at = NULL WHERE claimed_by = ?', (token,)
+        )
+
+    def delete(self, token: str):
+        self._connect().execute('DELETE FROM spool WHERE claimed_by = ?', (token,))
+
+    def delete_row(self, row_id: int):
+        self._connect().execute('DELETE FROM spool WHERE id = ?', (row_id,))
+
+    def fail(self, row_id: int, error: str, max_attempts: int) -> bool:
+        """Count a failed save of one row and release it; returns True if it was quarantined"""
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                'UPDATE spool SET attempts = attempts + 1, claimed_by = NULL, claimed_at = NULL WHERE id = ?',
+                (row_id,),
+            )
+            row = conn.execute('SELECT attempts FROM spool WHERE id = ?', (row_id,)).fetchone()
+            quarantined = row is not None and row[0] >= max_attempts
+            if quarantined:
+                conn.execute(
+                    'INSERT INTO dead_letter (spool_id, payload, enqueued_at, attempts, last_error, failed_at)'
+                    ' SELECT id, payload, enqueued_at, attempts, ?, ? FROM spool WHERE id = ?',
+                    (error, time.time(), row_id),
+                )
+                conn.execute('DELETE FROM spool WHERE id = ?', (row_id,))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return quarantined
+
+    def requeue_dead_letters(self) -> int:
+        """Put every quarantined row back on the spool with a fresh attempt count"""
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            cursor = conn.execute(
+                'INSERT INTO spool (payload, enqueued_at) SELECT payload, enqueued_at FROM dead_letter ORDER BY id'
+            )
+            conn.execute('DELETE FROM dead_letter')
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return cursor.rowcount
+
+    def depth(self) -> int:
+        return self._connect().execute('SELECT COUNT(*) FROM spool').fetchone()[0]
+
+    def oldest_age(self) -> float:
+        oldest = self._connect().execute('SELECT MIN(enqueued_at) FROM spool').fetchone()[0]
+        return time.time() - oldest if oldest else 0.0
+
+    def dead_letter_depth(self) -> int:
+        return self._connect().execute('SELECT COUNT(*) FROM dead_letter').fetchone()[0]
+
+
+class WriteBehindBuffer:
+    """Accepts graded submissions into the spool and flushes them in batches"""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = config or get_config()
+        self.spool = SubmissionSpool(self.config['SPOOL_PATH'])
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        # Enqueued since the flusher was last woken; avoids a COUNT(*) per submission
+        self._pending = 0
+        self.stats = {
+            'enqueued': 0,
+            'flushed': 0,
+            'duplicates_skipped': 0,
+            'flush_batches': 0,
+            'flush_errors': 0,
+            'quarantined': 0,
+            'last_flush_seconds': 0.0,
+            'max_flush_seconds': 0.0,
+            'total_flush_seconds': 0.0,
+            'last_queue_latency_seconds': 0.0,
+            'max_queue_latency_seconds': 0.0,
+            'last_error': None,
+        }
+
+    def submit(self, result: QuizResult) -> str:
+        """Durably enqueue ``result`` and return its provisional id"""
+        if result.date_taken is None:
+            result.date_taken = timezone.now()
+        if result.submission_id is None:
+            result.submission_id = uuid.uuid4()
+        spool_id = self.spool.enqueue(result)
+        with self._stats_lock:
+            self.stats['enqueued'] += 1
+            self._pending += 1
+            wake = self._pending >= self.config['BATCH_SIZE']
+            if wake:
+                self._pending = 0
+        if self.config['START_THREAD']:
+            self._ensure_thread()
+            if wake:
+                self._wakeup.set()
+        return f"spool-{spool_id}"
+
+    def flush_once(self) -> int:
+        """Move one claimed batch from the spool into QuizResult; returns rows taken off the spool"""
+        token, rows = self.spool.claim(self.config['BATCH_SIZE'], self.config['CLAIM_TIMEOUT'])
+        if not rows:
+            return 0
+        started = time.perf_counter()
+        quarantined = 0
+        try:
+            flushed, duplicates = self._save_new([_deserialize(payload) for _, payload, _ in rows])
+        except TRANSIENT_ERRORS as e:
+            self.spool.release(token)
+            self._record_error(e)
+            raise
+        except Exception as e:
+            # Usually one bad row (deleted user, corrupt payload): retry the
+            # rows one at a time so the rest of the batch still gets through
+            self._record_error(e)
+            flushed, duplicates, quarantined = self._flush_singly(token, rows)
+            if not flushed + duplicates + quarantined:
+                raise
+        else:
+            self.spool.delete(token)
+
+        elapsed = time.perf_counter() - started
+        queue_latency = time.time() - min(enqueued_at for _, _, enqueued_at in rows)
+        with self._stats_lock:
+            stats = self.stats
+            stats['flushed'] += flushed
+            stats['duplicates_skipped'] += duplicates
+            stats['quarantined'] += quarantined
+            stats['flush_batches'] += 1
+            stats['last_flush_seconds'] = elapsed
+            stats['max_flush_seconds'] = max(stats['max_flush_seconds'], elapsed)
+            stats['total_flush_seconds'] += elapsed
+            stats['last_queue_latency_seconds'] = queue_latency
+            stats['max_queue_latency_seconds'] = max(stats['max_queue_latency_seconds'], queue_latency)
+        return flushed + duplicates + quarantined
+
+    def _save_new(self, results: List[QuizResult]) -> Tuple[int, int]:
+        """Save the results not already in QuizResult; returns (saved, already saved)"""
+        from .submissions import save_results
+
+        # A batch taken over from a stale claim may already be saved; the
+        # unique submission_id also stops two flushers racing on it
+        saved = set(QuizResult.objects.filter(
+            submission_id__in=[r.submission_id for r in results if r.submission_id],
+        ).values_list('submission_id', flat=True))
+        save_results([r for r in results if r.submission_id not in saved])
+        return len(results) - len(saved), len(saved)
+
+    def _flush_singly(self, token: str, rows: List[Tuple[int, str, float]]) -> Tuple[int, int, int]:
+        """Save a failed batch row by row; returns (saved, already saved, quarantined)"""
+        flushed = duplicates = quarantined = 0
+        for row_id, payload, _ in rows:
+            try:
+                saved, skipped = self._save_new([_deserialize(payload)])
+            except TRANSIENT_ERRORS:
+                self.spool.release(token)
+                raise
+            except Exception as e:
+                if self.spool.fail(row_id, f"{type(e).__name__}: {e}", self.config['MAX_ATTEMPTS']):
+                    quarantined += 1
+                    print(f"DEBUG: Write-behind moved spool row {row_id} to the dead-letter table: {e}")
+                continue
+            self.spool.delete_row(row_id)
+            flushed += saved
+            duplicates += skipped
+        return flushed, duplicates, quarantined
+
+    def _record_error(self, error: Exception):
+        with self._stats_lock:
+            self.stats['flush_errors'] += 1
+            self.stats['last_error'] = str(error)
+
+    def drain(self) -> int:
+        total = 0
+        while True:
+            written = self.flush_once()
+            if not written:
+                return total
+            total += written
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='quiz-write-behind', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.config['FLUSH_INTERVAL'])
+            self._wakeup.clear()
+            with self._stats_lock:
+                self._pending = 0
+            close_old_connections()
+            try:
+                self.drain()
+            except Exception as e:
+                print(f"DEBUG: Write-behind flush failed: {e}")
+            finally:
+                close_old_connections()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        batches = stats['flush_batches']
+        stats['avg_flush_seconds'] = stats['total_flush_seconds'] / batches if batches else 0.0
+        stats['queue_depth'] = self.spool.depth()
+        stats['oldest_queued_seconds'] = self.spool.oldest_age()
+        stats['dead_letter_depth'] = self.spool.dead_letter_depth()
+        stats['flusher_running'] = bool(self._thread and self._thread.is_alive())
+        return stats
+
+
+_buffer: Optional[WriteBehindBuffer] = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer() -> WriteBehindBuffer:
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = WriteBehindBuffer()
+    return _buffer
@@ -93,6 +93,43 @@ DATABASES = {
 }
 
 
+# Cache shared by every worker process. Analytics versions, leaderboards, the
+# admin catalog snapshot and the answer-key cache are invalidated through it,
+# so a per-process cache (LocMem, Django's default) leaves other workers
+# serving stale data. Create the table once with
+# `python manage.py createcachetable`; a Redis or Memcached backend works too.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'quiz_cache',
+    }
+}
+
+
+# Write-behind buffering for quiz submissions (see base/write_behind.py).
+# When enabled, graded submissions are acknowledged immediately and written
+# to QuizResult in batches from a local SQLite spool.
+QUIZ_WRITE_BEHIND = {
+    'ENABLED': False,
+    'SPOOL_PATH': BASE_DIR / 'spool' / 'quiz_submissions.sqlite3',
+    'BATCH_SIZE': 200,
+    'FLUSH_INTERVAL': 1.0,
+    'START_THREAD': True,
+}
+
+# On-disk indexes rebuilt from the question bank (topic similarity, question search).
+QUIZ_INDEX_DIR = BASE_DIR / 'indexes'
+
+# Where train_suggestion_model --save deploys a retrained model. Keep it outside
+# the source tree; until it exists the model bundled in base/ is used.
+QUIZ_SUGGESTION_MODEL_PATH = BASE_DIR / 'models' / 'suggestion_model.pkl'
+
+# Per-process ring buffer of recent suggestion-engine calls (see base/suggestion_trace.py),
+# dumped with latency histograms at /admin-suggestion-traces/.
+QUIZ_SUGGESTION_TRACE = {
+    'ENABLED': True,
+    'CAPACITY': 500,
+}
 
 
 # Password validation